@@ -5,22 +5,26 @@ Handles all API routes with Clerk JWT authentication
 
 import os
 import json
+import base64
+import hashlib
+import asyncio
+import time
 import logging
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from decimal import Decimal
 import uuid
 
-from fastapi import FastAPI, HTTPException, Depends, status, Request
+from fastapi import FastAPI, HTTPException, Depends, Query, status, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field, ValidationError
 import boto3
 from mangum import Mangum
 from dotenv import load_dotenv
 from fastapi_clerk_auth import ClerkConfig, ClerkHTTPBearer, HTTPAuthorizationCredentials
 
-from src import Database
+from src import AsyncDatabase, Database, Loaders, instrument_index, job_events, job_progress, track_queries
 from src.schemas import (
     UserCreate,
     AccountCreate,
@@ -52,8 +56,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Round-Trips", "X-DB-Time-Ms", "ETag"],
 )
 
+# Database round trips and latency per request
+@app.middleware("http")
+async def track_database_queries(request: Request, call_next):
+    """Collect database metrics for each request and expose the round-trip count"""
+    with track_queries(f"{request.method} {request.url.path}") as metrics:
+        response = await call_next(request)
+        response.headers["X-DB-Round-Trips"] = str(metrics.round_trips)
+        response.headers["X-DB-Time-Ms"] = f"{metrics.total_ms:.1f}"
+    return response
+
 # Custom exception handlers for better error messages
 @app.exception_handler(ValidationError)
 async def validation_exception_handler(request: Request, exc: ValidationError):
@@ -93,6 +108,24 @@ async def general_exception_handler(request: Request, exc: Exception):
 
 # Initialize services
 db = Database()
+db.warm_up()  # non-blocking; overlaps a paused cluster's resume with cold start
+
+# Routes await the database through a bounded thread pool instead of blocking the event loop
+adb = AsyncDatabase(db)
+
+# Relay job progress notifications when connected to Postgres directly;
+# otherwise event streams poll the job's progress
+if os.getenv("DATABASE_BACKEND") == "postgres":
+    job_events.listen()
+
+# Load the instrument search index in the background; searches use SQL until it is ready
+instrument_index.refresh_in_background(db.instruments)
+
+# Seconds between keep-alive comments on a job event stream
+JOB_EVENTS_KEEPALIVE_SECONDS = 15
+# Longest a job event stream stays open before the client reconnects
+# (kept under API Gateway's 29 second integration timeout)
+JOB_EVENTS_MAX_SECONDS = float(os.getenv("JOB_EVENTS_MAX_SECONDS", "25"))
 
 # SQS client for job queueing
 sqs_client = boto3.client('sqs', region_name=os.getenv('DEFAULT_AWS_REGION', 'us-east-1'))
@@ -110,6 +143,32 @@ async def get_current_user_id(creds: HTTPAuthorizationCredentials = Depends(cler
     logger.info(f"Authenticated user: {user_id}")
     return user_id
 
+def get_loaders() -> Loaders:
+    """Batching loaders scoped to the current request"""
+    return Loaders(db, run=adb.run)
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag from version tokens"""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match already names this ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip() for tag in header.split(",")}
+    return "*" in tags or etag in tags or etag[2:] in tags
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response for a matching ETag"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+def set_etag(response: Response, etag: str):
+    """Attach an ETag; no-cache makes browsers revalidate with If-None-Match"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+
 # Request/Response models
 class UserResponse(BaseModel):
     user: Dict[str, Any]
@@ -157,7 +216,7 @@ async def get_or_create_user(
 
     try:
         # Check if user exists
-        user = db.users.find_by_clerk_id(clerk_user_id)
+        user = await adb.users.find_by_clerk_id(clerk_user_id)
 
         if user:
             return UserResponse(user=user, created=False)
@@ -177,10 +236,10 @@ async def get_or_create_user(
         }
 
         # Insert directly with all data
-        created_clerk_id = db.users.db.insert('users', user_data, returning='clerk_user_id')
+        created_clerk_id = await adb.run(db.users.db.insert, 'users', user_data, returning='clerk_user_id')
 
         # Fetch the created user
-        created_user = db.users.find_by_clerk_id(clerk_user_id)
+        created_user = await adb.users.find_by_clerk_id(clerk_user_id)
         logger.info(f"Created new user: {clerk_user_id}")
 
         return UserResponse(user=created_user, created=True)
@@ -195,7 +254,7 @@ async def update_user(user_update: UserUpdate, clerk_user_id: str = Depends(get_
 
     try:
         # Get user
-        user = db.users.find_by_clerk_id(clerk_user_id)
+        user = await adb.users.find_by_clerk_id(clerk_user_id)
 
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -204,7 +263,8 @@ async def update_user(user_update: UserUpdate, clerk_user_id: str = Depends(get_
         update_data = user_update.model_dump(exclude_unset=True)
 
         # Use the database client directly since users table has clerk_user_id as PK
-        db.users.db.update(
+        await adb.run(
+            db.users.db.update,
             'users',
             update_data,
             "clerk_user_id = :clerk_user_id",
@@ -212,7 +272,7 @@ async def update_user(user_update: UserUpdate, clerk_user_id: str = Depends(get_
         )
 
         # Return updated user
-        updated_user = db.users.find_by_clerk_id(clerk_user_id)
+        updated_user = await adb.users.find_by_clerk_id(clerk_user_id)
         return updated_user
 
     except Exception as e:
@@ -225,25 +285,45 @@ async def list_accounts(clerk_user_id: str = Depends(get_current_user_id)):
 
     try:
         # Get accounts for user
-        accounts = db.accounts.find_by_user(clerk_user_id)
+        accounts = await adb.accounts.find_by_user(clerk_user_id)
         return accounts
 
     except Exception as e:
         logger.error(f"Error listing accounts: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/portfolio")
+async def get_portfolio(clerk_user_id: str = Depends(get_current_user_id)):
+    """Get all of the user's accounts with their positions, instruments and values
+
+    One joined query; account totals (cash plus priced positions) come from
+    the maintained account valuations.
+    """
+
+    try:
+        portfolio = await adb.load_portfolio(clerk_user_id)
+        if portfolio is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        return portfolio
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error loading portfolio: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/accounts")
 async def create_account(account: AccountCreate, clerk_user_id: str = Depends(get_current_user_id)):
     """Create new account"""
 
     try:
         # Verify user exists
-        user = db.users.find_by_clerk_id(clerk_user_id)
+        user = await adb.users.find_by_clerk_id(clerk_user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
         # Create account
-        account_id = db.accounts.create_account(
+        account_id = await adb.accounts.create_account(
             clerk_user_id=clerk_user_id,
             account_name=account.account_name,
             account_purpose=account.account_purpose,
@@ -251,7 +331,7 @@ async def create_account(account: AccountCreate, clerk_user_id: str = Depends(ge
         )
 
         # Return created account
-        created_account = db.accounts.find_by_id(account_id)
+        created_account = await adb.accounts.find_by_id(account_id)
         return created_account
 
     except Exception as e:
@@ -259,12 +339,12 @@ async def create_account(account: AccountCreate, clerk_user_id: str = Depends(ge
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/api/accounts/{account_id}")
-async def update_account(account_id: str, account_update: AccountUpdate, clerk_user_id: str = Depends(get_current_user_id)):
+async def update_account(account_id: str, account_update: AccountUpdate, clerk_user_id: str = Depends(get_current_user_id), loaders: Loaders = Depends(get_loaders)):
     """Update account"""
 
     try:
         # Verify account belongs to user
-        account = db.accounts.find_by_id(account_id)
+        account = await loaders.accounts.load(account_id)
         if not account:
             raise HTTPException(status_code=404, detail="Account not found")
 
@@ -274,10 +354,10 @@ async def update_account(account_id: str, account_update: AccountUpdate, clerk_u
 
         # Update account
         update_data = account_update.model_dump(exclude_unset=True)
-        db.accounts.update(account_id, update_data)
+        await adb.accounts.update(account_id, update_data)
 
         # Return updated account
-        updated_account = db.accounts.find_by_id(account_id)
+        updated_account = await adb.accounts.find_by_id(account_id)
         return updated_account
 
     except HTTPException:
@@ -287,12 +367,12 @@ async def update_account(account_id: str, account_update: AccountUpdate, clerk_u
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/api/accounts/{account_id}")
-async def delete_account(account_id: str, clerk_user_id: str = Depends(get_current_user_id)):
+async def delete_account(account_id: str, clerk_user_id: str = Depends(get_current_user_id), loaders: Loaders = Depends(get_loaders)):
     """Delete an account and all its positions"""
 
     try:
         # Verify account belongs to user
-        account = db.accounts.find_by_id(account_id)
+        account = await loaders.accounts.load(account_id)
         if not account:
             raise HTTPException(status_code=404, detail="Account not found")
 
@@ -300,13 +380,12 @@ async def delete_account(account_id: str, clerk_user_id: str = Depends(get_curre
         if account.get('clerk_user_id') != clerk_user_id:
             raise HTTPException(status_code=403, detail="Not authorized")
 
-        # Delete all positions first (due to foreign key constraint)
-        positions = db.positions.find_by_account(account_id)
-        for position in positions:
-            db.positions.delete(position['id'])
+        # Delete positions and the account as one unit of work
+        def delete_with_positions(tx):
+            tx.positions.delete_by_account(account_id)
+            tx.accounts.delete(account_id)
 
-        # Delete the account
-        db.accounts.delete(account_id)
+        await adb.transaction(delete_with_positions)
 
         return {"message": "Account deleted successfully"}
 
@@ -317,12 +396,12 @@ async def delete_account(account_id: str, clerk_user_id: str = Depends(get_curre
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/accounts/{account_id}/positions")
-async def list_positions(account_id: str, clerk_user_id: str = Depends(get_current_user_id)):
+async def list_positions(account_id: str, clerk_user_id: str = Depends(get_current_user_id), loaders: Loaders = Depends(get_loaders)):
     """Get positions for account"""
 
     try:
         # Verify account belongs to user
-        account = db.accounts.find_by_id(account_id)
+        account = await loaders.accounts.load(account_id)
         if not account:
             raise HTTPException(status_code=404, detail="Account not found")
 
@@ -330,19 +409,10 @@ async def list_positions(account_id: str, clerk_user_id: str = Depends(get_curre
         if account.get('clerk_user_id') != clerk_user_id:
             raise HTTPException(status_code=403, detail="Not authorized")
 
-        positions = db.positions.find_by_account(account_id)
+        # Positions with their instruments, loaded in one query
+        positions = await adb.positions.find_records_by_account(account_id)
 
-        # Format positions with instrument data for frontend
-        formatted_positions = []
-        for pos in positions:
-            # Get full instrument data
-            instrument = db.instruments.find_by_symbol(pos['symbol'])
-            formatted_positions.append({
-                **pos,
-                'instrument': instrument
-            })
-
-        return {"positions": formatted_positions}
+        return {"positions": [position.to_json() for position in positions]}
 
     except HTTPException:
         raise
@@ -351,12 +421,17 @@ async def list_positions(account_id: str, clerk_user_id: str = Depends(get_curre
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/positions")
-async def create_position(position: PositionCreate, clerk_user_id: str = Depends(get_current_user_id)):
+async def create_position(position: PositionCreate, clerk_user_id: str = Depends(get_current_user_id), loaders: Loaders = Depends(get_loaders)):
     """Create position"""
 
     try:
+        # Look up the account and the instrument concurrently
+        account, instrument = await asyncio.gather(
+            loaders.accounts.load(position.account_id),
+            loaders.instruments.load(position.symbol.upper())
+        )
+
         # Verify account belongs to user
-        account = db.accounts.find_by_id(position.account_id)
         if not account:
             raise HTTPException(status_code=404, detail="Account not found")
 
@@ -364,8 +439,7 @@ async def create_position(position: PositionCreate, clerk_user_id: str = Depends
         if account.get('clerk_user_id') != clerk_user_id:
             raise HTTPException(status_code=403, detail="Not authorized")
 
-        # Check if instrument exists, if not create it
-        instrument = db.instruments.find_by_symbol(position.symbol.upper())
+        # Create the instrument if it does not exist
         if not instrument:
             logger.info(f"Creating new instrument: {position.symbol.upper()}")
             # Create a basic instrument entry with default allocations
@@ -391,17 +465,17 @@ async def create_position(position: PositionCreate, clerk_user_id: str = Depends
                 allocation_asset_class={"equity": 100.0} if instrument_type == "stock" else {"fixed_income": 100.0}
             )
 
-            db.instruments.create_instrument(new_instrument)
+            await adb.instruments.create_instrument(new_instrument)
 
         # Add position
-        position_id = db.positions.add_position(
+        position_id = await adb.positions.add_position(
             account_id=position.account_id,
             symbol=position.symbol.upper(),
             quantity=position.quantity
         )
 
         # Return created position
-        created_position = db.positions.find_by_id(position_id)
+        created_position = await adb.positions.find_by_id(position_id)
         return created_position
 
     except HTTPException:
@@ -411,16 +485,16 @@ async def create_position(position: PositionCreate, clerk_user_id: str = Depends
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/api/positions/{position_id}")
-async def update_position(position_id: str, position_update: PositionUpdate, clerk_user_id: str = Depends(get_current_user_id)):
+async def update_position(position_id: str, position_update: PositionUpdate, clerk_user_id: str = Depends(get_current_user_id), loaders: Loaders = Depends(get_loaders)):
     """Update position"""
 
     try:
         # Get position and verify ownership
-        position = db.positions.find_by_id(position_id)
+        position = await adb.positions.find_by_id(position_id)
         if not position:
             raise HTTPException(status_code=404, detail="Position not found")
 
-        account = db.accounts.find_by_id(position['account_id'])
+        account = await loaders.accounts.load(position['account_id'])
         if not account:
             raise HTTPException(status_code=404, detail="Account not found")
 
@@ -430,10 +504,10 @@ async def update_position(position_id: str, position_update: PositionUpdate, cle
 
         # Update position
         update_data = position_update.model_dump(exclude_unset=True)
-        db.positions.update(position_id, update_data)
+        await adb.positions.update(position_id, update_data)
 
         # Return updated position
-        updated_position = db.positions.find_by_id(position_id)
+        updated_position = await adb.positions.find_by_id(position_id)
         return updated_position
 
     except HTTPException:
@@ -443,16 +517,16 @@ async def update_position(position_id: str, position_update: PositionUpdate, cle
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/api/positions/{position_id}")
-async def delete_position(position_id: str, clerk_user_id: str = Depends(get_current_user_id)):
+async def delete_position(position_id: str, clerk_user_id: str = Depends(get_current_user_id), loaders: Loaders = Depends(get_loaders)):
     """Delete position"""
 
     try:
         # Get position and verify ownership
-        position = db.positions.find_by_id(position_id)
+        position = await adb.positions.find_by_id(position_id)
         if not position:
             raise HTTPException(status_code=404, detail="Position not found")
 
-        account = db.accounts.find_by_id(position['account_id'])
+        account = await loaders.accounts.load(position['account_id'])
         if not account:
             raise HTTPException(status_code=404, detail="Account not found")
 
@@ -460,7 +534,7 @@ async def delete_position(position_id: str, clerk_user_id: str = Depends(get_cur
         if account.get('clerk_user_id') != clerk_user_id:
             raise HTTPException(status_code=403, detail="Not authorized")
 
-        db.positions.delete(position_id)
+        await adb.positions.delete(position_id)
         return {"message": "Position deleted"}
 
     except HTTPException:
@@ -469,14 +543,58 @@ async def delete_position(position_id: str, clerk_user_id: str = Depends(get_cur
         logger.error(f"Error deleting position: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/instruments/search")
+async def search_instruments(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    clerk_user_id: str = Depends(get_current_user_id)
+):
+    """Ranked instrument matches on symbol or name, for autocomplete
+
+    Answers from the in-process index as it stands; a stale index refreshes
+    in the background. Until its first load finishes, matches come from SQL.
+    """
+
+    try:
+        instrument_index.refresh_in_background(db.instruments)
+        if instrument_index.ready:
+            return instrument_index.search(q, limit=limit)
+
+        instruments = await adb.instruments.search(q)
+        return [
+            {
+                "symbol": inst["symbol"],
+                "name": inst["name"],
+                "instrument_type": inst["instrument_type"],
+                "current_price": float(inst["current_price"]) if inst.get("current_price") else None
+            }
+            for inst in instruments[:limit]
+        ]
+    except Exception as e:
+        logger.error(f"Error searching instruments: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Last instrument list served, as (etag, body), so unchanged lists are not re-read
+instrument_list = None
+
 @app.get("/api/instruments")
-async def list_instruments(clerk_user_id: str = Depends(get_current_user_id)):
+async def list_instruments(request: Request, response: Response,
+                           clerk_user_id: str = Depends(get_current_user_id)):
     """Get all available instruments for autocomplete"""
+    global instrument_list
 
     try:
-        instruments = db.instruments.find_all()
+        etag = make_etag("instruments", await adb.instruments.version())
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+
+        if instrument_list is not None and instrument_list[0] == etag:
+            return instrument_list[1]
+
+        instruments = await adb.instruments.find_all()
         # Return simplified list for autocomplete
-        return [
+        body = [
             {
                 "symbol": inst["symbol"],
                 "name": inst["name"],
@@ -485,6 +603,8 @@ async def list_instruments(clerk_user_id: str = Depends(get_current_user_id)):
             }
             for inst in instruments
         ]
+        instrument_list = (etag, body)
+        return body
     except Exception as e:
         logger.error(f"Error fetching instruments: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -495,20 +615,20 @@ async def trigger_analysis(request: AnalyzeRequest, clerk_user_id: str = Depends
 
     try:
         # Get user
-        user = db.users.find_by_clerk_id(clerk_user_id)
+        user = await adb.users.find_by_clerk_id(clerk_user_id)
 
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
         # Create job
-        job_id = db.jobs.create_job(
+        job_id = await adb.jobs.create_job(
             clerk_user_id=clerk_user_id,
             job_type="portfolio_analysis",
             request_payload=request.model_dump()
         )
 
         # Get the created job
-        job = db.jobs.find_by_id(job_id)
+        job = await adb.jobs.find_by_id(job_id)
 
         # Send to SQS
         if SQS_QUEUE_URL:
@@ -536,20 +656,67 @@ async def trigger_analysis(request: AnalyzeRequest, clerk_user_id: str = Depends
         logger.error(f"Error triggering analysis: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def encode_cursor(cursor: Optional[List[Any]]) -> Optional[str]:
+    """Encode a keyset cursor as an opaque URL-safe token"""
+    if cursor is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(cursor, default=str).encode()).decode()
+
+def decode_cursor(token: Optional[str]) -> Optional[List[Any]]:
+    """Decode a token from encode_cursor"""
+    if not token:
+        return None
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(cursor, list):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return cursor
+
 @app.get("/api/jobs/{job_id}")
-async def get_job_status(job_id: str, clerk_user_id: str = Depends(get_current_user_id)):
-    """Get job status and results"""
+async def get_job_status(job_id: str, request: Request, response: Response,
+                         fields: Optional[str] = Query(None),
+                         clerk_user_id: str = Depends(get_current_user_id)):
+    """Get job status and results
+
+    fields is a comma-separated list of the results to include (report, charts,
+    retirement); all are included when it is omitted, none when it is empty.
+    """
 
     try:
-        # Get job
-        job = db.jobs.find_by_id(job_id)
-        if not job:
+        results = None
+        if fields is not None:
+            results = [field.strip() for field in fields.split(",") if field.strip()]
+            unknown = set(results) - set(db.jobs.result_fields)
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        # Check the job's version before reading its payloads
+        version = await adb.jobs.version(job_id)
+        if not version:
             raise HTTPException(status_code=404, detail="Job not found")
 
         # Verify job belongs to user - jobs table stores clerk_user_id directly
-        if job.get('clerk_user_id') != clerk_user_id:
+        if version['clerk_user_id'] != clerk_user_id:
             raise HTTPException(status_code=403, detail="Not authorized")
 
+        etag = make_etag("job", job_id, version['version'], fields)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        # Get job
+        job = await adb.jobs.find_by_id(job_id, results=results)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        set_etag(response, etag)
+
+        if results is not None:
+            # Leave out the results that were not asked for
+            for agent, field in db.jobs.result_fields.items():
+                if agent not in results:
+                    job.pop(field, None)
+
         return job
 
     except HTTPException:
@@ -558,17 +725,125 @@ async def get_job_status(job_id: str, clerk_user_id: str = Depends(get_current_u
         logger.error(f"Error getting job status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def sse_message(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def job_event_stream(job_id: str, progress: Dict[str, Any], buffered: bool):
+    """Yield status and result events for a job until it finishes
+
+    Streams follow the job's shared progress feed, so the job is read once
+    per change (or poll, without a listener) however many streams are open,
+    and each stream sends only what changed. When the response is buffered
+    (Lambda), the stream ends after the first change so the client gets it
+    promptly and reconnects.
+    """
+    feed = job_progress.follow(job_id, progress, adb.jobs.progress)
+    try:
+        yield "retry: 1000\n\n"
+        sent_status, sent_results = None, set()
+        deadline = time.monotonic() + JOB_EVENTS_MAX_SECONDS
+        first = True
+
+        while True:
+            # Take both before yielding, so an update meanwhile is not missed
+            progress, changed_event = feed.progress, feed.changed
+            if not progress:
+                return
+
+            changed = False
+            if progress['status'] != sent_status:
+                sent_status = progress['status']
+                changed = True
+                yield sse_message("status", {
+                    'job_id': job_id,
+                    'status': progress['status'],
+                    'error_message': progress['error_message']
+                })
+            for agent in progress['results']:
+                if agent not in sent_results:
+                    sent_results.add(agent)
+                    changed = True
+                    yield sse_message("result", {'job_id': job_id, 'agent': agent})
+
+            if sent_status in ('completed', 'failed'):
+                return
+            if buffered and changed and not first:
+                return
+            first = False
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(
+                    changed_event.wait(), timeout=min(JOB_EVENTS_KEEPALIVE_SECONDS, remaining)
+                )
+            except asyncio.TimeoutError:
+                if not buffered:
+                    yield ": keep-alive\n\n"
+    finally:
+        job_progress.unfollow(job_id, feed)
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request,
+                            clerk_user_id: str = Depends(get_current_user_id)):
+    """Stream a job's progress as Server-Sent Events
+
+    Sends a 'status' event for the current and every new status and a
+    'result' event as each agent saves its result, then closes once the job
+    completes or fails (or after JOB_EVENTS_MAX_SECONDS; reconnect to resume).
+
+    Streaming needs a runtime that sends the body as it is produced (uvicorn,
+    App Runner). Behind API Gateway and Mangum the response is buffered, so
+    each request is a long poll that returns after the first change, and that
+    invocation reads the job every JOB_EVENTS_POLL_SECONDS itself.
+    """
+
+    try:
+        progress = await adb.jobs.progress(job_id)
+        if not progress:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        # Verify job belongs to user - jobs table stores clerk_user_id directly
+        if progress['clerk_user_id'] != clerk_user_id:
+            raise HTTPException(status_code=403, detail="Not authorized")
+
+        # Mangum buffers the whole response, so streams behave as long polls there
+        buffered = "aws.event" in request.scope
+        return StreamingResponse(
+            job_event_stream(job_id, progress, buffered),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error streaming job events: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/jobs")
-async def list_jobs(clerk_user_id: str = Depends(get_current_user_id)):
-    """List user's analysis jobs"""
+async def list_jobs(
+    status: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    clerk_user_id: str = Depends(get_current_user_id)
+):
+    """List user's analysis jobs, newest first
+
+    Only status and timestamps are returned; fetch /api/jobs/{job_id} for the
+    results. Pass next_cursor back as cursor to get the following page.
+    """
 
     try:
-        # Get jobs for this user (with higher limit to avoid missing recent jobs)
-        user_jobs = db.jobs.find_by_user(clerk_user_id, limit=100)
-        # Sort by created_at descending (most recent first)
-        user_jobs.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        return {"jobs": user_jobs}
+        user_jobs, next_cursor = await adb.jobs.list_by_user(
+            clerk_user_id, status=status, limit=limit, after=decode_cursor(cursor)
+        )
+        return {"jobs": user_jobs, "next_cursor": encode_cursor(next_cursor)}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing jobs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -579,19 +854,19 @@ async def reset_accounts(clerk_user_id: str = Depends(get_current_user_id)):
 
     try:
         # Get user
-        user = db.users.find_by_clerk_id(clerk_user_id)
+        user = await adb.users.find_by_clerk_id(clerk_user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
         # Get all accounts for user
-        accounts = db.accounts.find_by_user(clerk_user_id)
+        accounts = await adb.accounts.find_by_user(clerk_user_id)
 
         # Delete each account (positions will cascade delete)
         deleted_count = 0
         for account in accounts:
             try:
                 # Positions are deleted automatically via CASCADE
-                db.accounts.delete(account['id'])
+                await adb.accounts.delete(account['id'])
                 deleted_count += 1
             except Exception as e:
                 logger.warning(f"Could not delete account {account['id']}: {e}")
@@ -606,12 +881,12 @@ async def reset_accounts(clerk_user_id: str = Depends(get_current_user_id)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/populate-test-data")
-async def populate_test_data(clerk_user_id: str = Depends(get_current_user_id)):
+async def populate_test_data(clerk_user_id: str = Depends(get_current_user_id), loaders: Loaders = Depends(get_loaders)):
     """Populate test data for the current user"""
 
     try:
         # Get user
-        user = db.users.find_by_clerk_id(clerk_user_id)
+        user = await adb.users.find_by_clerk_id(clerk_user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
@@ -659,26 +934,26 @@ async def populate_test_data(clerk_user_id: str = Depends(get_current_user_id)):
             },
         }
 
-        # Check and add missing instruments
-        for symbol, info in missing_instruments.items():
-            existing = db.instruments.find_by_symbol(symbol)
-            if not existing:
-                try:
-                    from src.schemas import InstrumentCreate
-
-                    instrument_data = InstrumentCreate(
-                        symbol=symbol,
-                        name=info["name"],
-                        instrument_type=info["type"],
-                        current_price=Decimal(str(info["current_price"])),
-                        allocation_regions=info["allocation_regions"],
-                        allocation_sectors=info["allocation_sectors"],
-                        allocation_asset_class=info["allocation_asset_class"]
-                    )
-                    db.instruments.create_instrument(instrument_data)
-                    logger.info(f"Added missing instrument: {symbol}")
-                except Exception as e:
-                    logger.warning(f"Could not add instrument {symbol}: {e}")
+        # Add missing instruments in one batch (existing symbols are left untouched)
+        try:
+            from src.schemas import InstrumentCreate
+
+            new_instruments = [
+                InstrumentCreate(
+                    symbol=symbol,
+                    name=info["name"],
+                    instrument_type=info["type"],
+                    current_price=Decimal(str(info["current_price"])),
+                    allocation_regions=info["allocation_regions"],
+                    allocation_sectors=info["allocation_sectors"],
+                    allocation_asset_class=info["allocation_asset_class"]
+                )
+                for symbol, info in missing_instruments.items()
+            ]
+            await adb.instruments.create_instruments(new_instruments, skip_existing=True)
+            logger.info(f"Ensured instruments exist: {list(missing_instruments.keys())}")
+        except Exception as e:
+            logger.warning(f"Could not add instruments: {e}")
 
         # Create accounts with test data
         accounts_data = [
@@ -722,36 +997,53 @@ async def populate_test_data(clerk_user_id: str = Depends(get_current_user_id)):
             }
         ]
 
-        created_accounts = []
-        for account_data in accounts_data:
-            # Create account
-            account_id = db.accounts.create_account(
-                clerk_user_id=clerk_user_id,
-                account_name=account_data["name"],
-                account_purpose=account_data["purpose"],
-                cash_balance=Decimal(str(account_data["cash"]))
+        def create_test_accounts(tx):
+            # Create all accounts in one batch, atomically
+            return tx.accounts.create_accounts(
+                clerk_user_id,
+                [
+                    {
+                        "account_name": account_data["name"],
+                        "account_purpose": account_data["purpose"],
+                        "cash_balance": Decimal(str(account_data["cash"]))
+                    }
+                    for account_data in accounts_data
+                ]
             )
 
-            # Add positions
-            for symbol, quantity in account_data["positions"]:
+        created_accounts = await adb.transaction(create_test_accounts)
+
+        # Add positions for every account in one batch, skipping unknown instruments;
+        # a bad position is logged and skipped rather than failing the whole seed
+        positions = [
+            (account_id, symbol, Decimal(str(quantity)))
+            for account_id, account_data in zip(created_accounts, accounts_data)
+            for symbol, quantity in account_data["positions"]
+        ]
+        known_symbols = {
+            inst["symbol"]
+            for inst in await adb.instruments.find_by_symbols(list({p[1] for p in positions}))
+        }
+        for symbol in sorted({p[1] for p in positions} - known_symbols):
+            logger.warning(f"Could not add position {symbol}: instrument not found")
+        positions = [p for p in positions if p[1] in known_symbols]
+        try:
+            await adb.positions.add_positions(positions)
+        except Exception as e:
+            logger.warning(f"Batch position insert failed, adding positions one by one: {e}")
+            for account_id, symbol, quantity in positions:
                 try:
-                    db.positions.add_position(
-                        account_id=account_id,
-                        symbol=symbol,
-                        quantity=Decimal(str(quantity))
-                    )
+                    await adb.positions.add_position(account_id, symbol, quantity)
                 except Exception as e:
                     logger.warning(f"Could not add position {symbol}: {e}")
 
-            created_accounts.append(account_id)
-
-        # Get all accounts with their positions for summary
-        all_accounts = []
-        for account_id in created_accounts:
-            account = db.accounts.find_by_id(account_id)
-            positions = db.positions.find_by_account(account_id)
-            account['positions'] = positions
-            all_accounts.append(account)
+        # Get all accounts with their positions for summary: one query each, not one per account
+        all_accounts, all_positions = await asyncio.gather(
+            loaders.accounts.load_many(created_accounts),
+            loaders.positions.load_many(created_accounts),
+        )
+        for account, account_positions in zip(all_accounts, all_positions):
+            account['positions'] = account_positions
 
         return {
             "message": "Test data populated successfully",
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Test the API routes against a fake Data API, with Clerk authentication overridden
+Runs without AWS, a database or a Clerk token: uv run test_api.py
+"""
+
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+# The offline check helpers live with the database package's test scripts
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "database"))
+
+# main.py builds its Database at import; give it placeholder settings, and keep
+# its startup warm-up from waiting on instance metadata for credentials
+os.environ.setdefault("AURORA_CLUSTER_ARN", "arn:aws:rds:test")
+os.environ.setdefault("AURORA_SECRET_ARN", "arn:aws:secret:test")
+os.environ.setdefault("AWS_EC2_METADATA_DISABLED", "true")
+
+from fastapi.testclient import TestClient
+
+import main
+from checks import fake_database, patched, result, run_checks
+from src import AsyncDatabase, InstrumentIndex
+from test_models import PORTFOLIO_TYPES, portfolio_row
+
+USER_ID = "user_1"
+
+
+def fake_api(handler=None):
+    """A TestClient for the app, signed in as USER_ID, whose database is a FakeDataAPI
+
+    Returns:
+        Tuple of (client, fake)
+    """
+    db, fake = fake_database(handler)
+    main.db = db
+    main.instrument_list = None
+    main.instrument_index = InstrumentIndex()
+    main.adb = AsyncDatabase(db, max_workers=2)
+    main.app.dependency_overrides[main.get_current_user_id] = lambda: USER_ID
+    return TestClient(main.app), fake
+
+
+def test_portfolio_in_one_query():
+    """GET /api/portfolio returns every account with positions and values from one query"""
+    client, fake = fake_api()
+    fake.respond(result([
+        portfolio_row("a1", "SPY", account_name="ISA", cash_balance="100", account_value="550",
+                      position_id="p1", quantity="1", name="S&P", instrument_type="etf", current_price="450"),
+        portfolio_row("a2", None, account_name="Cash", cash_balance="50", account_value="50"),
+    ], types=PORTFOLIO_TYPES))
+
+    response = client.get("/api/portfolio")
+    assert response.status_code == 200, response.text
+    portfolio = response.json()
+    assert portfolio["total_value"] == 600.0
+    assert [account["name"] for account in portfolio["accounts"]] == ["ISA", "Cash"]
+    [position] = portfolio["accounts"][0]["positions"]
+    assert position["instrument"]["current_price"] == 450.0
+    assert response.headers["X-DB-Round-Trips"] == "1"
+    assert fake.calls[0][1]["parameters"] == [{"name": "user_id", "value": {"stringValue": USER_ID}}]
+
+
+def test_portfolio_unknown_user():
+    """GET /api/portfolio is a 404 for a user that does not exist"""
+    client, fake = fake_api()
+    fake.respond(result([], types=PORTFOLIO_TYPES))
+    response = client.get("/api/portfolio")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "The requested resource was not found."
+
+
+INSTRUMENTS = [{"symbol": "SPY", "name": "S&P", "instrument_type": "etf", "current_price": "450.00"},
+               {"symbol": "TLT", "name": "Treasury", "instrument_type": "etf", "current_price": None}]
+
+
+def instruments_table(version="0:2025-01-02 03:04:05"):
+    """Handler answering the instruments version query and full reads"""
+    deletes, updated_at = version.split(":", 1)
+
+    def handler(operation, kwargs):
+        sql = kwargs.get("sql", "")
+        if "instruments_version" in sql:
+            return result([{"deletes": int(deletes), "updated_at": updated_at}])
+        if "FROM instruments" in sql:
+            return {"columnMetadata": [{"name": col, "typeName": "numeric" if col == "current_price" else "varchar"}
+                                       for col in INSTRUMENTS[0]],
+                    "formattedRecords": json.dumps(INSTRUMENTS)}
+        return None
+
+    return handler
+
+
+def test_instruments_not_modified():
+    """GET /api/instruments answers a matching If-None-Match with 304, reading only the version"""
+    client, fake = fake_api(instruments_table())
+
+    first = client.get("/api/instruments")
+    assert first.status_code == 200
+    assert [row["current_price"] for row in first.json()] == [450.0, None]
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"') and first.headers["Cache-Control"] == "private, no-cache"
+    reads = len(fake.statements())
+
+    again = client.get("/api/instruments", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["ETag"] == etag
+    assert len(fake.statements()) == reads + 1
+    assert "instruments_version" in fake.statements()[-1]
+
+
+def test_instruments_etag_follows_version():
+    """An unchanged version serves the last list without re-reading; a moved one changes the ETag"""
+    client, fake = fake_api(instruments_table())
+    etag = client.get("/api/instruments").headers["ETag"]
+    reads = len(fake.statements())
+
+    assert client.get("/api/instruments").headers["ETag"] == etag
+    assert len(fake.statements()) == reads + 1
+
+    fake.handler = instruments_table("1:2025-01-02 03:04:05")
+    changed = client.get("/api/instruments", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+
+
+JOB_ID = "00000000-0000-0000-0000-00000000000a"
+
+
+def test_job_not_modified():
+    """GET /api/jobs/{id} checks owner and version first; a matching ETag skips the payload read"""
+    client, fake = fake_api()
+    version = {"clerk_user_id": USER_ID, "version": "2025-01-02 03:04:05"}
+    job = {"id": JOB_ID, "clerk_user_id": USER_ID, "status": "completed", "results": None}
+    fake.respond(result([version]), result([job], types={"results": "jsonb"}), result([version]))
+
+    first = client.get(f"/api/jobs/{JOB_ID}")
+    assert first.status_code == 200 and first.json()["status"] == "completed"
+    again = client.get(f"/api/jobs/{JOB_ID}", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert len(fake.statements()) == 3
+    assert "job_results r WHERE r.job_id = j.id) )::text AS version" in fake.statements()[-1]
+
+
+def test_job_etag_depends_on_fields_and_owner():
+    """Another fields selection gets another ETag, and another user's job is a 403 before any ETag"""
+    client, fake = fake_api()
+    version = {"clerk_user_id": USER_ID, "version": "2025-01-02 03:04:05"}
+    job = {"id": JOB_ID, "clerk_user_id": USER_ID, "status": "completed", "results": None}
+    fake.respond(result([version]), result([job], types={"results": "jsonb"}),
+                 result([version]), result([job], types={"results": "jsonb"}),
+                 result([dict(version, clerk_user_id="user_2")]))
+
+    full = client.get(f"/api/jobs/{JOB_ID}")
+    charts = client.get(f"/api/jobs/{JOB_ID}?fields=charts", headers={"If-None-Match": full.headers["ETag"]})
+    assert charts.status_code == 200 and charts.headers["ETag"] != full.headers["ETag"]
+    assert "report_payload" not in charts.json() and "charts_payload" in charts.json()
+
+    other = client.get(f"/api/jobs/{JOB_ID}", headers={"If-None-Match": "*"})
+    assert other.status_code == 403 and "ETag" not in other.headers
+
+
+def job_progress_reads(*steps):
+    """Handler answering Jobs.progress with each step in turn (repeating the last)"""
+    steps = list(steps)
+
+    def handler(operation, kwargs):
+        if "string_agg(r.agent" in kwargs.get("sql", ""):
+            status, results = steps.pop(0) if len(steps) > 1 else steps[0]
+            return result([{"clerk_user_id": USER_ID, "status": status, "error_message": None,
+                            "results": results}])
+        return None
+
+    return handler
+
+
+def test_job_events_stream():
+    """GET /api/jobs/{id}/events sends each new status and result once, then closes when done"""
+    client, fake = fake_api(job_progress_reads(
+        ("pending", None), ("running", "report"), ("running", "report"), ("completed", "charts,report"),
+    ))
+    with patched(main.job_progress, poll_seconds=0.01):
+        response = client.get(f"/api/jobs/{JOB_ID}/events")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [line.split(": ", 1)[1] for line in response.text.splitlines() if line.startswith("event: ")]
+    assert events == ["status", "status", "result", "status", "result"]
+    data = [json.loads(line[6:]) for line in response.text.splitlines() if line.startswith("data: ")]
+    assert [d.get("status") or d.get("agent") for d in data] == ["pending", "running", "report", "completed", "charts"]
+
+
+def test_job_events_need_the_owner():
+    """Event streams are 404 for unknown jobs and 403 for other users' jobs"""
+    client, fake = fake_api()
+    fake.respond(result([]), result([{"clerk_user_id": "user_2", "status": "running",
+                                      "error_message": None, "results": None}]))
+    assert client.get(f"/api/jobs/{JOB_ID}/events").status_code == 404
+    assert client.get(f"/api/jobs/{JOB_ID}/events").status_code == 403
+
+
+def test_search_falls_back_to_sql():
+    """Before the index has loaded, search answers from SQL instead of waiting for it"""
+    release = threading.Event()
+
+    def handler(operation, kwargs):
+        if "instruments_version" in kwargs.get("sql", ""):
+            release.wait(5)
+            return result([])
+        if "LOWER(symbol) LIKE LOWER(:query)" in kwargs.get("sql", ""):
+            return result(INSTRUMENTS, types={"current_price": "numeric"})
+        return None
+
+    client, fake = fake_api(handler)
+    try:
+        response = client.get("/api/instruments/search", params={"q": "sp", "limit": 1})
+        assert response.status_code == 200
+        assert response.json() == [{"symbol": "SPY", "name": "S&P", "instrument_type": "etf",
+                                    "current_price": 450.0}]
+        assert not main.instrument_index.ready
+    finally:
+        release.set()
+
+
+def test_search_answers_from_the_index():
+    """A loaded index answers searches; a stale one refreshes off the request"""
+    reading, release = threading.Event(), threading.Event()
+    table = instruments_table()
+
+    def handler(operation, kwargs):
+        if main.instrument_index.ready and "instruments_version" in kwargs.get("sql", ""):
+            reading.set()
+            release.wait(5)
+        return table(operation, kwargs)
+
+    client, fake = fake_api(handler)
+    index = main.instrument_index
+    index.refresh(main.db.instruments)
+    index.refresh_seconds = 0
+    try:
+        response = client.get("/api/instruments/search", params={"q": "treas"})
+        assert response.json() == [{"symbol": "TLT", "name": "Treasury", "instrument_type": "etf",
+                                    "current_price": None}]
+        # The refresh it started is still waiting on the database
+        assert reading.wait(5) and index._refresh_lock.locked()
+        assert not any("LIKE" in sql for sql in fake.statements())
+    finally:
+        release.set()
+
+
+if __name__ == "__main__":
+    run_checks("Testing API routes", globals())
@@ -4,7 +4,7 @@ Chart Maker Agent - creates visualization data for portfolio analysis.
 
 import os
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from agents.extensions.models.litellm_model import LitellmModel
 
@@ -13,10 +13,13 @@ from templates import CHARTER_INSTRUCTIONS, create_charter_task
 logger = logging.getLogger()
 
 
-def analyze_portfolio(portfolio_data: Dict[str, Any]) -> str:
+def analyze_portfolio(portfolio_data: Dict[str, Any], exposure: Optional[Dict[str, Dict[str, float]]] = None) -> str:
     """
     Analyze the portfolio to understand its composition and calculate key metrics.
     Returns detailed breakdown of positions, accounts, and calculated allocations.
+
+    If exposure (from db.allocations.user_exposure) is given, the allocation
+    breakdown uses it instead of aggregating the instruments' JSONB here.
     """
     result = []
     total_value = 0.0
@@ -80,46 +83,51 @@ def analyze_portfolio(portfolio_data: Dict[str, Any]) -> str:
     # Calculate aggregated allocations for the agent
     result.append("\nCalculated Allocations:")
     
-    # Asset class aggregation
-    asset_classes = {}
-    regions = {}
-    sectors = {}
-    
-    for account in portfolio_data.get("accounts", []):
-        for position in account.get("positions", []):
-            symbol = position.get("symbol")
-            quantity = float(position.get("quantity", 0))
-            instrument = position.get("instrument", {})
-            # Handle None or missing current_price
-            current_price = instrument.get("current_price")
-            if current_price is None or current_price == "":
-                price = 1.0  # Default price if not available
-                logger.warning(f"Charter: No price for {symbol}, using default of 1.0")
-            else:
-                price = float(current_price)
-            value = quantity * price
+    # Asset class aggregation (already done in SQL when exposure is given)
+    if exposure is not None:
+        asset_classes = dict(exposure.get("asset_class", {}))
+        regions = dict(exposure.get("region", {}))
+        sectors = dict(exposure.get("sector", {}))
+    else:
+        asset_classes = {}
+        regions = {}
+        sectors = {}
+
+        for account in portfolio_data.get("accounts", []):
+            for position in account.get("positions", []):
+                symbol = position.get("symbol")
+                quantity = float(position.get("quantity", 0))
+                instrument = position.get("instrument", {})
+                # Handle None or missing current_price
+                current_price = instrument.get("current_price")
+                if current_price is None or current_price == "":
+                    price = 1.0  # Default price if not available
+                    logger.warning(f"Charter: No price for {symbol}, using default of 1.0")
+                else:
+                    price = float(current_price)
+                value = quantity * price
             
-            # Aggregate asset classes
-            for asset_class, pct in instrument.get("allocation_asset_class", {}).items():
-                asset_value = value * (pct / 100)
-                asset_classes[asset_class] = asset_classes.get(asset_class, 0) + asset_value
+                # Aggregate asset classes
+                for asset_class, pct in instrument.get("allocation_asset_class", {}).items():
+                    asset_value = value * (pct / 100)
+                    asset_classes[asset_class] = asset_classes.get(asset_class, 0) + asset_value
             
-            # Aggregate regions
-            for region, pct in instrument.get("allocation_regions", {}).items():
-                region_value = value * (pct / 100)
-                regions[region] = regions.get(region, 0) + region_value
+                # Aggregate regions
+                for region, pct in instrument.get("allocation_regions", {}).items():
+                    region_value = value * (pct / 100)
+                    regions[region] = regions.get(region, 0) + region_value
             
-            # Aggregate sectors
-            for sector, pct in instrument.get("allocation_sectors", {}).items():
-                sector_value = value * (pct / 100)
-                sectors[sector] = sectors.get(sector, 0) + sector_value
+                # Aggregate sectors
+                for sector, pct in instrument.get("allocation_sectors", {}).items():
+                    sector_value = value * (pct / 100)
+                    sectors[sector] = sectors.get(sector, 0) + sector_value
     
-    # Add cash to asset classes
+    # Add cash to asset classes (already included in the SQL exposure)
     total_cash = sum(
         float(acc.get("cash_balance")) if acc.get("cash_balance") is not None else 0
         for acc in portfolio_data.get("accounts", [])
     )
-    if total_cash > 0:
+    if total_cash > 0 and exposure is None:
         asset_classes["cash"] = asset_classes.get("cash", 0) + total_cash
     
     result.append("\nAsset Classes:")
@@ -151,8 +159,16 @@ def create_agent(job_id: str, portfolio_data: Dict[str, Any], db=None):
     
     model = LitellmModel(model=f"bedrock/{model_id}")
     
+    # Aggregate allocations in SQL when the portfolio belongs to a stored user
+    exposure = None
+    if db and portfolio_data.get("user_id"):
+        try:
+            exposure = db.allocations.user_exposure(portfolio_data["user_id"])
+        except Exception as e:
+            logger.warning(f"Charter: Could not load exposure from database, aggregating locally: {e}")
+
     # Analyze the portfolio upfront
-    portfolio_analysis = analyze_portfolio(portfolio_data)
+    portfolio_analysis = analyze_portfolio(portfolio_data, exposure)
     logger.info(f"Charter: Portfolio analysis generated, length: {len(portfolio_analysis)}")
     
     # Create the task using template
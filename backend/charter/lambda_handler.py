@@ -19,7 +19,7 @@ except ImportError:
     pass
 
 # Import database package
-from src import Database
+from src import Database, track_queries
 
 from templates import CHARTER_INSTRUCTIONS
 from agent import create_agent
@@ -28,6 +28,12 @@ from observability import observe
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Start waking the database during init (non-blocking); invocations create their own client
+try:
+    Database().warm_up()
+except Exception as e:
+    logger.warning(f"Database warm-up skipped: {e}")
+
 @retry(
     retry=retry_if_exception_type(RateLimitError),
     stop=stop_after_attempt(5),
@@ -135,7 +141,7 @@ def lambda_handler(event, context):
     }
     """
     # Wrap entire handler with observability context
-    with observe():
+    with observe(), track_queries("charter"):
         try:
             logger.info(f"Charter Lambda invoked with event keys: {list(event.keys()) if isinstance(event, dict) else 'not a dict'}")
 
@@ -161,36 +167,13 @@ def lambda_handler(event, context):
                     job = db.jobs.find_by_id(job_id)
                     if job:
                         user_id = job['clerk_user_id']
-                        user = db.users.find_by_clerk_id(user_id)
-                        accounts = db.accounts.find_by_user(user_id)
-
-                        portfolio_data = {
+                        portfolio_data = db.load_portfolio(user_id) or {
                             'user_id': user_id,
-                            'job_id': job_id,
-                            'years_until_retirement': user.get('years_until_retirement', 30) if user else 30,
                             'accounts': []
                         }
-
-                        for account in accounts:
-                            account_data = {
-                                'id': account['id'],
-                                'name': account['account_name'],
-                                'type': account.get('account_type', 'investment'),
-                                'cash_balance': float(account.get('cash_balance', 0)),
-                                'positions': []
-                            }
-
-                            positions = db.positions.find_by_account(account['id'])
-                            for position in positions:
-                                instrument = db.instruments.find_by_symbol(position['symbol'])
-                                if instrument:
-                                    account_data['positions'].append({
-                                        'symbol': position['symbol'],
-                                        'quantity': float(position['quantity']),
-                                        'instrument': instrument
-                                    })
-
-                            portfolio_data['accounts'].append(account_data)
+                        portfolio_data['job_id'] = job_id
+                        if portfolio_data.get('years_until_retirement') is None:
+                            portfolio_data['years_until_retirement'] = 30
 
                         logger.info(f"Charter: Loaded {len(portfolio_data['accounts'])} accounts with positions")
                     else:
@@ -0,0 +1,195 @@
+"""
+Shared helpers for the offline test scripts (test_*.py)
+They run without AWS or a database, directly (uv run test_client.py) or under pytest
+"""
+
+import json
+import sys
+import unittest
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+
+def run_checks(title: str, namespace: Dict[str, Any]):
+    """Run a script's test_* functions in order, report each, and exit non-zero on failure
+
+    Usage (at the end of a test script):
+        if __name__ == "__main__":
+            run_checks("Testing keyset pagination", globals())
+    """
+    tests = [value for name, value in namespace.items() if name.startswith("test_") and callable(value)]
+
+    print(f"🧪 {title}")
+    print("=" * 50)
+
+    failed = skipped = 0
+    for test in tests:
+        description = (test.__doc__ or test.__name__).strip().splitlines()[0]
+        try:
+            test()
+            print(f"✅ {description}")
+        except unittest.SkipTest as e:
+            skipped += 1
+            print(f"⏭️  {description}: skipped ({e})")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {description}: {e}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {description}: {type(e).__name__}: {e}")
+
+    print("=" * 50)
+    if failed:
+        print(f"❌ {failed}/{len(tests)} checks failed")
+        sys.exit(1)
+    print(f"✅ All {len(tests) - skipped} checks passed" + (f" ({skipped} skipped)" if skipped else ""))
+
+
+def require(module: str):
+    """Skip the current check when an optional dependency is not installed
+
+    Raises unittest.SkipTest, which pytest also reports as a skip.
+    """
+    try:
+        __import__(module)
+    except ImportError:
+        raise unittest.SkipTest(f"{module} is not installed")
+
+
+@contextmanager
+def patched(target: Any, **values):
+    """Temporarily set attributes (e.g. module constants), restoring them afterwards"""
+    saved = {name: getattr(target, name) for name in values}
+    for name, value in values.items():
+        setattr(target, name, value)
+    try:
+        yield target
+    finally:
+        for name, value in saved.items():
+            setattr(target, name, value)
+
+
+class FakeDataAPI:
+    """Stands in for the boto3 rds-data client
+
+    Every call is recorded as (operation, kwargs). Responses queued with
+    respond() are returned in order (exceptions are raised); when none are
+    queued, handler(operation, kwargs) is asked, and failing that the call
+    gets an empty result.
+    """
+
+    def __init__(self, handler: Callable[[str, Dict], Optional[Dict]] = None):
+        self.calls: List[tuple] = []
+        self.responses: List[Any] = []
+        self.handler = handler
+        self.transactions = 0
+
+    def respond(self, *responses: Any):
+        """Queue responses for the next calls"""
+        self.responses.extend(responses)
+
+    def operations(self) -> List[str]:
+        """Operation names of every call so far"""
+        return [operation for operation, _ in self.calls]
+
+    def statements(self, operation: str = "execute_statement") -> List[str]:
+        """SQL of every call of one operation, whitespace collapsed"""
+        return [" ".join(kwargs["sql"].split()) for op, kwargs in self.calls if op == operation]
+
+    def __getattr__(self, operation: str):
+        if operation.startswith("_"):
+            raise AttributeError(operation)
+
+        def call(**kwargs):
+            self.calls.append((operation, kwargs))
+            if self.responses:
+                response = self.responses.pop(0)
+            else:
+                response = self.handler(operation, kwargs) if self.handler else None
+                if response is None:
+                    response = self._empty(operation)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        return call
+
+    def _empty(self, operation: str) -> Dict:
+        """Response for a call nothing was queued for"""
+        if operation == "begin_transaction":
+            self.transactions += 1
+            return {"transactionId": f"tx-{self.transactions}"}
+        if operation == "batch_execute_statement":
+            return {"updateResults": []}
+        if operation in ("commit_transaction", "rollback_transaction"):
+            return {"transactionStatus": "done"}
+        return {"records": [], "columnMetadata": [], "numberOfRecordsUpdated": 0}
+
+
+# Column typeNames reported for Python values in result()
+TYPE_NAMES = {bool: "bool", int: "int8", float: "float8", str: "varchar", dict: "jsonb", list: "jsonb"}
+
+
+def result(rows: List[Dict], types: Dict[str, str] = None) -> Dict:
+    """ExecuteStatement response holding rows (dicts sharing their keys)
+
+    typeNames come from types, else from the first non-null value of each
+    column; numeric and json values are sent as strings, as the Data API does.
+    """
+    columns = list(rows[0]) if rows else list(types or {})
+    types = dict(types or {})
+    for col in columns:
+        if col not in types:
+            sample = next((row[col] for row in rows if row[col] is not None), "")
+            types[col] = TYPE_NAMES.get(type(sample), "varchar")
+
+    records = [[_field(row[col]) for col in columns] for row in rows]
+    return {
+        "columnMetadata": [{"name": col, "typeName": types[col]} for col in columns],
+        "records": records,
+        "numberOfRecordsUpdated": 0,
+    }
+
+
+def updated(count: int) -> Dict:
+    """ExecuteStatement response for a write that touched count rows"""
+    return {"records": [], "numberOfRecordsUpdated": count}
+
+
+def client_error(code: str, message: str = "", operation: str = "ExecuteStatement") -> ClientError:
+    """A ClientError like the ones boto3 raises for Data API failures"""
+    return ClientError({"Error": {"Code": code, "Message": message}}, operation)
+
+
+def fake_database(handler: Callable[[str, Dict], Optional[Dict]] = None):
+    """A Database on the Data API backend whose boto3 client is a FakeDataAPI
+
+    The shared instrument cache is emptied, so lookups start cold.
+
+    Returns:
+        Tuple of (db, fake)
+    """
+    from src import Database, instrument_cache
+
+    db = Database(cluster_arn="arn:aws:rds:test", secret_arn="arn:aws:secret:test", backend="data_api")
+    fake = FakeDataAPI(handler)
+    db.client.client = fake
+    instrument_cache.invalidate()
+    return db, fake
+
+
+def _field(value: Any) -> Dict:
+    """Encode one value as a Data API field"""
+    if value is None:
+        return {"isNull": True}
+    if isinstance(value, bool):
+        return {"booleanValue": value}
+    if isinstance(value, int):
+        return {"longValue": value}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (dict, list)):
+        return {"stringValue": json.dumps(value)}
+    return {"stringValue": str(value)}
@@ -0,0 +1,24 @@
+-- Alex Financial Planner Database Schema
+-- Version: 002
+-- Description: Indexes for the hot read paths
+
+-- Trigram matching for Instruments.search (LOWER(...) LIKE '%term%')
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- A user's jobs, newest first (Jobs.find_by_user / iter_by_user keyset order)
+CREATE INDEX IF NOT EXISTS idx_jobs_user_created
+    ON jobs(clerk_user_id, created_at DESC, id DESC);
+
+-- Substring search on symbol and name
+CREATE INDEX IF NOT EXISTS idx_instruments_symbol_trgm
+    ON instruments USING GIN (LOWER(symbol) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_instruments_name_trgm
+    ON instruments USING GIN (LOWER(name) gin_trgm_ops);
+
+-- Positions by account, answering symbol/quantity from the index alone
+CREATE INDEX IF NOT EXISTS idx_positions_account_symbol
+    ON positions(account_id, symbol) INCLUDE (quantity);
+
+-- Superseded by the composite indexes above
+DROP INDEX IF EXISTS idx_jobs_user;
+DROP INDEX IF EXISTS idx_positions_account;
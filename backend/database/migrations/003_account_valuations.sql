@@ -0,0 +1,129 @@
+-- Alex Financial Planner Database Schema
+-- Version: 003
+-- Description: Account valuations maintained on write, with per-user totals
+
+-- One row per account, refreshed by triggers whenever its positions, its cash
+-- balance or the price of an instrument it holds changes
+CREATE TABLE IF NOT EXISTS account_valuations (
+    account_id UUID PRIMARY KEY REFERENCES accounts(id) ON DELETE CASCADE,
+    clerk_user_id VARCHAR(255) REFERENCES users(clerk_user_id) ON DELETE CASCADE,
+    cash_balance DECIMAL(12,2) NOT NULL DEFAULT 0,
+    positions_value DECIMAL(20,4) NOT NULL DEFAULT 0,   -- Sum of quantity * current_price
+    total_value DECIMAL(20,4) GENERATED ALWAYS AS (cash_balance + positions_value) STORED,
+    num_positions INTEGER NOT NULL DEFAULT 0,
+    unpriced_positions INTEGER NOT NULL DEFAULT 0,      -- Positions whose instrument has no price
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_account_valuations_user ON account_valuations(clerk_user_id);
+
+-- Recompute the valuations of the given accounts
+CREATE OR REPLACE FUNCTION refresh_account_valuations(account_ids UUID[])
+RETURNS void AS $$
+BEGIN
+    -- Serialize concurrent refreshes of the same account; NO KEY UPDATE does not
+    -- conflict with the KEY SHARE locks taken by position foreign keys
+    PERFORM 1 FROM accounts WHERE id = ANY(account_ids) ORDER BY id FOR NO KEY UPDATE;
+
+    INSERT INTO account_valuations (
+        account_id, clerk_user_id, cash_balance, positions_value,
+        num_positions, unpriced_positions, updated_at
+    )
+    SELECT a.id, a.clerk_user_id, COALESCE(a.cash_balance, 0),
+           COALESCE(SUM(p.quantity * i.current_price), 0),
+           COUNT(p.id),
+           COUNT(p.id) FILTER (WHERE i.current_price IS NULL),
+           NOW()
+    FROM accounts a
+    LEFT JOIN positions p ON p.account_id = a.id
+    LEFT JOIN instruments i ON i.symbol = p.symbol
+    WHERE a.id = ANY(account_ids)
+    GROUP BY a.id
+    ON CONFLICT (account_id) DO UPDATE SET
+        clerk_user_id = EXCLUDED.clerk_user_id,
+        cash_balance = EXCLUDED.cash_balance,
+        positions_value = EXCLUDED.positions_value,
+        num_positions = EXCLUDED.num_positions,
+        unpriced_positions = EXCLUDED.unpriced_positions,
+        updated_at = EXCLUDED.updated_at;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Positions: one refresh per statement for every account it touched
+CREATE OR REPLACE FUNCTION refresh_valuations_for_positions()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM refresh_account_valuations(ARRAY(SELECT DISTINCT account_id FROM new_rows));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM refresh_account_valuations(ARRAY(SELECT DISTINCT account_id FROM old_rows));
+    ELSE
+        PERFORM refresh_account_valuations(ARRAY(
+            SELECT account_id FROM new_rows UNION SELECT account_id FROM old_rows
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables allow only one event per trigger
+CREATE TRIGGER refresh_valuations_positions_insert AFTER INSERT ON positions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_valuations_for_positions();
+
+CREATE TRIGGER refresh_valuations_positions_update AFTER UPDATE ON positions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_valuations_for_positions();
+
+CREATE TRIGGER refresh_valuations_positions_delete AFTER DELETE ON positions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_valuations_for_positions();
+
+-- Accounts: new accounts and cash balance changes
+CREATE OR REPLACE FUNCTION refresh_valuations_for_account()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM refresh_account_valuations(ARRAY[NEW.id]);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER refresh_valuations_accounts AFTER INSERT OR UPDATE OF cash_balance, clerk_user_id
+    ON accounts
+    FOR EACH ROW EXECUTE FUNCTION refresh_valuations_for_account();
+
+-- Instruments: every account holding a symbol whose price changed, once per statement
+-- (so a bulk price update refreshes each affected account once)
+CREATE OR REPLACE FUNCTION refresh_valuations_for_prices()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM refresh_account_valuations(ARRAY(
+        SELECT DISTINCT p.account_id
+        FROM new_rows n
+        JOIN old_rows o ON o.symbol = n.symbol
+        JOIN positions p ON p.symbol = n.symbol
+        WHERE n.current_price IS DISTINCT FROM o.current_price
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER refresh_valuations_instruments AFTER UPDATE ON instruments
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_valuations_for_prices();
+
+-- Per-user totals (reads only that user's account rows)
+CREATE OR REPLACE VIEW user_valuations AS
+SELECT clerk_user_id,
+       SUM(cash_balance) AS cash_balance,
+       SUM(positions_value) AS positions_value,
+       SUM(total_value) AS total_value,
+       COUNT(*) AS num_accounts,
+       SUM(num_positions) AS num_positions,
+       SUM(unpriced_positions) AS unpriced_positions,
+       MAX(updated_at) AS updated_at
+FROM account_valuations
+GROUP BY clerk_user_id;
+
+-- Backfill existing accounts
+SELECT refresh_account_valuations(ARRAY(SELECT id FROM accounts));
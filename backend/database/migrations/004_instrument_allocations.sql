@@ -0,0 +1,58 @@
+-- Alex Financial Planner Database Schema
+-- Version: 004
+-- Description: Normalized instrument allocations for SQL-side exposure aggregation
+
+-- One row per instrument, dimension and bucket, mirroring the allocation JSONB columns
+CREATE TABLE IF NOT EXISTS instrument_allocations (
+    symbol VARCHAR(20) REFERENCES instruments(symbol) ON DELETE CASCADE,
+    dimension VARCHAR(20) NOT NULL,    -- 'asset_class', 'region', 'sector'
+    bucket VARCHAR(50) NOT NULL,       -- e.g. 'equity', 'north_america', 'technology'
+    pct DECIMAL(7,4) NOT NULL,         -- 0-100
+    PRIMARY KEY (symbol, dimension, bucket)
+);
+
+CREATE INDEX IF NOT EXISTS idx_instrument_allocations_bucket
+    ON instrument_allocations(dimension, bucket);
+
+-- Rewrite an instrument's rows from its JSONB columns
+CREATE OR REPLACE FUNCTION sync_instrument_allocations()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM instrument_allocations WHERE symbol = NEW.symbol;
+
+    INSERT INTO instrument_allocations (symbol, dimension, bucket, pct)
+    SELECT NEW.symbol, source.dimension, entry.key, entry.value::text::numeric
+    FROM (VALUES
+        ('asset_class', NEW.allocation_asset_class),
+        ('region', NEW.allocation_regions),
+        ('sector', NEW.allocation_sectors)
+    ) AS source(dimension, allocation)
+    CROSS JOIN LATERAL jsonb_each(COALESCE(source.allocation, '{}'::jsonb)) AS entry
+    WHERE jsonb_typeof(entry.value) = 'number';
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER sync_instrument_allocations_insert AFTER INSERT ON instruments
+    FOR EACH ROW EXECUTE FUNCTION sync_instrument_allocations();
+
+CREATE TRIGGER sync_instrument_allocations_update AFTER UPDATE ON instruments
+    FOR EACH ROW
+    WHEN (OLD.allocation_asset_class IS DISTINCT FROM NEW.allocation_asset_class
+          OR OLD.allocation_regions IS DISTINCT FROM NEW.allocation_regions
+          OR OLD.allocation_sectors IS DISTINCT FROM NEW.allocation_sectors)
+    EXECUTE FUNCTION sync_instrument_allocations();
+
+-- Backfill existing instruments
+INSERT INTO instrument_allocations (symbol, dimension, bucket, pct)
+SELECT i.symbol, source.dimension, entry.key, entry.value::text::numeric
+FROM instruments i
+CROSS JOIN LATERAL (VALUES
+    ('asset_class', i.allocation_asset_class),
+    ('region', i.allocation_regions),
+    ('sector', i.allocation_sectors)
+) AS source(dimension, allocation)
+CROSS JOIN LATERAL jsonb_each(COALESCE(source.allocation, '{}'::jsonb)) AS entry
+WHERE jsonb_typeof(entry.value) = 'number'
+ON CONFLICT (symbol, dimension, bucket) DO NOTHING;
@@ -0,0 +1,30 @@
+-- Alex Financial Planner Database Schema
+-- Version: 005
+-- Description: Daily closing price history, partitioned by month
+
+CREATE TABLE IF NOT EXISTS price_history (
+    symbol VARCHAR(20) NOT NULL,        -- Any ticker in the daily download, not only instruments
+    date DATE NOT NULL,
+    close DECIMAL(14,4) NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (symbol, date)
+) PARTITION BY RANGE (date);
+
+-- Create the monthly partition holding a date, if it does not exist yet
+CREATE OR REPLACE FUNCTION ensure_price_history_partition(day DATE)
+RETURNS void AS $$
+DECLARE
+    month_start DATE := date_trunc('month', day)::date;
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF price_history FOR VALUES FROM (%L) TO (%L)',
+        'price_history_' || to_char(month_start, 'YYYY_MM'),
+        month_start,
+        (month_start + INTERVAL '1 month')::date
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partitions for the current and previous month
+SELECT ensure_price_history_partition(CURRENT_DATE);
+SELECT ensure_price_history_partition((CURRENT_DATE - INTERVAL '1 month')::date);
@@ -0,0 +1,28 @@
+-- Alex Financial Planner Database Schema
+-- Version: 006
+-- Description: Per-agent job results, so agents write their own rows instead of
+--              updating the shared jobs row concurrently
+
+CREATE TABLE IF NOT EXISTS job_results (
+    job_id UUID REFERENCES jobs(id) ON DELETE CASCADE,
+    agent VARCHAR(20) NOT NULL,        -- 'report', 'charts', 'retirement'
+    payload JSONB,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (job_id, agent)
+);
+
+CREATE TRIGGER update_job_results_updated_at BEFORE UPDATE ON job_results
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Copy results already stored on jobs rows; the old columns are no longer written
+INSERT INTO job_results (job_id, agent, payload, created_at)
+SELECT j.id, result.agent, result.payload, COALESCE(j.completed_at, j.updated_at)
+FROM jobs j
+CROSS JOIN LATERAL (VALUES
+    ('report', j.report_payload),
+    ('charts', j.charts_payload),
+    ('retirement', j.retirement_payload)
+) AS result(agent, payload)
+WHERE result.payload IS NOT NULL
+ON CONFLICT (job_id, agent) DO NOTHING;
@@ -0,0 +1,33 @@
+-- Alex Financial Planner Database Schema
+-- Version: 007
+-- Description: NOTIFY job_events when a job's status changes or an agent saves
+--              its result, so API servers can push progress instead of polling
+
+-- Payload: {"job_id": ..., "type": "status"|"result", "status"|"agent": ...}
+CREATE OR REPLACE FUNCTION notify_job_status()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('job_events', json_build_object(
+        'job_id', NEW.id, 'type', 'status', 'status', NEW.status
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notify_job_result()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('job_events', json_build_object(
+        'job_id', NEW.job_id, 'type', 'result', 'agent', NEW.agent
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER notify_job_status AFTER UPDATE OF status ON jobs
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE FUNCTION notify_job_status();
+
+CREATE TRIGGER notify_job_result AFTER INSERT OR UPDATE ON job_results
+    FOR EACH ROW EXECUTE FUNCTION notify_job_result();
@@ -0,0 +1,86 @@
+-- Alex Financial Planner Database Schema
+-- Version: 008
+-- Description: Apply instrument price changes to account valuations as deltas
+--              instead of recomputing every account that holds a changed symbol
+
+-- Value each position rounded to 4 places, so a price change can be applied as
+-- ROUND(quantity * new) - ROUND(quantity * old) without drifting from a full refresh
+CREATE OR REPLACE FUNCTION refresh_account_valuations(account_ids UUID[])
+RETURNS void AS $$
+BEGIN
+    -- Serialize concurrent refreshes of the same account; NO KEY UPDATE does not
+    -- conflict with the KEY SHARE locks taken by position foreign keys
+    PERFORM 1 FROM accounts WHERE id = ANY(account_ids) ORDER BY id FOR NO KEY UPDATE;
+
+    INSERT INTO account_valuations (
+        account_id, clerk_user_id, cash_balance, positions_value,
+        num_positions, unpriced_positions, updated_at
+    )
+    SELECT a.id, a.clerk_user_id, COALESCE(a.cash_balance, 0),
+           COALESCE(SUM(ROUND(p.quantity * i.current_price, 4)), 0),
+           COUNT(p.id),
+           COUNT(p.id) FILTER (WHERE i.current_price IS NULL),
+           NOW()
+    FROM accounts a
+    LEFT JOIN positions p ON p.account_id = a.id
+    LEFT JOIN instruments i ON i.symbol = p.symbol
+    WHERE a.id = ANY(account_ids)
+    GROUP BY a.id
+    ON CONFLICT (account_id) DO UPDATE SET
+        clerk_user_id = EXCLUDED.clerk_user_id,
+        cash_balance = EXCLUDED.cash_balance,
+        positions_value = EXCLUDED.positions_value,
+        num_positions = EXCLUDED.num_positions,
+        unpriced_positions = EXCLUDED.unpriced_positions,
+        updated_at = EXCLUDED.updated_at;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Instruments: add each affected account's change in value, reading only the
+-- positions in changed symbols (one UPDATE per statement, however many symbols)
+CREATE OR REPLACE FUNCTION refresh_valuations_for_prices()
+RETURNS TRIGGER AS $$
+DECLARE
+    account_ids UUID[];
+BEGIN
+    account_ids := ARRAY(
+        SELECT DISTINCT p.account_id
+        FROM new_rows n
+        JOIN old_rows o ON o.symbol = n.symbol
+        JOIN positions p ON p.symbol = n.symbol
+        WHERE n.current_price IS DISTINCT FROM o.current_price
+    );
+    IF cardinality(account_ids) = 0 THEN
+        RETURN NULL;
+    END IF;
+
+    -- Same lock as refresh_account_valuations, so a concurrent position write to
+    -- one of these accounts either finishes first (and the deltas below apply on
+    -- top of its refresh) or waits and then reads the new prices
+    PERFORM 1 FROM accounts WHERE id = ANY(account_ids) ORDER BY id FOR NO KEY UPDATE;
+
+    -- A new statement, so it sees any position write that held the lock above
+    UPDATE account_valuations v
+    SET positions_value = v.positions_value + d.value_delta,
+        unpriced_positions = v.unpriced_positions + d.unpriced_delta,
+        updated_at = NOW()
+    FROM (
+        SELECT p.account_id,
+               SUM(COALESCE(ROUND(p.quantity * n.current_price, 4), 0)
+                   - COALESCE(ROUND(p.quantity * o.current_price, 4), 0)) AS value_delta,
+               SUM((n.current_price IS NULL)::int - (o.current_price IS NULL)::int) AS unpriced_delta
+        FROM new_rows n
+        JOIN old_rows o ON o.symbol = n.symbol
+        JOIN positions p ON p.symbol = n.symbol
+        WHERE n.current_price IS DISTINCT FROM o.current_price
+          AND p.account_id = ANY(account_ids)
+        GROUP BY p.account_id
+    ) d
+    WHERE v.account_id = d.account_id;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Re-baseline every account on the per-position rounding the deltas assume
+SELECT refresh_account_valuations(ARRAY(SELECT id FROM accounts));
@@ -0,0 +1,26 @@
+-- Alex Financial Planner Database Schema
+-- Version: 009
+-- Description: Let concurrent loads create the same price_history partition
+
+-- CREATE TABLE IF NOT EXISTS still fails when another transaction creates the
+-- same partition first and commits while this one waits; that partition is
+-- exactly the one wanted, so the error is ignored
+CREATE OR REPLACE FUNCTION ensure_price_history_partition(day DATE)
+RETURNS void AS $$
+DECLARE
+    month_start DATE := date_trunc('month', day)::date;
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF price_history FOR VALUES FROM (%L) TO (%L)',
+        'price_history_' || to_char(month_start, 'YYYY_MM'),
+        month_start,
+        (month_start + INTERVAL '1 month')::date
+    );
+EXCEPTION
+    WHEN duplicate_table OR unique_violation THEN
+        NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create next month's partition ahead of the first load that needs it
+SELECT ensure_price_history_partition((CURRENT_DATE + INTERVAL '1 month')::date);
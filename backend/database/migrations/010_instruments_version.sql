@@ -0,0 +1,28 @@
+-- Alex Financial Planner Database Schema
+-- Version: 010
+-- Description: Cheap change token for the instruments table, without COUNT(*)
+
+-- Inserts and updates move MAX(updated_at), which this index answers
+-- without scanning the table
+CREATE INDEX IF NOT EXISTS idx_instruments_updated_at ON instruments(updated_at);
+
+-- Deletes leave no timestamp behind, so a one-row counter records them
+CREATE TABLE IF NOT EXISTS instruments_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    deletes BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO instruments_version (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING;
+
+-- Once per statement, however many rows it removed. Deleting instruments is
+-- rare, so serializing deletes on the counter row costs nothing in practice
+CREATE OR REPLACE FUNCTION count_instrument_deletes()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE instruments_version SET deletes = deletes + 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER count_instrument_deletes AFTER DELETE OR TRUNCATE ON instruments
+    FOR EACH STATEMENT EXECUTE FUNCTION count_instrument_deletes();
@@ -19,10 +19,16 @@ def drop_all_tables(db: DataAPIClient):
     
     # Order matters due to foreign key constraints
     tables_to_drop = [
+        'schema_migrations',
+        'account_valuations',
+        'instrument_allocations',
+        'price_history',
         'positions',
         'accounts',
+        'job_results',
         'jobs',
         'instruments',
+        'instruments_version',
         'users'
     ]
     
@@ -96,17 +102,9 @@ def create_test_data(db_models: Database):
         print(f"   ℹ️  User already has {len(user_accounts)} accounts")
         account_ids = [acc['id'] for acc in user_accounts]
     else:
-        account_ids = []
-        for acc_data in accounts:
-            validated = acc_data.model_dump()
-            acc_id = db_models.accounts.create_account(
-                'test_user_001',
-                account_name=validated['account_name'],
-                account_purpose=validated['account_purpose'],
-                cash_balance=validated['cash_balance'],
-                cash_interest=validated['cash_interest']
-            )
-            account_ids.append(acc_id)
+        validated_accounts = [acc_data.model_dump() for acc_data in accounts]
+        account_ids = db_models.accounts.create_accounts('test_user_001', validated_accounts)
+        for validated in validated_accounts:
             print(f"   ✅ Created account: {validated['account_name']}")
     
     # Create test positions in first account (401k)
@@ -125,6 +123,7 @@ def create_test_data(db_models: Database):
         if existing_positions:
             print(f"   ℹ️  Account already has {len(existing_positions)} positions")
         else:
+            validated_positions = []
             for symbol, quantity in positions:
                 # Validate position with Pydantic
                 position = PositionCreate(
@@ -133,11 +132,12 @@ def create_test_data(db_models: Database):
                     quantity=quantity
                 )
                 validated = position.model_dump()
-                db_models.positions.add_position(
-                    validated['account_id'],
-                    validated['symbol'],
-                    validated['quantity']
+                validated_positions.append(
+                    (validated['account_id'], validated['symbol'], validated['quantity'])
                 )
+
+            db_models.positions.add_positions(validated_positions)
+            for symbol, quantity in positions:
                 print(f"   ✅ Added position: {quantity} shares of {symbol}")
 
 
@@ -1,169 +1,250 @@
 #!/usr/bin/env python3
 """
-Simple migration runner that executes statements one by one
+Versioned migration runner
+Applies migrations/NNN_*.sql in order, one transaction per file, and records
+each applied version (with a checksum) in the schema_migrations table
 """
 
-import os
-import boto3
+import re
+import sys
+import hashlib
+import argparse
 from pathlib import Path
-from botocore.exceptions import ClientError
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv(override=True)
-
-# Get config from environment
-cluster_arn = os.environ.get("AURORA_CLUSTER_ARN")
-secret_arn = os.environ.get("AURORA_SECRET_ARN")
-database = os.environ.get("AURORA_DATABASE", "alex")
-region = os.environ.get("DEFAULT_AWS_REGION", "us-east-1")
-
-if not cluster_arn or not secret_arn:
-    raise ValueError("Missing AURORA_CLUSTER_ARN or AURORA_SECRET_ARN in environment variables")
-
-client = boto3.client("rds-data", region_name=region)
-
-# Read migration file
-with open("migrations/001_schema.sql") as f:
-    sql = f.read()
-
-# Define statements in order (since splitting is complex)
-statements = [
-    # Extension
-    'CREATE EXTENSION IF NOT EXISTS "uuid-ossp"',
-    # Tables
-    """CREATE TABLE IF NOT EXISTS users (
-        clerk_user_id VARCHAR(255) PRIMARY KEY,
-        display_name VARCHAR(255),
-        years_until_retirement INTEGER,
-        target_retirement_income DECIMAL(12,2),
-        asset_class_targets JSONB DEFAULT '{"equity": 70, "fixed_income": 30}',
-        region_targets JSONB DEFAULT '{"north_america": 50, "international": 50}',
-        created_at TIMESTAMP DEFAULT NOW(),
-        updated_at TIMESTAMP DEFAULT NOW()
-    )""",
-    """CREATE TABLE IF NOT EXISTS instruments (
-        symbol VARCHAR(20) PRIMARY KEY,
+from typing import Dict, List, Tuple
+
+from src.models import Database
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# Tables created by the baseline schema; if they exist before schema_migrations
+# does, 001 was applied by the old runner and is recorded without re-running it
+BASELINE_VERSION = 1
+BASELINE_TABLES = ["users", "instruments", "accounts", "positions", "jobs"]
+
+CREATE_MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
         name VARCHAR(255) NOT NULL,
-        instrument_type VARCHAR(50),
-        current_price DECIMAL(12,4),
-        allocation_regions JSONB DEFAULT '{}',
-        allocation_sectors JSONB DEFAULT '{}',
-        allocation_asset_class JSONB DEFAULT '{}',
-        created_at TIMESTAMP DEFAULT NOW(),
-        updated_at TIMESTAMP DEFAULT NOW()
-    )""",
-    """CREATE TABLE IF NOT EXISTS accounts (
-        id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-        clerk_user_id VARCHAR(255) REFERENCES users(clerk_user_id) ON DELETE CASCADE,
-        account_name VARCHAR(255) NOT NULL,
-        account_purpose TEXT,
-        cash_balance DECIMAL(12,2) DEFAULT 0,
-        cash_interest DECIMAL(5,4) DEFAULT 0,
-        created_at TIMESTAMP DEFAULT NOW(),
-        updated_at TIMESTAMP DEFAULT NOW()
-    )""",
-    """CREATE TABLE IF NOT EXISTS positions (
-        id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-        account_id UUID REFERENCES accounts(id) ON DELETE CASCADE,
-        symbol VARCHAR(20) REFERENCES instruments(symbol),
-        quantity DECIMAL(20,8) NOT NULL,
-        as_of_date DATE DEFAULT CURRENT_DATE,
-        created_at TIMESTAMP DEFAULT NOW(),
-        updated_at TIMESTAMP DEFAULT NOW(),
-        UNIQUE(account_id, symbol)
-    )""",
-    """CREATE TABLE IF NOT EXISTS jobs (
-        id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-        clerk_user_id VARCHAR(255) REFERENCES users(clerk_user_id) ON DELETE CASCADE,
-        job_type VARCHAR(50) NOT NULL,
-        status VARCHAR(20) DEFAULT 'pending',
-        request_payload JSONB,
-        report_payload JSONB,
-        charts_payload JSONB,
-        retirement_payload JSONB,
-        summary_payload JSONB,
-        error_message TEXT,
-        created_at TIMESTAMP DEFAULT NOW(),
-        started_at TIMESTAMP,
-        completed_at TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT NOW()
-    )""",
-    # Indexes
-    "CREATE INDEX IF NOT EXISTS idx_accounts_user ON accounts(clerk_user_id)",
-    "CREATE INDEX IF NOT EXISTS idx_positions_account ON positions(account_id)",
-    "CREATE INDEX IF NOT EXISTS idx_positions_symbol ON positions(symbol)",
-    "CREATE INDEX IF NOT EXISTS idx_jobs_user ON jobs(clerk_user_id)",
-    "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)",
-    # Function for timestamps
-    """CREATE OR REPLACE FUNCTION update_updated_at_column()
-    RETURNS TRIGGER AS $$
-    BEGIN
-        NEW.updated_at = NOW();
-        RETURN NEW;
-    END;
-    $$ LANGUAGE plpgsql""",
-    # Triggers
-    """CREATE TRIGGER update_users_updated_at BEFORE UPDATE ON users
-        FOR EACH ROW EXECUTE FUNCTION update_updated_at_column()""",
-    """CREATE TRIGGER update_instruments_updated_at BEFORE UPDATE ON instruments
-        FOR EACH ROW EXECUTE FUNCTION update_updated_at_column()""",
-    """CREATE TRIGGER update_accounts_updated_at BEFORE UPDATE ON accounts
-        FOR EACH ROW EXECUTE FUNCTION update_updated_at_column()""",
-    """CREATE TRIGGER update_positions_updated_at BEFORE UPDATE ON positions
-        FOR EACH ROW EXECUTE FUNCTION update_updated_at_column()""",
-    """CREATE TRIGGER update_jobs_updated_at BEFORE UPDATE ON jobs
-        FOR EACH ROW EXECUTE FUNCTION update_updated_at_column()""",
-]
-
-print("🚀 Running database migrations...")
-print("=" * 50)
-
-success_count = 0
-error_count = 0
-
-for i, stmt in enumerate(statements, 1):
-    # Get a description of what we're creating
-    stmt_type = "statement"
-    if "CREATE TABLE" in stmt.upper():
-        stmt_type = "table"
-    elif "CREATE INDEX" in stmt.upper():
-        stmt_type = "index"
-    elif "CREATE TRIGGER" in stmt.upper():
-        stmt_type = "trigger"
-    elif "CREATE FUNCTION" in stmt.upper():
-        stmt_type = "function"
-    elif "CREATE EXTENSION" in stmt.upper():
-        stmt_type = "extension"
-
-    # First non-empty line for display
-    first_line = next(l for l in stmt.split("\n") if l.strip())[:60]
-    print(f"\n[{i}/{len(statements)}] Creating {stmt_type}...")
-    print(f"    {first_line}...")
-
-    try:
-        response = client.execute_statement(
-            resourceArn=cluster_arn, secretArn=secret_arn, database=database, sql=stmt
-        )
-        print(f"    ✅ Success")
-        success_count += 1
-
-    except ClientError as e:
-        error_msg = e.response["Error"]["Message"]
-        if "already exists" in error_msg.lower():
-            print(f"    ⚠️  Already exists (skipping)")
-            success_count += 1
+        checksum VARCHAR(64) NOT NULL,
+        applied_at TIMESTAMP DEFAULT NOW()
+    )
+"""
+
+_DOLLAR_QUOTE = re.compile(r"\$(\w*)\$")
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split a SQL file into statements on ';', ignoring comments, quotes and $$ bodies"""
+    statements = []
+    current = []
+    i = 0
+    while i < len(sql):
+        char = sql[i]
+
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = len(sql) if end == -1 else end
+            continue
+
+        if sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = len(sql) if end == -1 else end + 2
+            continue
+
+        if char in ("'", '"'):
+            end = i + 1
+            while end < len(sql):
+                if sql[end] == char:
+                    # A doubled quote is an escaped quote
+                    if sql.startswith(char * 2, end):
+                        end += 2
+                        continue
+                    break
+                end += 1
+            current.append(sql[i:end + 1])
+            i = end + 1
+            continue
+
+        if char == "$":
+            match = _DOLLAR_QUOTE.match(sql, i)
+            if match:
+                tag = match.group(0)
+                end = sql.find(tag, match.end())
+                end = len(sql) if end == -1 else end + len(tag)
+                current.append(sql[i:end])
+                i = end
+                continue
+
+        if char == ";":
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
         else:
-            print(f"    ❌ Error: {error_msg[:100]}")
-            error_count += 1
+            current.append(char)
+        i += 1
+
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def discover_migrations() -> List[Tuple[int, str, Path]]:
+    """Migration files as (version, name, path), ordered by version"""
+    migrations = []
+    for path in MIGRATIONS_DIR.glob("*.sql"):
+        match = MIGRATION_FILE.match(path.name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), path))
+    migrations.sort()
+
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {MIGRATIONS_DIR}")
+    return migrations
+
+
+def checksum(path: Path) -> str:
+    """SHA-256 of a migration file"""
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def applied_migrations(db) -> Dict[int, Dict]:
+    """Versions recorded in schema_migrations"""
+    rows = db.query("SELECT version, name, checksum, applied_at FROM schema_migrations")
+    return {row["version"]: row for row in rows}
+
+
+def record_migration(db, version: int, name: str, digest: str):
+    """Record a version as applied"""
+    db.insert("schema_migrations", {"version": version, "name": name, "checksum": digest})
+
 
-print("\n" + "=" * 50)
-print(f"Migration complete: {success_count} successful, {error_count} errors")
+def baseline_exists(db) -> bool:
+    """Whether the baseline schema's tables already exist"""
+    params = [{"name": "tables", "value": {"stringValue": ",".join(BASELINE_TABLES)}}]
+    rows = db.query(
+        """
+        SELECT COUNT(*) AS count FROM information_schema.tables
+        WHERE table_schema = current_schema()
+          AND table_name = ANY(string_to_array(:tables, ','))
+        """,
+        params,
+    )
+    return bool(rows) and rows[0]["count"] == len(BASELINE_TABLES)
 
-if error_count == 0:
-    print("\n✅ All migrations completed successfully!")
+
+def record_baseline(db, migrations: List[Tuple[int, str, Path]]) -> bool:
+    """Record the baseline schema as applied when its tables already exist"""
+    if not baseline_exists(db):
+        return False
+
+    for version, name, path in migrations:
+        if version == BASELINE_VERSION:
+            record_migration(db, version, name, checksum(path))
+            print(f"📌 Existing schema found, recorded {path.name} as applied")
+            return True
+    return False
+
+
+def migrations_table_exists(db) -> bool:
+    """Whether schema_migrations has been created"""
+    rows = db.query(
+        """
+        SELECT COUNT(*) AS count FROM information_schema.tables
+        WHERE table_schema = current_schema() AND table_name = 'schema_migrations'
+        """
+    )
+    return bool(rows) and rows[0]["count"] > 0
+
+
+def show_status(db, migrations: List[Tuple[int, str, Path]]):
+    """Print each migration and whether it is applied, without writing anything"""
+    applied = {}
+    baseline = False
+    if migrations_table_exists(db):
+        applied = applied_migrations(db)
+    else:
+        print("   No migrations recorded (schema_migrations does not exist)")
+        baseline = baseline_exists(db)
+
+    for version, name, path in migrations:
+        if baseline and version == BASELINE_VERSION:
+            state = "existing schema, will be recorded as applied"
+        elif version not in applied:
+            state = "pending"
+        elif applied[version]["checksum"] != checksum(path):
+            state = f"applied {applied[version]['applied_at']}, modified since"
+        else:
+            state = f"applied {applied[version]['applied_at']}"
+        print(f"   {path.name}: {state}")
+
+
+def apply_migration(db, version: int, name: str, path: Path):
+    """Run every statement of one migration file and record it, in one transaction"""
+    statements = split_statements(path.read_text())
+    with db.transaction():
+        for i, statement in enumerate(statements, 1):
+            first_line = next(l for l in statement.split("\n") if l.strip())[:60]
+            print(f"    [{i}/{len(statements)}] {first_line}")
+            db.execute(statement)
+        record_migration(db, version, name, checksum(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply pending database migrations")
+    parser.add_argument("--status", action="store_true",
+                        help="List migrations and whether they are applied, without applying")
+    args = parser.parse_args()
+
+    print("🚀 Running database migrations...")
+    print("=" * 50)
+
+    db = Database().client
+    migrations = discover_migrations()
+
+    if args.status:
+        show_status(db, migrations)
+        return
+
+    db.execute(CREATE_MIGRATIONS_TABLE)
+    applied = applied_migrations(db)
+    if not applied and record_baseline(db, migrations):
+        applied = applied_migrations(db)
+
+    # Refuse to continue if an applied migration has since been edited
+    changed = [
+        path.name for version, _, path in migrations
+        if version in applied and applied[version]["checksum"] != checksum(path)
+    ]
+    if changed:
+        print(f"❌ Applied migrations were modified after being applied: {', '.join(changed)}")
+        print("   Add a new migration instead of editing an applied one.")
+        sys.exit(1)
+
+    pending = [m for m in migrations if m[0] not in applied]
+
+    if not pending:
+        print("✅ Database is up to date")
+        return
+
+    for version, name, path in pending:
+        print(f"\nStarting migration: {path.name}")
+        try:
+            apply_migration(db, version, name, path)
+        except Exception as e:
+            print(f"❌ Migration {path.name} failed and was rolled back: {e}")
+            sys.exit(1)
+        print(f"✅ Migration completed successfully")
+
+    print("\n" + "=" * 50)
+    print("All migrations completed!")
     print("\n📝 Next steps:")
     print("1. Load seed data: uv run seed_data.py")
     print("2. Test database operations: uv run test_db.py")
-else:
-    print(f"\n⚠️  Some statements failed. Check errors above.")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,17 @@ Database package for Alex Financial Planner
 Provides database models, schemas, and Data API client
 """
 
+from .cache import TTLCache, instrument_cache
 from .client import DataAPIClient
+from .payloads import PayloadStore, payload_store
+from .records import Record, Instrument, Position
+from .loader import DataLoader, Loaders
+from .search import InstrumentIndex, instrument_index
+from .events import JobEventBroker, JobProgressFeed, JobProgressFeeds, job_events, job_progress
+from .metrics import QueryMetrics, track_queries, current_metrics
+from .pg_client import PostgresClient
 from .models import Database
+from .aio import AsyncDatabase
 from .schemas import (
     # Types
     RegionType,
@@ -31,7 +40,28 @@ from .schemas import (
 
 __all__ = [
     'Database',
+    'AsyncDatabase',
     'DataAPIClient',
+    'PostgresClient',
+    'TTLCache',
+    'instrument_cache',
+    'PayloadStore',
+    'payload_store',
+    'QueryMetrics',
+    'track_queries',
+    'current_metrics',
+    'InstrumentIndex',
+    'instrument_index',
+    'JobEventBroker',
+    'job_events',
+    'JobProgressFeed',
+    'JobProgressFeeds',
+    'job_progress',
+    'DataLoader',
+    'Loaders',
+    'Record',
+    'Instrument',
+    'Position',
     'InstrumentCreate',
     'UserCreate',
     'AccountCreate',
@@ -0,0 +1,88 @@
+"""
+Async access to the synchronous Database
+Runs model calls on a bounded thread pool so async handlers never block the event loop
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Worker threads for database calls, i.e. the most round trips in flight at once
+MAX_WORKERS = int(os.environ.get("DATABASE_ASYNC_WORKERS", "10"))
+
+
+class AsyncModel:
+    """Awaitable view of an object: each method call runs on the pool"""
+
+    def __init__(self, target: Any, run: Callable):
+        self._target = target
+        self._run = run
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await self._run(attr, *args, **kwargs)
+
+        return call
+
+
+class AsyncDatabase(AsyncModel):
+    """Async facade over a Database
+
+    Usage:
+        adb = AsyncDatabase(db)
+        account, instrument = await asyncio.gather(
+            adb.accounts.find_by_id(account_id),
+            adb.instruments.find_by_symbol(symbol),
+        )
+
+    Every model method (and Database methods such as load_portfolio) becomes
+    awaitable; plain attributes are returned as they are. Calls carry the
+    caller's context variables, so query metrics still reach the request.
+    Transactions are bound to a thread, so run transactional blocks whole
+    with transaction().
+    """
+
+    def __init__(self, db, max_workers: int = MAX_WORKERS):
+        """
+        Initialize facade
+
+        Args:
+            db: Database to wrap
+            max_workers: Size of the thread pool (or from env DATABASE_ASYNC_WORKERS)
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        super().__init__(db, self.run)
+        self.db = db
+        for name in ('users', 'instruments', 'accounts', 'positions', 'jobs',
+                     'valuations', 'allocations', 'price_history'):
+            setattr(self, name, AsyncModel(getattr(db, name), self.run))
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking call on the pool in a copy of the caller's context"""
+        call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+    async def transaction(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn(tx, *args, **kwargs) inside one transaction on one worker thread
+
+        Usage:
+            def delete_account(tx):
+                tx.positions.delete_by_account(account_id)
+                tx.accounts.delete(account_id)
+
+            await adb.transaction(delete_account)
+        """
+        def block():
+            with self.db.transaction() as tx:
+                return fn(tx, *args, **kwargs)
+
+        return await self.run(block)
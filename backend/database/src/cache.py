@@ -0,0 +1,79 @@
+"""
+Process-level caches for reference data
+Warm Lambda containers keep these between invocations
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+
+class TTLCache:
+    """Thread-safe LRU cache with a maximum size and per-entry time to live"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300):
+        """
+        Initialize cache
+
+        Args:
+            max_size: Maximum number of entries before least recently used are evicted
+            ttl_seconds: Seconds an entry stays valid after it is written
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Any, value: Any):
+        """Store a value, evicting the least recently used entry if full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def set_many(self, items: Dict[Any, Any]):
+        """Store many values at once"""
+        for key, value in items.items():
+            self.set(key, value)
+
+    def invalidate(self, keys: Iterable[Any] = None):
+        """Drop the given keys, or every entry when no keys are given"""
+        with self._lock:
+            if keys is None:
+                self._entries.clear()
+                return
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Instruments are reference data shared by every Database instance in the process
+instrument_cache = TTLCache(
+    max_size=int(os.environ.get("INSTRUMENT_CACHE_SIZE", "4096")),
+    ttl_seconds=float(os.environ.get("INSTRUMENT_CACHE_TTL", "300")),
+)
@@ -6,12 +6,19 @@ Provides a simple interface for database operations
 import boto3
 import json
 import os
-from typing import List, Dict, Any, Optional, Tuple
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterator
 from datetime import date, datetime
 from decimal import Decimal
 from botocore.exceptions import ClientError
 import logging
 
+from .metrics import current_metrics, record_query
+
 # Try to load .env file if it exists
 try:
     from dotenv import load_dotenv
@@ -20,8 +27,46 @@ try:
 except ImportError:
     pass  # dotenv not installed, continue without it
 
+# Use orjson for result decoding when it is installed
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 logger = logging.getLogger(__name__)
 
+# BatchExecuteStatement accepts requests of up to 4 MiB; stay comfortably below
+# that and cap the number of parameter sets sent in a single call.
+MAX_BATCH_PAYLOAD_BYTES = 3 * 1024 * 1024
+MAX_BATCH_PARAMETER_SETS = 1000
+
+# Column typeNames (from columnMetadata) that need decoding beyond the raw field value
+JSON_TYPES = {"json", "jsonb"}
+NUMERIC_TYPES = {"numeric", "decimal"}
+
+# Default rows per keyset page; halved automatically when a page exceeds the
+# Data API's 1 MiB response limit
+DEFAULT_PAGE_SIZE = 1000
+
+# Aurora Serverless scaled to zero rejects calls while it resumes (typically
+# 15-30 seconds); those calls are retried with full-jitter exponential backoff
+RESUME_MAX_ATTEMPTS = int(os.environ.get("DB_RESUME_MAX_ATTEMPTS", "8"))
+RESUME_BASE_DELAY = float(os.environ.get("DB_RESUME_BASE_DELAY", "0.5"))
+RESUME_MAX_DELAY = float(os.environ.get("DB_RESUME_MAX_DELAY", "8"))
+
+# Error codes raised while the cluster is resuming or briefly unavailable
+RESUMING_ERROR_CODES = {"DatabaseResumingException", "ServiceUnavailableError"}
+
+# Message fragments of the BadRequestException raised when the Data API cannot
+# reach a paused or resuming cluster
+COMMUNICATION_ERROR_MESSAGES = (
+    "communications link failure",
+    "the last packet sent successfully to the server",
+    "is resuming after being auto-paused",
+)
+
 
 class DataAPIClient:
     """Wrapper for AWS RDS Data API to simplify database operations"""
@@ -55,13 +100,22 @@ class DataAPIClient:
         self.region = os.environ.get("DEFAULT_AWS_REGION", "us-east-1")
         self.client = boto3.client("rds-data", region_name=self.region)
 
-    def execute(self, sql: str, parameters: List[Dict] = None) -> Dict:
+        # Open transaction per thread, so a shared client can serve concurrent callers
+        self._local = threading.local()
+
+    @property
+    def transaction_id(self) -> Optional[str]:
+        """ID of the transaction open on the current thread, if any"""
+        return getattr(self._local, "transaction_id", None)
+
+    def execute(self, sql: str, parameters: List[Dict] = None, format_json: bool = False) -> Dict:
         """
         Execute a SQL statement
 
         Args:
             sql: SQL statement to execute
             parameters: Optional list of parameters for prepared statement
+            format_json: Return rows as a JSON string in formattedRecords (SELECT only)
 
         Returns:
             Response from Data API
@@ -78,43 +132,159 @@ class DataAPIClient:
             if parameters:
                 kwargs["parameters"] = parameters
 
-            response = self.client.execute_statement(**kwargs)
+            if format_json:
+                kwargs["formatRecordsAs"] = "JSON"
+
+            if self.transaction_id:
+                kwargs["transactionId"] = self.transaction_id
+
+            response = self._call("execute_statement", sql, **kwargs)
             return response
 
         except ClientError as e:
             logger.error(f"Database error: {e}")
             raise
 
-    def query(self, sql: str, parameters: List[Dict] = None) -> List[Dict]:
+    def execute_batch(self, sql: str, parameter_sets: List[List[Dict]]) -> List[Dict]:
+        """
+        Execute the same SQL statement once per parameter set using BatchExecuteStatement
+
+        Parameter sets are split into chunks that stay under the Data API request
+        payload limit, so callers can pass any number of rows.
+
+        Args:
+            sql: SQL statement to execute
+            parameter_sets: List of parameter lists (Data API format), one per execution
+
+        Returns:
+            Combined updateResults from all batch calls
+        """
+        results = []
+        for chunk in self._chunk_parameter_sets(sql, parameter_sets):
+            try:
+                kwargs = {
+                    "resourceArn": self.cluster_arn,
+                    "secretArn": self.secret_arn,
+                    "database": self.database,
+                    "sql": sql,
+                    "parameterSets": chunk,
+                }
+
+                if self.transaction_id:
+                    kwargs["transactionId"] = self.transaction_id
+
+                response = self._call("batch_execute_statement", sql, **kwargs)
+                results.extend(response.get("updateResults", []))
+
+            except ClientError as e:
+                logger.error(f"Database batch error: {e}")
+                raise
+
+        return results
+
+    def query(self, sql: str, parameters: List[Dict] = None, format_json: bool = False) -> List[Dict]:
         """
         Execute a SELECT query and return results as list of dicts
 
+        Values are decoded per column from columnMetadata: json/jsonb columns are
+        parsed, numeric columns become floats, everything else is returned as is.
+
         Args:
             sql: SELECT statement
             parameters: Optional parameters
+            format_json: Ask the Data API for JSON-formatted records (faster for large results)
 
         Returns:
             List of dictionaries with column names as keys
         """
-        response = self.execute(sql, parameters)
+        response = self.execute(sql, parameters, format_json=format_json)
+
+        metadata = response.get("columnMetadata", [])
+        columns = [col["name"] for col in metadata]
+        decoders = self._column_decoders(metadata)
+
+        if "formattedRecords" in response:
+            rows = _json_loads(response["formattedRecords"]) if response["formattedRecords"] else []
+            current_metrics().record_rows(sql, len(rows))
+            decoded = [(col, decode) for col, decode in zip(columns, decoders) if decode]
+            for row in rows:
+                for col, decode in decoded:
+                    row[col] = decode(row.get(col))
+            return rows
 
         if "records" not in response:
             return []
 
-        # Extract column names
-        columns = [col["name"] for col in response.get("columnMetadata", [])]
-
         # Convert records to dictionaries
         results = []
         for record in response["records"]:
             row = {}
-            for i, col in enumerate(columns):
-                value = self._extract_value(record[i])
-                row[col] = value
+            for col, decode, field in zip(columns, decoders, record):
+                value = self._extract_value(field)
+                row[col] = decode(value) if decode else value
             results.append(row)
 
         return results
 
+    def paginate(
+        self,
+        sql: str,
+        key_columns: List[str],
+        parameters: List[Dict] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        after: List[Any] = None,
+        descending: bool = False,
+        format_json: bool = False,
+    ) -> Tuple[List[Dict], Optional[List[Any]]]:
+        """
+        Fetch one keyset-paginated page of a SELECT query
+
+        The query is wrapped as a subquery, so it must not have its own ORDER BY
+        or LIMIT. Rows are ordered by key_columns, which must be unique together
+        (e.g. ['symbol'] or ['created_at::timestamp', 'id::uuid']); an optional
+        ::type suffix casts the cursor values when comparing.
+
+        Args:
+            sql: SELECT statement without ORDER BY/LIMIT
+            key_columns: Columns forming the keyset cursor, with optional ::type casts
+            parameters: Optional parameters
+            page_size: Maximum rows to return
+            after: Cursor from the previous page (None for the first page)
+            descending: Order by the key columns descending instead of ascending
+            format_json: Ask the Data API for JSON-formatted records
+
+        Returns:
+            Tuple of (rows, cursor for the next page or None when there are no more rows)
+        """
+        rows, cursor, _ = self._fetch_page(
+            sql, key_columns, parameters, page_size, after, descending, format_json
+        )
+        return rows, cursor
+
+    def iter_query(
+        self,
+        sql: str,
+        key_columns: List[str],
+        parameters: List[Dict] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        descending: bool = False,
+        format_json: bool = False,
+    ) -> Iterator[Dict]:
+        """
+        Stream every row of a SELECT query using keyset pagination
+
+        Rows are fetched one page at a time and yielded lazily. See paginate()
+        for the query and key_columns requirements.
+        """
+        after = None
+        while True:
+            rows, after, page_size = self._fetch_page(
+                sql, key_columns, parameters, page_size, after, descending, format_json
+            )
+            yield from rows
+            if after is None:
+                return
+
     def query_one(self, sql: str, parameters: List[Dict] = None) -> Optional[Dict]:
         """
         Execute a SELECT query and return first result
@@ -142,20 +312,7 @@ class DataAPIClient:
             Value of returning column if specified
         """
         columns = list(data.keys())
-        placeholders = []
-
-        # Check if columns need type casting
-        for col in columns:
-            if isinstance(data[col], (dict, list)):
-                placeholders.append(f":{col}::jsonb")
-            elif isinstance(data[col], Decimal):
-                placeholders.append(f":{col}::numeric")
-            elif isinstance(data[col], date) and not isinstance(data[col], datetime):
-                placeholders.append(f":{col}::date")
-            elif isinstance(data[col], datetime):
-                placeholders.append(f":{col}::timestamp")
-            else:
-                placeholders.append(f":{col}")
+        placeholders = [self._placeholder(col, data[col]) for col in columns]
 
         sql = f"""
             INSERT INTO {table} ({", ".join(columns)})
@@ -174,6 +331,102 @@ class DataAPIClient:
             return self._extract_value(response["records"][0][0])
         return None
 
+    def insert_many(self, table: str, rows: List[Dict], on_conflict: str = None) -> int:
+        """
+        Insert many records into a table with batched round trips
+
+        Args:
+            table: Table name
+            rows: List of dictionaries, all with the same column names
+            on_conflict: Optional ON CONFLICT clause (e.g., 'ON CONFLICT (symbol) DO NOTHING')
+
+        Returns:
+            Number of rows sent to the database
+        """
+        if not rows:
+            return 0
+
+        columns = list(rows[0].keys())
+        for row in rows:
+            if list(row.keys()) != columns:
+                raise ValueError("All rows passed to insert_many must have the same columns")
+
+        # Type casts come from the first non-null value in each column
+        placeholders = []
+        for col in columns:
+            sample = next((row[col] for row in rows if row[col] is not None), None)
+            placeholders.append(self._placeholder(col, sample))
+
+        sql = f"""
+            INSERT INTO {table} ({", ".join(columns)})
+            VALUES ({", ".join(placeholders)})
+        """
+
+        if on_conflict:
+            sql += f" {on_conflict}"
+
+        self.execute_batch(sql, [self._build_parameters(row) for row in rows])
+        return len(rows)
+
+    def insert_returning(
+        self,
+        table: str,
+        rows: List[Dict],
+        on_conflict: str = None,
+        returning: str = "*",
+        chunk_size: int = 500,
+    ) -> List[Dict]:
+        """
+        Insert many records with multi-row VALUES statements and return the RETURNING rows
+
+        Unlike insert_many (BatchExecuteStatement cannot return rows), this sends
+        one statement per chunk of rows.
+
+        Args:
+            table: Table name
+            rows: List of dictionaries, all with the same column names
+            on_conflict: Optional ON CONFLICT clause (e.g., 'ON CONFLICT (symbol) DO UPDATE ...')
+            returning: RETURNING expression list
+            chunk_size: Maximum rows per statement
+
+        Returns:
+            RETURNING rows as dictionaries, in statement order
+        """
+        if not rows:
+            return []
+
+        columns = list(rows[0].keys())
+        for row in rows:
+            if list(row.keys()) != columns:
+                raise ValueError("All rows passed to insert_returning must have the same columns")
+
+        # Type casts come from the first non-null value in each column
+        samples = {
+            col: next((row[col] for row in rows if row[col] is not None), None) for col in columns
+        }
+
+        results = []
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            values = []
+            data = {}
+            for i, row in enumerate(chunk):
+                placeholders = [self._placeholder(f"{col}_{i}", samples[col]) for col in columns]
+                values.append(f"({', '.join(placeholders)})")
+                data.update((f"{col}_{i}", row[col]) for col in columns)
+
+            sql = f"""
+                INSERT INTO {table} ({", ".join(columns)})
+                VALUES {", ".join(values)}
+            """
+            if on_conflict:
+                sql += f" {on_conflict}"
+            sql += f" RETURNING {returning}"
+
+            results.extend(self.query(sql, self._build_parameters(data)))
+
+        return results
+
     def update(self, table: str, data: Dict, where: str, where_params: Dict = None) -> int:
         """
         Update records in a table
@@ -188,18 +441,7 @@ class DataAPIClient:
             Number of affected rows
         """
         # Build SET clause with type casting where needed
-        set_parts = []
-        for col, val in data.items():
-            if isinstance(val, (dict, list)):
-                set_parts.append(f"{col} = :{col}::jsonb")
-            elif isinstance(val, Decimal):
-                set_parts.append(f"{col} = :{col}::numeric")
-            elif isinstance(val, date) and not isinstance(val, datetime):
-                set_parts.append(f"{col} = :{col}::date")
-            elif isinstance(val, datetime):
-                set_parts.append(f"{col} = :{col}::timestamp")
-            else:
-                set_parts.append(f"{col} = :{col}")
+        set_parts = [f"{col} = {self._placeholder(col, val)}" for col, val in data.items()]
 
         set_clause = ", ".join(set_parts)
 
@@ -236,23 +478,243 @@ class DataAPIClient:
 
     def begin_transaction(self) -> str:
         """Begin a database transaction"""
-        response = self.client.begin_transaction(
+        response = self._call(
+            "begin_transaction", "BEGIN",
             resourceArn=self.cluster_arn, secretArn=self.secret_arn, database=self.database
         )
         return response["transactionId"]
 
     def commit_transaction(self, transaction_id: str):
         """Commit a database transaction"""
-        self.client.commit_transaction(
+        self._call(
+            "commit_transaction", "COMMIT",
             resourceArn=self.cluster_arn, secretArn=self.secret_arn, transactionId=transaction_id
         )
 
     def rollback_transaction(self, transaction_id: str):
         """Rollback a database transaction"""
-        self.client.rollback_transaction(
+        self._call(
+            "rollback_transaction", "ROLLBACK",
             resourceArn=self.cluster_arn, secretArn=self.secret_arn, transactionId=transaction_id
         )
 
+    @contextmanager
+    def transaction(self):
+        """
+        Run every statement in the block inside one Data API transaction
+
+        Commits when the block exits normally and rolls back on any exception.
+        Nested calls on the same thread join the outer transaction.
+
+        Yields:
+            The transaction ID
+        """
+        if self.transaction_id:
+            yield self.transaction_id
+            return
+
+        transaction_id = self.begin_transaction()
+        self._local.transaction_id = transaction_id
+        self._local.after_transaction = []
+        try:
+            yield transaction_id
+        except BaseException:
+            self._local.transaction_id = None
+            try:
+                self.rollback_transaction(transaction_id)
+            except Exception as e:
+                # Keep the block's own exception; a failed rollback must not hide it
+                logger.error(f"Rollback failed for transaction {transaction_id}: {e}")
+            self._run_after_transaction()
+            raise
+        self._local.transaction_id = None
+        try:
+            self.commit_transaction(transaction_id)
+        finally:
+            self._run_after_transaction()
+
+    def after_transaction(self, callback: Callable[[], None]):
+        """
+        Run callback once the current thread's transaction commits or rolls back
+
+        With no transaction open it runs immediately. Use it for side effects
+        other connections could race, such as cache invalidation, which must
+        not happen before the writes they follow are visible.
+
+        Args:
+            callback: Function taking no arguments
+        """
+        if self.transaction_id:
+            self._local.after_transaction.append(callback)
+        else:
+            callback()
+
+    def _run_after_transaction(self):
+        """Run (and clear) the callbacks registered during the transaction that just ended"""
+        callbacks, self._local.after_transaction = self._local.after_transaction, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"After-transaction callback failed: {e}")
+
+    def warm_up(self, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Wake the database with a trivial query, e.g. during Lambda init
+
+        A cluster that has scaled to zero starts resuming on the first call, so
+        pinging early overlaps the resume with the rest of the cold start. Errors
+        are logged, never raised.
+
+        Args:
+            background: Run the ping on a daemon thread and return immediately
+
+        Returns:
+            The warm-up thread when running in the background, otherwise None
+        """
+        if not background:
+            self._ping()
+            return None
+
+        thread = threading.Thread(target=self._ping, name="db-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def _ping(self):
+        """Run SELECT 1, logging rather than raising on failure"""
+        try:
+            self.execute("SELECT 1")
+        except Exception as e:
+            logger.warning(f"Database warm-up failed: {e}")
+
+    def _call(self, operation: str, statement: str, **kwargs) -> Dict:
+        """Make one Data API call, recording its latency, rows and payload size
+
+        Calls rejected because the cluster is resuming are retried with backoff;
+        the time spent waiting is recorded separately from the statement latency.
+
+        Args:
+            operation: boto3 rds-data method name
+            statement: SQL (or BEGIN/COMMIT/ROLLBACK) the call is recorded under
+            **kwargs: Arguments for the boto3 call
+        """
+        started = attempt_started = time.perf_counter()
+        attempt = 1
+        response = {}
+        try:
+            while True:
+                try:
+                    response = getattr(self.client, operation)(**kwargs)
+                    return response
+                except ClientError as e:
+                    if attempt >= RESUME_MAX_ATTEMPTS or not _is_resuming(e, "transactionId" in kwargs):
+                        raise
+                    delay = _backoff_delay(attempt)
+                    logger.warning(
+                        f"Database unavailable ({e.response['Error'].get('Code')}), "
+                        f"retrying in {delay:.1f}s (attempt {attempt}/{RESUME_MAX_ATTEMPTS})"
+                    )
+                    time.sleep(delay)
+                    attempt += 1
+                    attempt_started = time.perf_counter()
+        finally:
+            if attempt > 1:
+                current_metrics().record_resume((attempt_started - started) * 1000, attempt - 1)
+
+            headers = response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+            rows = len(response.get("records") or response.get("updateResults") or [])
+            record_query(
+                statement,
+                (time.perf_counter() - attempt_started) * 1000,
+                rows=rows or response.get("numberOfRecordsUpdated", 0),
+                payload_bytes=int(headers.get("content-length", 0)),
+            )
+
+    def _fetch_page(
+        self,
+        sql: str,
+        key_columns: List[str],
+        parameters: Optional[List[Dict]],
+        page_size: int,
+        after: Optional[List[Any]],
+        descending: bool,
+        format_json: bool,
+    ) -> Tuple[List[Dict], Optional[List[Any]], int]:
+        """Fetch a keyset page, halving the page size while the response is too large"""
+        keys = [col.split("::", 1) if "::" in col else (col, None) for col in key_columns]
+        names = [name for name, _ in keys]
+        direction = " DESC" if descending else ""
+
+        params = list(parameters or [])
+        where = ""
+        if after is not None:
+            placeholders = []
+            for i, (_, cast) in enumerate(keys):
+                placeholders.append(f":_after_{i}::{cast}" if cast else f":_after_{i}")
+            operator = "<" if descending else ">"
+            where = f"WHERE ({', '.join(names)}) {operator} ({', '.join(placeholders)})"
+            params += self._build_parameters({f"_after_{i}": value for i, value in enumerate(after)})
+
+        page_sql = f"""
+            SELECT * FROM ({sql}) AS page
+            {where}
+            ORDER BY {", ".join(name + direction for name in names)}
+            LIMIT :_limit
+        """
+
+        while True:
+            # Ask for one extra row to learn whether another page exists
+            limit = [{"name": "_limit", "value": {"longValue": page_size + 1}}]
+            try:
+                rows = self.query(page_sql, params + limit, format_json=format_json)
+                break
+            except ClientError as e:
+                if page_size > 1 and "response size" in str(e).lower():
+                    page_size = max(1, page_size // 2)
+                    logger.info(f"Response too large, retrying with page size {page_size}")
+                    continue
+                raise
+
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            return rows, [rows[-1][name] for name in names], page_size
+        return rows, None, page_size
+
+    def _placeholder(self, col: str, value: Any) -> str:
+        """Return the named placeholder for a column, with a type cast where needed"""
+        if isinstance(value, (dict, list)):
+            return f":{col}::jsonb"
+        elif isinstance(value, Decimal):
+            return f":{col}::numeric"
+        elif isinstance(value, uuid.UUID):
+            return f":{col}::uuid"
+        elif isinstance(value, date) and not isinstance(value, datetime):
+            return f":{col}::date"
+        elif isinstance(value, datetime):
+            return f":{col}::timestamp"
+        return f":{col}"
+
+    def _chunk_parameter_sets(self, sql: str, parameter_sets: List[List[Dict]]):
+        """Split parameter sets into chunks that fit in one BatchExecuteStatement call"""
+        chunk = []
+        chunk_bytes = len(sql)
+
+        for parameter_set in parameter_sets:
+            set_bytes = len(json.dumps(parameter_set, default=str))
+            if chunk and (
+                len(chunk) >= MAX_BATCH_PARAMETER_SETS
+                or chunk_bytes + set_bytes > MAX_BATCH_PAYLOAD_BYTES
+            ):
+                yield chunk
+                chunk = []
+                chunk_bytes = len(sql)
+
+            chunk.append(parameter_set)
+            chunk_bytes += set_bytes
+
+        if chunk:
+            yield chunk
+
     def _build_parameters(self, data: Dict) -> List[Dict]:
         """Convert dictionary to Data API parameter format"""
         if not data:
@@ -285,6 +747,19 @@ class DataAPIClient:
 
         return parameters
 
+    def _column_decoders(self, column_metadata: List[Dict]) -> List[Optional[Callable]]:
+        """Build one value decoder per column from Data API columnMetadata"""
+        decoders = []
+        for col in column_metadata:
+            type_name = col.get("typeName", "").lower()
+            if type_name in JSON_TYPES:
+                decoders.append(_decode_json)
+            elif type_name in NUMERIC_TYPES:
+                decoders.append(_decode_numeric)
+            else:
+                decoders.append(None)
+        return decoders
+
     def _extract_value(self, field: Dict) -> Any:
         """Extract value from Data API field response"""
         if field.get("isNull"):
@@ -296,15 +771,43 @@ class DataAPIClient:
         elif "doubleValue" in field:
             return field["doubleValue"]
         elif "stringValue" in field:
-            value = field["stringValue"]
-            # Try to parse JSON if it looks like JSON
-            if value and value[0] in ["{", "["]:
-                try:
-                    return json.loads(value)
-                except json.JSONDecodeError:
-                    pass
-            return value
+            return field["stringValue"]
         elif "blobValue" in field:
             return field["blobValue"]
         else:
             return None
+
+
+def _is_resuming(error: ClientError, in_transaction: bool) -> bool:
+    """Whether a failed call should be retried because the cluster is (re)starting
+
+    Communication failures inside a transaction are not retried: the connection
+    holding the transaction is gone, so the caller has to start over.
+    """
+    code = error.response.get("Error", {}).get("Code", "")
+    if code in RESUMING_ERROR_CODES:
+        return True
+
+    message = error.response.get("Error", {}).get("Message", "").lower()
+    return not in_transaction and any(
+        fragment in message for fragment in COMMUNICATION_ERROR_MESSAGES
+    )
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given (1-based) retry attempt"""
+    return random.uniform(0, min(RESUME_MAX_DELAY, RESUME_BASE_DELAY * 2 ** (attempt - 1)))
+
+
+def _decode_json(value: Any) -> Any:
+    """Parse a json/jsonb column value (already-parsed values pass through)"""
+    if isinstance(value, (str, bytes)):
+        return _json_loads(value)
+    return value
+
+
+def _decode_numeric(value: Any) -> Optional[float]:
+    """Decode a numeric column (sent as a string by the Data API) to float"""
+    if value is None:
+        return None
+    return float(value)
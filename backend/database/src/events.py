@@ -0,0 +1,221 @@
+"""
+Job progress notifications
+In-process pub/sub for job changes, fed by Postgres LISTEN/NOTIFY when available,
+and shared per-job progress feeds for event streams
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+
+logger = logging.getLogger(__name__)
+
+# Channel the 007_job_events triggers notify on
+CHANNEL = "job_events"
+
+# Seconds to wait before reconnecting a dropped listener
+RECONNECT_DELAY = 5.0
+
+# Seconds between reads of a followed job's progress when no listener is running
+POLL_SECONDS = float(os.environ.get("JOB_EVENTS_POLL_SECONDS", "2"))
+
+# Seconds between checks that the listener is still up while waiting for a notification
+LISTEN_RECHECK_SECONDS = 15.0
+
+# Job statuses after which nothing more changes
+FINAL_STATUSES = ("completed", "failed")
+
+
+class JobEventBroker:
+    """Wakes subscribers when a job changes
+
+    Publishers (the Jobs model in this process, or a Postgres listener thread
+    for changes made anywhere) call publish(job_id) from any thread.
+    Subscribers are asyncio.Events, set on their own event loop; they re-read
+    the job's progress when woken, so a notification carries no state and
+    coalescing several into one wake-up loses nothing.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._lock = threading.Lock()
+        self.listening = False
+
+    def subscribe(self, job_id: str) -> asyncio.Event:
+        """Return an event that is set whenever the job changes (call from a coroutine)"""
+        event = asyncio.Event()
+        with self._lock:
+            self._subscribers.setdefault(str(job_id), set()).add((asyncio.get_running_loop(), event))
+        return event
+
+    def unsubscribe(self, job_id: str, event: asyncio.Event):
+        """Stop waking an event returned by subscribe"""
+        with self._lock:
+            subscribers = self._subscribers.get(str(job_id), set())
+            subscribers = {entry for entry in subscribers if entry[1] is not event}
+            if subscribers:
+                self._subscribers[str(job_id)] = subscribers
+            else:
+                self._subscribers.pop(str(job_id), None)
+
+    def publish(self, job_id: str):
+        """Wake every subscriber of a job (safe from any thread; no-op without subscribers)"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(str(job_id), ()))
+        for loop, event in subscribers:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The subscriber's loop has closed
+                self.unsubscribe(job_id, event)
+
+    def listen(self, dsn: str = None) -> bool:
+        """
+        Start a daemon thread relaying NOTIFY job_events to publish()
+
+        Args:
+            dsn: Connection string (or from env DATABASE_URL)
+
+        Returns:
+            Whether a listener was started (needs psycopg and a DSN)
+        """
+        dsn = dsn or os.environ.get("DATABASE_URL")
+        if psycopg is None or not dsn:
+            return False
+        thread = threading.Thread(target=self._listen, args=(dsn,), name="job-events", daemon=True)
+        thread.start()
+        return True
+
+    def _listen(self, dsn: str):
+        """Relay notifications, reconnecting after failures"""
+        while True:
+            try:
+                with psycopg.connect(dsn, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {CHANNEL}")
+                    self.listening = True
+                    logger.info(f"Listening for {CHANNEL} notifications")
+                    for notify in conn.notifies():
+                        try:
+                            self.publish(json.loads(notify.payload)["job_id"])
+                        except (ValueError, KeyError):
+                            logger.warning(f"Ignoring malformed {CHANNEL} payload: {notify.payload}")
+            except Exception as e:
+                logger.warning(f"{CHANNEL} listener disconnected: {e}")
+            self.listening = False
+            time.sleep(RECONNECT_DELAY)
+
+
+class JobProgressFeed:
+    """The latest progress of one job, shared by every stream following it
+
+    changed is replaced on each update after being set, so a follower should
+    take progress and changed together and then wait on that changed.
+    """
+
+    def __init__(self, progress: Optional[Dict[str, Any]]):
+        self.progress = progress
+        self.changed = asyncio.Event()
+        self.followers = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def update(self, progress: Optional[Dict[str, Any]]):
+        """Store new progress and wake the followers, if it differs"""
+        if progress != self.progress:
+            self.progress = progress
+            changed, self.changed = self.changed, asyncio.Event()
+            changed.set()
+
+
+class JobProgressFeeds:
+    """One progress reader per followed job, however many streams follow it
+
+    With a listener running the reader re-reads the job only when it is
+    notified; without one it polls every poll_seconds. Either way reads grow
+    with the jobs being followed in this process, not with their followers.
+    Feeds belong to the event loop that follows them.
+    """
+
+    def __init__(self, broker: JobEventBroker, poll_seconds: float = POLL_SECONDS):
+        """
+        Initialize feeds
+
+        Args:
+            broker: Broker whose notifications wake the readers
+            poll_seconds: Seconds between reads without a listener
+        """
+        self.broker = broker
+        self.poll_seconds = poll_seconds
+        self._feeds: Dict[Tuple[asyncio.AbstractEventLoop, str], JobProgressFeed] = {}
+
+    def follow(
+        self,
+        job_id: str,
+        progress: Optional[Dict[str, Any]],
+        fetch: Callable[[str], Awaitable[Optional[Dict[str, Any]]]],
+    ) -> JobProgressFeed:
+        """
+        Start following a job (call from a coroutine; pair with unfollow)
+
+        Args:
+            job_id: Job to follow
+            progress: Progress just read, used if nobody follows the job yet
+            fetch: Coroutine function reading a job's progress (e.g. adb.jobs.progress)
+        """
+        key = (asyncio.get_running_loop(), str(job_id))
+        feed = self._feeds.get(key)
+        if feed is None:
+            feed = JobProgressFeed(progress)
+            feed.task = asyncio.ensure_future(self._read(str(job_id), feed, fetch))
+            self._feeds[key] = feed
+        feed.followers += 1
+        return feed
+
+    def unfollow(self, job_id: str, feed: JobProgressFeed):
+        """Stop following; the job's reader stops with its last follower"""
+        feed.followers -= 1
+        if feed.followers > 0:
+            return
+        feed.task.cancel()
+        key = (asyncio.get_running_loop(), str(job_id))
+        if self._feeds.get(key) is feed:
+            del self._feeds[key]
+
+    async def _read(self, job_id: str, feed: JobProgressFeed, fetch: Callable):
+        """Update a feed on each notification (or poll) until the job finishes"""
+        subscription = self.broker.subscribe(job_id)
+        if self.broker.listening:
+            # Catch a notification sent between the follower's read and subscribing
+            subscription.set()
+        try:
+            while feed.progress is not None and feed.progress["status"] not in FINAL_STATUSES:
+                listening = self.broker.listening
+                try:
+                    await asyncio.wait_for(
+                        subscription.wait(),
+                        timeout=LISTEN_RECHECK_SECONDS if listening else self.poll_seconds,
+                    )
+                except asyncio.TimeoutError:
+                    if listening and self.broker.listening:
+                        continue
+                subscription.clear()
+
+                try:
+                    feed.update(await fetch(job_id))
+                except Exception as e:
+                    logger.warning(f"Could not read progress of job {job_id}: {e}")
+        finally:
+            self.broker.unsubscribe(job_id, subscription)
+
+
+# Shared by every Database instance in the process
+job_events = JobEventBroker()
+job_progress = JobProgressFeeds(job_events)
@@ -0,0 +1,133 @@
+"""
+Request-scoped batching of single-key lookups
+Loads requested in the same event loop tick are resolved with one query
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Most keys one batch query receives; larger batches are split
+MAX_BATCH_SIZE = 500
+
+
+class DataLoader:
+    """Collects load(key) calls made in the same tick and resolves them together
+
+    batch_fn receives a list of distinct keys and returns a dict of the rows
+    found, keyed the same way; missing keys resolve to None. It is a blocking
+    call (the models are synchronous), so it runs in a worker thread: through
+    run (e.g. AsyncDatabase.run) when given, otherwise asyncio.to_thread.
+
+    Results are cached for the loader's lifetime, so repeated keys are read
+    once. Create one loader per request; clear() keys you have written.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Hashable]], Dict[Hashable, Any]],
+        max_batch_size: int = MAX_BATCH_SIZE,
+        run: Callable = None,
+    ):
+        """
+        Initialize loader
+
+        Args:
+            batch_fn: Function loading many keys in one query
+            max_batch_size: Most keys passed to one batch_fn call
+            run: Coroutine function running a blocking call off the event loop
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.run = run or asyncio.to_thread
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[Hashable] = []
+
+    def load(self, key: Hashable) -> "asyncio.Future[Optional[Any]]":
+        """Return an awaitable for the row with this key (None if not found)"""
+        future = self._futures.get(key)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._futures[key] = future
+        self._queue.append(key)
+        if len(self._queue) == 1:
+            # Dispatch after the other callbacks ready in this tick have queued their keys
+            loop.call_soon(self._dispatch)
+        return future
+
+    async def load_many(self, keys: List[Hashable]) -> List[Optional[Any]]:
+        """Load several keys, in order"""
+        return list(await asyncio.gather(*[self.load(key) for key in keys]))
+
+    def prime(self, key: Hashable, value: Any):
+        """Cache a row already in hand, so loading it does not query"""
+        if key not in self._futures:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._futures[key] = future
+
+    def clear(self, key: Hashable = None):
+        """Forget a cached key (or all keys), e.g. after writing it"""
+        if key is None:
+            self._futures = {k: f for k, f in self._futures.items() if not f.done()}
+        elif key in self._futures and self._futures[key].done():
+            del self._futures[key]
+
+    def _dispatch(self):
+        """Start one batch query per max_batch_size queued keys"""
+        keys, self._queue = self._queue, []
+        for start in range(0, len(keys), self.max_batch_size):
+            asyncio.ensure_future(self._resolve(keys[start:start + self.max_batch_size]))
+
+    async def _resolve(self, keys: List[Hashable]):
+        """Run the batch query and settle the futures of its keys"""
+        try:
+            found = await self.run(self.batch_fn, keys)
+        except Exception as e:
+            logger.error(f"Batch load of {len(keys)} keys failed: {e}")
+            for key in keys:
+                future = self._futures.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+
+        for key in keys:
+            future = self._futures.get(key)
+            if future is not None and not future.done():
+                future.set_result(found.get(key))
+
+
+class Loaders:
+    """The loaders for one request"""
+
+    def __init__(self, db, run: Callable = None):
+        """
+        Initialize loaders
+
+        Args:
+            db: Database whose models the loaders read through
+            run: Coroutine function running the batch queries (see DataLoader)
+        """
+        self.instruments = DataLoader(
+            lambda symbols: {row["symbol"]: row for row in db.instruments.find_by_symbols(symbols)},
+            run=run,
+        )
+        self.accounts = DataLoader(
+            lambda ids: {str(row["id"]): row for row in db.accounts.find_by_ids(ids)},
+            run=run,
+        )
+        # Keyed by account ID; each resolves to that account's positions
+        self.positions = DataLoader(lambda ids: _group_positions(db, ids), run=run)
+
+
+def _group_positions(db, account_ids: List[str]) -> Dict[str, List[Dict]]:
+    """Batch function for positions keyed by account ID (accounts without any get [])"""
+    positions = {str(account_id): [] for account_id in account_ids}
+    for row in db.positions.find_by_accounts(account_ids):
+        positions[str(row["account_id"])].append(row)
+    return positions
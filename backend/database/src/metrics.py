@@ -0,0 +1,180 @@
+"""
+Database round-trip and latency metrics
+Collects per-statement statistics for one Lambda invocation or HTTP request
+"""
+
+import os
+import re
+import threading
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this are logged individually (milliseconds)
+SLOW_QUERY_MS = float(os.environ.get("DB_SLOW_QUERY_MS", "500"))
+
+# Upper bounds (milliseconds) of the latency histogram buckets
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_key(sql: str, max_length: int = 120) -> str:
+    """Collapse whitespace and truncate SQL so repeated statements share one key"""
+    return _WHITESPACE.sub(" ", sql).strip()[:max_length]
+
+
+class QueryMetrics:
+    """Round trips, rows, payload bytes and latency histograms for one unit of work"""
+
+    def __init__(self, name: str = "process"):
+        self.name = name
+        self.round_trips = 0
+        self.total_ms = 0.0
+        self.rows = 0
+        self.payload_bytes = 0
+        self.slow_statements = 0
+        self.resume_retries = 0
+        self.resume_wait_ms = 0.0
+        self.statements: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, sql: str, duration_ms: float, rows: int = 0, payload_bytes: int = 0):
+        """Record one database round trip"""
+        key = statement_key(sql)
+        with self._lock:
+            self.round_trips += 1
+            self.total_ms += duration_ms
+            self.rows += rows
+            self.payload_bytes += payload_bytes
+
+            stats = self.statements.get(key)
+            if stats is None:
+                stats = {
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "rows": 0,
+                    "histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                }
+                self.statements[key] = stats
+
+            stats["count"] += 1
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            stats["rows"] += rows
+            stats["histogram"][_bucket(duration_ms)] += 1
+
+            if duration_ms >= SLOW_QUERY_MS:
+                self.slow_statements += 1
+
+        if duration_ms >= SLOW_QUERY_MS:
+            logger.warning(
+                f"Slow statement ({duration_ms:.0f} ms, {rows} rows) in {self.name}: {key}"
+            )
+
+    def record_resume(self, wait_ms: float, retries: int):
+        """Record time spent waiting for a paused cluster to resume (kept out of statement latency)"""
+        with self._lock:
+            self.resume_retries += retries
+            self.resume_wait_ms += wait_ms
+        logger.warning(f"Waited {wait_ms:.0f} ms ({retries} retries) for the database to resume in {self.name}")
+
+    def record_rows(self, sql: str, rows: int):
+        """Add rows to a statement already recorded (e.g. decoded from formattedRecords)"""
+        key = statement_key(sql)
+        with self._lock:
+            self.rows += rows
+            if key in self.statements:
+                self.statements[key]["rows"] += rows
+
+    def summary(self) -> Dict[str, Any]:
+        """Summary suitable for logging, slowest statements first"""
+        with self._lock:
+            statements = sorted(
+                self.statements.items(), key=lambda item: item[1]["total_ms"], reverse=True
+            )
+            return {
+                "name": self.name,
+                "round_trips": self.round_trips,
+                "total_ms": round(self.total_ms, 1),
+                "rows": self.rows,
+                "payload_bytes": self.payload_bytes,
+                "slow_statements": self.slow_statements,
+                "resume_retries": self.resume_retries,
+                "resume_wait_ms": round(self.resume_wait_ms, 1),
+                "statements": [
+                    {
+                        "sql": key,
+                        "count": stats["count"],
+                        "total_ms": round(stats["total_ms"], 1),
+                        "max_ms": round(stats["max_ms"], 1),
+                        "rows": stats["rows"],
+                        "histogram": _histogram_labels(stats["histogram"]),
+                    }
+                    for key, stats in statements
+                ],
+            }
+
+
+def _bucket(duration_ms: float) -> int:
+    """Index of the histogram bucket for a duration"""
+    for i, upper in enumerate(LATENCY_BUCKETS_MS):
+        if duration_ms <= upper:
+            return i
+    return len(LATENCY_BUCKETS_MS)
+
+
+def _histogram_labels(counts) -> Dict[str, int]:
+    """Label non-empty histogram buckets as '<=N ms' / '>N ms'"""
+    labels = [f"<={upper}ms" for upper in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+    return {label: count for label, count in zip(labels, counts) if count}
+
+
+# Metrics for the current invocation/request; falls back to process-wide totals
+_process_metrics = QueryMetrics()
+_current: ContextVar[Optional[QueryMetrics]] = ContextVar("db_query_metrics", default=None)
+
+
+def current_metrics() -> QueryMetrics:
+    """Metrics collector for the current invocation, or the process-wide one"""
+    return _current.get() or _process_metrics
+
+
+def record_query(sql: str, duration_ms: float, rows: int = 0, payload_bytes: int = 0):
+    """Record a round trip against the current invocation's metrics"""
+    current_metrics().record(sql, duration_ms, rows, payload_bytes)
+
+
+@contextmanager
+def track_queries(name: str, log_summary: bool = True):
+    """
+    Collect database metrics for one Lambda invocation or HTTP request
+
+    Usage:
+        with track_queries("reporter") as metrics:
+            ...
+        # the summary is logged on exit; metrics.summary() is also available
+    """
+    metrics = QueryMetrics(name)
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+        if log_summary:
+            summary = metrics.summary()
+            logger.info(
+                f"DB metrics for {name}: {summary['round_trips']} round trips, "
+                f"{summary['total_ms']} ms, {summary['rows']} rows, "
+                f"{summary['payload_bytes']} bytes, {summary['slow_statements']} slow, "
+                f"{summary['resume_wait_ms']} ms waiting for resume"
+            )
+            for stats in summary["statements"][:5]:
+                logger.info(
+                    f"  {stats['count']}x {stats['total_ms']} ms (max {stats['max_ms']} ms): "
+                    f"{stats['sql']}"
+                )
@@ -2,10 +2,19 @@
 Database models and query builders
 """
 
-from typing import Dict, List, Optional, Any
+import copy
+import math
+import os
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any, Tuple, Iterator
 from datetime import datetime, date
 from decimal import Decimal
+from .cache import instrument_cache
+from .payloads import payload_store
+from .events import job_events
 from .client import DataAPIClient
+from .records import Instrument, Position
 from .schemas import (
     InstrumentCreate, UserCreate, AccountCreate, 
     PositionCreate, JobCreate, JobUpdate
@@ -16,6 +25,7 @@ class BaseModel:
     """Base class for database models"""
     
     table_name = None
+    key_columns = ['id::uuid']  # Unique keyset cursor for iter_all
     
     def __init__(self, db: DataAPIClient):
         self.db = db
@@ -35,6 +45,11 @@ class BaseModel:
             {'name': 'offset', 'value': {'longValue': offset}}
         ]
         return self.db.query(sql, params)
+
+    def iter_all(self, page_size: int = 1000) -> Iterator[Dict]:
+        """Stream all records using keyset pagination on the primary key"""
+        return self.db.iter_query(f"SELECT * FROM {self.table_name}",
+                                  self.key_columns, page_size=page_size)
     
     def create(self, data: Dict, returning: str = 'id') -> str:
         """Create a new record"""
@@ -52,6 +67,7 @@ class BaseModel:
 class Users(BaseModel):
     """Users table operations"""
     table_name = 'users'
+    key_columns = ['clerk_user_id']
     
     def find_by_clerk_id(self, clerk_user_id: str) -> Optional[Dict]:
         """Find user by Clerk ID"""
@@ -75,19 +91,173 @@ class Users(BaseModel):
 
 
 class Instruments(BaseModel):
-    """Instruments table operations"""
+    """Instruments table operations
+
+    Lookups by symbol read through a process-level TTL cache; every write
+    through this model invalidates the affected symbols.
+    """
     table_name = 'instruments'
+    key_columns = ['symbol']
+
+    def __init__(self, db: DataAPIClient):
+        super().__init__(db)
+        self.cache = instrument_cache
 
     def find_all(self, limit: int = None, offset: int = 0) -> List[Dict]:
-        """Find all instruments - no limit by default for autocomplete"""
-        sql = f"SELECT * FROM {self.table_name} ORDER BY symbol"
-        return self.db.query(sql, [])
+        """Find all instruments - no limit by default for autocomplete
+
+        Reads in keyset pages on symbol so large universes stay under the
+        Data API response size limit.
+        """
+        instruments = list(self.db.iter_query(f"SELECT * FROM {self.table_name}",
+                                              self.key_columns, format_json=True))
+        self._cache_rows(instruments)
+        return instruments
+
+    def version(self) -> str:
+        """
+        Cheap token that changes whenever any instrument is added, updated or deleted
+
+        '<deletes>:<newest updated_at>': the newest updated_at is one index lookup,
+        and deletes is the statement counter kept by 010_instruments_version.sql.
+        """
+        row = self.db.query_one(f"""
+            SELECT (SELECT deletes FROM instruments_version) AS deletes,
+                   (SELECT MAX(updated_at) FROM {self.table_name}) AS updated_at
+        """)
+        return f"{row['deletes']}:{row['updated_at']}"
+
+    def find_updated_since(self, since: str, overlap_seconds: float = 0) -> List[Dict]:
+        """Find instruments created or updated at or after a timestamp, less overlap_seconds"""
+        sql = f"""
+            SELECT * FROM {self.table_name}
+            WHERE updated_at >= :since::timestamp - make_interval(secs => :overlap::float8)
+        """
+        params = [
+            {'name': 'since', 'value': {'stringValue': str(since)}},
+            {'name': 'overlap', 'value': {'stringValue': str(overlap_seconds)}}
+        ]
+        return list(self.db.iter_query(sql, self.key_columns, params, format_json=True))
+
+    def warm_cache(self) -> int:
+        """Load every instrument into the cache, returning how many were cached"""
+        return len(self.find_all())
 
     def find_by_symbol(self, symbol: str) -> Optional[Dict]:
         """Find instrument by symbol"""
+        cached = self._cached(symbol)
+        if cached is not None:
+            return cached
+
         sql = f"SELECT * FROM {self.table_name} WHERE symbol = :symbol"
         params = [{'name': 'symbol', 'value': {'stringValue': symbol}}]
-        return self.db.query_one(sql, params)
+        instrument = self.db.query_one(sql, params)
+        if instrument:
+            self._cache_rows([instrument])
+        return instrument
+
+    def find_by_symbols(self, symbols: List[str]) -> List[Dict]:
+        """Find many instruments by symbol in one query (cached symbols are not re-read)"""
+        found = {}
+        for symbol in set(symbols):
+            cached = self._cached(symbol)
+            if cached is not None:
+                found[symbol] = cached
+
+        missing = [symbol for symbol in set(symbols) if symbol not in found]
+        if missing:
+            # The Data API has no array parameters, so pass the symbols as one delimited string
+            sql = f"""
+                SELECT * FROM {self.table_name}
+                WHERE symbol = ANY(string_to_array(:symbols, ','))
+            """
+            params = [{'name': 'symbols', 'value': {'stringValue': ','.join(missing)}}]
+            rows = self.db.query(sql, params)
+            self._cache_rows(rows)
+            found.update((row['symbol'], row) for row in rows)
+
+        return [found[symbol] for symbol in sorted(found)]
+
+    def update_instrument(self, symbol: str, data: Dict) -> int:
+        """Update an instrument by symbol"""
+        rows = self.db.update(self.table_name, data, "symbol = :symbol", {'symbol': symbol})
+        self._invalidate([symbol])
+        return rows
+
+    def update_price(self, symbol: str, price: float) -> int:
+        """Update an instrument's current price"""
+        return self.update_instrument(symbol, {'current_price': price})
+
+    def bulk_update_prices(self, price_map: Dict[str, float], as_of: date = None,
+                           chunk_size: int = 500) -> List[str]:
+        """
+        Update many current prices with one UPDATE ... FROM (VALUES ...) per chunk
+
+        Args:
+            price_map: Symbol -> current price
+            as_of: Trading date of the prices; if given, they are also recorded
+                   in price_history as that day's closes
+            chunk_size: Maximum symbols per statement
+
+        Returns:
+            Symbols that are not in the instruments table (and were not updated)
+        """
+        if as_of is not None:
+            with self.db.transaction():
+                missing = self.bulk_update_prices(price_map, chunk_size=chunk_size)
+                PriceHistory(self.db).load_day(as_of, price_map)
+            return missing
+
+        updated = set()
+        items = list(price_map.items())
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            values = ', '.join(f"(:symbol_{i}, :price_{i}::numeric)" for i in range(len(chunk)))
+            sql = f"""
+                UPDATE {self.table_name} AS i
+                SET current_price = v.price
+                FROM (VALUES {values}) AS v(symbol, price)
+                WHERE i.symbol = v.symbol
+                RETURNING i.symbol
+            """
+            params = []
+            for i, (symbol, price) in enumerate(chunk):
+                params.append({'name': f'symbol_{i}', 'value': {'stringValue': symbol}})
+                params.append({'name': f'price_{i}', 'value': {'stringValue': str(price)}})
+
+            updated.update(row['symbol'] for row in self.db.query(sql, params))
+
+        self._invalidate(updated)
+        return sorted(set(price_map) - updated)
+
+    def _cached(self, symbol: str) -> Optional[Dict]:
+        """Private copy of a cached row, or None
+
+        Lookups inside a transaction always read the database, so they see
+        the transaction's own writes.
+        """
+        if self.db.transaction_id:
+            return None
+        cached = self.cache.get(symbol)
+        return copy.deepcopy(cached) if cached is not None else None
+
+    def _invalidate(self, symbols):
+        """Drop written symbols from the cache once their writes are committed (or rolled back)
+
+        Invalidating inside an open transaction would let a concurrent reader
+        re-cache the old row before the commit, and serve it until the TTL.
+        """
+        symbols = list(symbols)
+        self.db.after_transaction(lambda: self.cache.invalidate(symbols))
+
+    def _cache_rows(self, rows: List[Dict]):
+        """Cache copies of instrument rows, unless they were read inside an uncommitted transaction
+
+        Callers get their own rows on every path, so editing one (e.g. its
+        allocations) never changes what later lookups in the process see.
+        """
+        if not self.db.transaction_id:
+            self.cache.set_many({row['symbol']: copy.deepcopy(row) for row in rows})
     
     def create_instrument(self, instrument: InstrumentCreate) -> str:
         """Create a new instrument with validation"""
@@ -104,7 +274,70 @@ class Instruments(BaseModel):
             'allocation_asset_class': validated['allocation_asset_class']
         }
         
-        return self.db.insert(self.table_name, data, returning='symbol')
+        symbol = self.db.insert(self.table_name, data, returning='symbol')
+        self._invalidate([validated['symbol']])
+        return symbol
+
+    def create_instruments(self, instruments: List[InstrumentCreate],
+                           skip_existing: bool = True) -> int:
+        """Create many instruments in batched round trips"""
+        rows = []
+        for instrument in instruments:
+            validated = instrument.model_dump()
+            rows.append({
+                'symbol': validated['symbol'],
+                'name': validated['name'],
+                'instrument_type': validated['instrument_type'],
+                'current_price': validated['current_price'],
+                'allocation_regions': validated['allocation_regions'],
+                'allocation_sectors': validated['allocation_sectors'],
+                'allocation_asset_class': validated['allocation_asset_class']
+            })
+
+        on_conflict = 'ON CONFLICT (symbol) DO NOTHING' if skip_existing else None
+        count = self.db.insert_many(self.table_name, rows, on_conflict=on_conflict)
+        self._invalidate([row['symbol'] for row in rows])
+        return count
+
+    def bulk_upsert(self, instruments: List[InstrumentCreate]) -> Dict[str, str]:
+        """
+        Insert or update many instruments with INSERT ... ON CONFLICT DO UPDATE
+
+        Existing prices are kept when an instrument is given without one.
+
+        Returns:
+            Symbol -> 'created' or 'updated'
+        """
+        rows = {}
+        for instrument in instruments:
+            validated = instrument.model_dump()
+            # The last entry wins; ON CONFLICT cannot touch the same row twice in one statement
+            rows[validated['symbol']] = {
+                'symbol': validated['symbol'],
+                'name': validated['name'],
+                'instrument_type': validated['instrument_type'],
+                'current_price': validated['current_price'],
+                'allocation_regions': validated['allocation_regions'],
+                'allocation_sectors': validated['allocation_sectors'],
+                'allocation_asset_class': validated['allocation_asset_class']
+            }
+
+        on_conflict = f"""
+            ON CONFLICT (symbol) DO UPDATE SET
+                name = EXCLUDED.name,
+                instrument_type = EXCLUDED.instrument_type,
+                current_price = COALESCE(EXCLUDED.current_price, {self.table_name}.current_price),
+                allocation_regions = EXCLUDED.allocation_regions,
+                allocation_sectors = EXCLUDED.allocation_sectors,
+                allocation_asset_class = EXCLUDED.allocation_asset_class
+        """
+        # xmax is 0 only for rows this statement inserted
+        results = self.db.insert_returning(
+            self.table_name, list(rows.values()), on_conflict=on_conflict,
+            returning='symbol, (xmax = 0) AS inserted'
+        )
+        self._invalidate(rows.keys())
+        return {row['symbol']: 'created' if row['inserted'] else 'updated' for row in results}
     
     def find_by_type(self, instrument_type: str) -> List[Dict]:
         """Find all instruments of a specific type"""
@@ -139,6 +372,17 @@ class Accounts(BaseModel):
         params = [{'name': 'user_id', 'value': {'stringValue': clerk_user_id}}]
         return self.db.query(sql, params)
     
+    def find_by_ids(self, ids: List[str]) -> List[Dict]:
+        """Find many accounts by ID in one query"""
+        if not ids:
+            return []
+        sql = f"""
+            SELECT * FROM {self.table_name}
+            WHERE id = ANY(string_to_array(:ids, ',')::uuid[])
+        """
+        params = [{'name': 'ids', 'value': {'stringValue': ','.join(str(id) for id in ids)}}]
+        return self.db.query(sql, params)
+
     def create_account(self, clerk_user_id: str, account_name: str,
                       account_purpose: str = None, cash_balance: Decimal = Decimal('0'),
                       cash_interest: Decimal = Decimal('0')) -> str:
@@ -152,6 +396,26 @@ class Accounts(BaseModel):
         }
         return self.db.insert(self.table_name, data, returning='id')
 
+    def create_accounts(self, clerk_user_id: str, accounts: List[Dict]) -> List[str]:
+        """Create many accounts for a user in batched round trips
+
+        Each account dict takes the same fields as create_account. IDs are
+        generated client-side so they can be returned without a RETURNING clause.
+        """
+        rows = []
+        for account in accounts:
+            rows.append({
+                'id': uuid.uuid4(),
+                'clerk_user_id': clerk_user_id,
+                'account_name': account['account_name'],
+                'account_purpose': account.get('account_purpose'),
+                'cash_balance': account.get('cash_balance', Decimal('0')),
+                'cash_interest': account.get('cash_interest', Decimal('0'))
+            })
+
+        self.db.insert_many(self.table_name, rows)
+        return [str(row['id']) for row in rows]
+
 
 class Positions(BaseModel):
     """Positions table operations"""
@@ -168,6 +432,38 @@ class Positions(BaseModel):
         """
         params = [{'name': 'account_id', 'value': {'stringValue': account_id}}]
         return self.db.query(sql, params)
+
+    def find_by_accounts(self, account_ids: List[str]) -> List[Dict]:
+        """Find the positions of many accounts in one query (see find_by_account)"""
+        if not account_ids:
+            return []
+        sql = f"""
+            SELECT p.*, i.name as instrument_name, i.instrument_type, i.current_price
+            FROM {self.table_name} p
+            JOIN instruments i ON p.symbol = i.symbol
+            WHERE p.account_id = ANY(string_to_array(:account_ids, ',')::uuid[])
+            ORDER BY p.account_id, p.symbol
+        """
+        params = [{'name': 'account_ids', 'value': {'stringValue': ','.join(str(id) for id in account_ids)}}]
+        return self.db.query(sql, params)
+
+    def find_records_by_account(self, account_id: str) -> List[Position]:
+        """Find all positions in an account as Position records, each with its Instrument"""
+        sql = f"""
+            SELECT {Position.select_list('p')}, {Instrument.select_list('i', 'i_')}
+            FROM {self.table_name} p
+            JOIN instruments i ON p.symbol = i.symbol
+            WHERE p.account_id = :account_id::uuid
+            ORDER BY p.symbol
+        """
+        params = [{'name': 'account_id', 'value': {'stringValue': account_id}}]
+        rows = self.db.query(sql, params, format_json=True)
+        return [Position.from_row(row, instrument_prefix='i_') for row in rows]
+
+    def delete_by_account(self, account_id: str) -> int:
+        """Delete all positions in an account with one statement"""
+        return self.db.delete(self.table_name, "account_id = :account_id::uuid",
+                              {'account_id': account_id})
     
     def get_portfolio_value(self, account_id: str) -> Dict:
         """Calculate total portfolio value using current prices from instruments table"""
@@ -216,10 +512,127 @@ class Positions(BaseModel):
             return response['records'][0][0].get('stringValue')
         return None
 
+    def add_positions(self, positions: List[Tuple[str, str, Decimal]]) -> int:
+        """Add or update many (account_id, symbol, quantity) positions in batched round trips"""
+        sql = """
+            INSERT INTO positions (account_id, symbol, quantity, as_of_date)
+            VALUES (:account_id::uuid, :symbol, :quantity::numeric, :as_of_date::date)
+            ON CONFLICT (account_id, symbol) 
+            DO UPDATE SET 
+                quantity = EXCLUDED.quantity,
+                as_of_date = EXCLUDED.as_of_date,
+                updated_at = NOW()
+        """
+        as_of_date = date.today().isoformat()
+        parameter_sets = [
+            [
+                {'name': 'account_id', 'value': {'stringValue': str(account_id)}},
+                {'name': 'symbol', 'value': {'stringValue': symbol}},
+                {'name': 'quantity', 'value': {'stringValue': str(quantity)}},
+                {'name': 'as_of_date', 'value': {'stringValue': as_of_date}}
+            ]
+            for account_id, symbol, quantity in positions
+        ]
+        if parameter_sets:
+            self.db.execute_batch(sql, parameter_sets)
+        return len(parameter_sets)
+
 
 class Jobs(BaseModel):
-    """Jobs table operations"""
+    """Jobs table operations
+
+    The reporter, charter and retirement agents each write their result to
+    their own job_results row, so they never contend for the jobs row; reads
+    return the results under the original report_payload / charts_payload /
+    retirement_payload keys.
+
+    Result payloads go through a PayloadStore: large ones are compressed and
+    the largest are offloaded, leaving a pointer in the row. Reads hydrate
+    them back (pass hydrate=False to get the stored form).
+    """
     table_name = 'jobs'
+    payload_fields = ['report_payload', 'charts_payload', 'retirement_payload', 'summary_payload']
+
+    # Agent name in job_results -> key its result is returned under
+    result_fields = {
+        'report': 'report_payload',
+        'charts': 'charts_payload',
+        'retirement': 'retirement_payload',
+    }
+
+    # jobs columns still read (the per-agent payload columns are superseded by job_results)
+    job_columns = [
+        'id', 'clerk_user_id', 'job_type', 'status', 'request_payload', 'summary_payload',
+        'error_message', 'created_at', 'started_at', 'completed_at', 'updated_at'
+    ]
+
+    # Columns returned by job listings
+    summary_columns = ['id', 'job_type', 'status', 'created_at', 'started_at', 'completed_at', 'updated_at']
+
+    def __init__(self, db: DataAPIClient):
+        super().__init__(db)
+        self.payloads = payload_store
+        self.events = job_events
+
+    def find_by_id(self, id: Any, hydrate: bool = True,
+                   results: List[str] = None) -> Optional[Dict]:
+        """
+        Find a job by ID, with its agent results
+
+        Args:
+            id: Job ID
+            hydrate: Expand packed payloads
+            results: Agents whose results to load ('report', 'charts', 'retirement');
+                     all by default
+        """
+        sql = self._select_sql(results) + " WHERE j.id = :id::uuid"
+        params = [{'name': 'id', 'value': {'stringValue': str(id)}}]
+        params += self._results_params(results)
+        job = self.db.query_one(sql, params)
+        return self._merge_results(job, hydrate) if job else None
+
+    def version(self, job_id: str) -> Optional[Dict]:
+        """
+        Owner and change token of a job, without reading its payloads
+
+        Returns {'clerk_user_id', 'version'}, where version is the latest
+        updated_at of the job and its results, or None if the job does not exist.
+        """
+        sql = f"""
+            SELECT j.clerk_user_id,
+                   GREATEST(j.updated_at,
+                            (SELECT MAX(r.updated_at) FROM job_results r WHERE r.job_id = j.id)
+                   )::text AS version
+            FROM {self.table_name} j
+            WHERE j.id = :id::uuid
+        """
+        return self.db.query_one(sql, [{'name': 'id', 'value': {'stringValue': str(job_id)}}])
+
+    def progress(self, job_id: str) -> Optional[Dict]:
+        """
+        Owner, status and finished agents of a job, without reading payloads
+
+        Returns {'clerk_user_id', 'status', 'error_message', 'results': [agent, ...]},
+        or None if the job does not exist.
+        """
+        sql = f"""
+            SELECT j.clerk_user_id, j.status, j.error_message,
+                   (SELECT string_agg(r.agent, ',' ORDER BY r.agent)
+                    FROM job_results r WHERE r.job_id = j.id) AS results
+            FROM {self.table_name} j
+            WHERE j.id = :id::uuid
+        """
+        row = self.db.query_one(sql, [{'name': 'id', 'value': {'stringValue': str(job_id)}}])
+        if row:
+            row['results'] = row['results'].split(',') if row['results'] else []
+        return row
+
+    def hydrate(self, job: Dict, fields: List[str] = None) -> Dict:
+        """Replace packed payloads in a job row with the documents they stand for"""
+        for field in fields or self.payload_fields:
+            if self.payloads.is_packed(job.get(field)):
+                job[field] = self.payloads.unpack(job[field])
+        return job
     
     def create_job(self, clerk_user_id: str, job_type: str, 
                   request_payload: Dict = None) -> str:
@@ -244,65 +657,370 @@ class Jobs(BaseModel):
         if error_message:
             data['error_message'] = error_message
         
-        return self.db.update(self.table_name, data, "id = :id::uuid", {'id': job_id})
+        rows = self.db.update(self.table_name, data, "id = :id::uuid", {'id': job_id})
+        self.events.publish(job_id)
+        return rows
     
     def update_report(self, job_id: str, report_payload: Dict) -> int:
-        """Update job with Reporter agent's analysis"""
-        data = {'report_payload': report_payload}
-        return self.db.update(self.table_name, data, "id = :id::uuid", {'id': job_id})
+        """Save the Reporter agent's analysis"""
+        return self._save_result(job_id, 'report', report_payload)
     
     def update_charts(self, job_id: str, charts_payload: Dict) -> int:
-        """Update job with Charter agent's visualization data"""
-        data = {'charts_payload': charts_payload}
-        return self.db.update(self.table_name, data, "id = :id::uuid", {'id': job_id})
+        """Save the Charter agent's visualization data"""
+        return self._save_result(job_id, 'charts', charts_payload)
     
     def update_retirement(self, job_id: str, retirement_payload: Dict) -> int:
-        """Update job with Retirement agent's projections"""
-        data = {'retirement_payload': retirement_payload}
-        return self.db.update(self.table_name, data, "id = :id::uuid", {'id': job_id})
+        """Save the Retirement agent's projections"""
+        return self._save_result(job_id, 'retirement', retirement_payload)
     
     def update_summary(self, job_id: str, summary_payload: Dict) -> int:
         """Update job with Planner's final summary"""
-        data = {'summary_payload': summary_payload}
+        return self._update_payload(job_id, 'summary_payload', summary_payload)
+
+    def _update_payload(self, job_id: str, field: str, payload: Any) -> int:
+        """Write one payload column, packed by the payload store"""
+        key_prefix = f"jobs/{job_id}/{field[:-len('_payload')]}"
+        data = {field: self.payloads.pack(key_prefix, payload)}
         return self.db.update(self.table_name, data, "id = :id::uuid", {'id': job_id})
+
+    def _save_result(self, job_id: str, agent: str, payload: Any) -> int:
+        """Upsert one agent's result row (0 if the job does not exist)"""
+        packed = self.payloads.pack(f"jobs/{job_id}/{agent}", payload)
+        sql = """
+            INSERT INTO job_results (job_id, agent, payload)
+            SELECT id, :agent, :payload::jsonb FROM jobs WHERE id = :job_id::uuid
+            ON CONFLICT (job_id, agent) DO UPDATE SET payload = EXCLUDED.payload
+        """
+        params = self.db._build_parameters({'job_id': job_id, 'agent': agent, 'payload': packed})
+        response = self.db.execute(sql, params)
+        self.events.publish(job_id)
+        return response.get('numberOfRecordsUpdated', 0)
+
+    def _select_sql(self, results: List[str] = None) -> str:
+        """SELECT for job rows with their agent results aggregated into one jsonb column"""
+        columns = ', '.join(f"j.{col}" for col in self.job_columns)
+        if results is not None and not results:
+            return f"SELECT {columns}, NULL::jsonb AS results FROM {self.table_name} j"
+
+        agent_filter = ''
+        if results is not None:
+            agent_filter = "AND r.agent = ANY(string_to_array(:agents, ','))"
+        return f"""
+            SELECT {columns},
+                   (SELECT jsonb_object_agg(r.agent, r.payload) FROM job_results r
+                    WHERE r.job_id = j.id {agent_filter}) AS results
+            FROM {self.table_name} j
+        """
+
+    def _results_params(self, results: List[str] = None) -> List[Dict]:
+        """Parameters for the agent filter of _select_sql"""
+        if not results:
+            return []
+        unknown = set(results) - set(self.result_fields)
+        if unknown:
+            raise ValueError(f"Unknown job result agents: {sorted(unknown)}")
+        return [{'name': 'agents', 'value': {'stringValue': ','.join(results)}}]
+
+    def _merge_results(self, job: Dict, hydrate: bool) -> Dict:
+        """Move aggregated results to their *_payload keys"""
+        results = job.pop('results', None) or {}
+        for agent, field in self.result_fields.items():
+            job[field] = results.get(agent)
+        return self.hydrate(job) if hydrate else job
     
     def find_by_user(self, clerk_user_id: str, status: str = None, 
-                    limit: int = 20) -> List[Dict]:
-        """Find jobs for a user"""
+                    limit: int = 20, hydrate: bool = True,
+                    results: List[str] = None) -> List[Dict]:
+        """Find jobs for a user, newest first, with their agent results (see find_by_id)"""
+        sql = self._select_sql(results) + " WHERE j.clerk_user_id = :user_id"
+        params = [
+            {'name': 'user_id', 'value': {'stringValue': clerk_user_id}},
+            {'name': 'limit', 'value': {'longValue': limit}}
+        ]
         if status:
-            sql = f"""
-                SELECT * FROM {self.table_name}
-                WHERE clerk_user_id = :user_id AND status = :status
-                ORDER BY created_at DESC
-                LIMIT :limit
-            """
-            params = [
-                {'name': 'user_id', 'value': {'stringValue': clerk_user_id}},
-                {'name': 'status', 'value': {'stringValue': status}},
-                {'name': 'limit', 'value': {'longValue': limit}}
-            ]
-        else:
-            sql = f"""
-                SELECT * FROM {self.table_name}
-                WHERE clerk_user_id = :user_id
-                ORDER BY created_at DESC
-                LIMIT :limit
-            """
-            params = [
-                {'name': 'user_id', 'value': {'stringValue': clerk_user_id}},
-                {'name': 'limit', 'value': {'longValue': limit}}
-            ]
-        
+            sql += " AND j.status = :status"
+            params.append({'name': 'status', 'value': {'stringValue': status}})
+        sql += " ORDER BY j.created_at DESC LIMIT :limit"
+        params += self._results_params(results)
+
+        jobs = self.db.query(sql, params, format_json=True)
+        return [self._merge_results(job, hydrate) for job in jobs]
+
+    def iter_by_user(self, clerk_user_id: str, page_size: int = 100,
+                     hydrate: bool = True, results: List[str] = None) -> Iterator[Dict]:
+        """Stream all jobs for a user, newest first, using keyset pagination"""
+        sql = self._select_sql(results) + " WHERE j.clerk_user_id = :user_id"
+        params = [{'name': 'user_id', 'value': {'stringValue': clerk_user_id}}]
+        params += self._results_params(results)
+        jobs = self.db.iter_query(sql, ['created_at::timestamp', 'id::uuid'], params,
+                                  page_size=page_size, descending=True, format_json=True)
+        for job in jobs:
+            yield self._merge_results(job, hydrate)
+
+    def list_by_user(self, clerk_user_id: str, status: str = None, limit: int = 20,
+                     after: List[Any] = None) -> Tuple[List[Dict], Optional[List[Any]]]:
+        """
+        One page of a user's jobs, newest first, without payloads or results
+
+        Args:
+            clerk_user_id: Owner of the jobs
+            status: Only jobs with this status
+            limit: Page size
+            after: Cursor returned with the previous page
+
+        Returns:
+            Tuple of (jobs, cursor for the next page or None)
+        """
+        sql = f"""
+            SELECT {', '.join(self.summary_columns)}
+            FROM {self.table_name}
+            WHERE clerk_user_id = :user_id
+        """
+        params = [{'name': 'user_id', 'value': {'stringValue': clerk_user_id}}]
+        if status:
+            sql += " AND status = :status"
+            params.append({'name': 'status', 'value': {'stringValue': status}})
+        return self.db.paginate(sql, ['created_at::timestamp', 'id::uuid'], params,
+                                page_size=limit, after=after, descending=True)
+
+
+class Valuations(BaseModel):
+    """Account valuations maintained by database triggers (see 003_account_valuations.sql)"""
+    table_name = 'account_valuations'
+    key_columns = ['account_id::uuid']
+
+    def find_by_account(self, account_id: str) -> Optional[Dict]:
+        """Precomputed value of one account"""
+        sql = f"SELECT * FROM {self.table_name} WHERE account_id = :account_id::uuid"
+        params = [{'name': 'account_id', 'value': {'stringValue': account_id}}]
+        return self.db.query_one(sql, params)
+
+    def find_by_user(self, clerk_user_id: str) -> List[Dict]:
+        """Precomputed values of each of a user's accounts"""
+        sql = f"""
+            SELECT * FROM {self.table_name}
+            WHERE clerk_user_id = :user_id
+            ORDER BY account_id
+        """
+        params = [{'name': 'user_id', 'value': {'stringValue': clerk_user_id}}]
         return self.db.query(sql, params)
 
+    def user_totals(self, clerk_user_id: str) -> Dict:
+        """Totals across a user's accounts (zeros when the user has none)"""
+        sql = "SELECT * FROM user_valuations WHERE clerk_user_id = :user_id"
+        params = [{'name': 'user_id', 'value': {'stringValue': clerk_user_id}}]
+        totals = self.db.query_one(sql, params) or {}
+        return {
+            'clerk_user_id': clerk_user_id,
+            'cash_balance': totals.get('cash_balance') or 0.0,
+            'positions_value': totals.get('positions_value') or 0.0,
+            'total_value': totals.get('total_value') or 0.0,
+            'num_accounts': totals.get('num_accounts') or 0,
+            'num_positions': totals.get('num_positions') or 0,
+            'unpriced_positions': totals.get('unpriced_positions') or 0,
+            'updated_at': totals.get('updated_at')
+        }
+
+    def refresh(self, account_ids: List[str] = None) -> None:
+        """Recompute valuations for the given accounts, or all accounts"""
+        if account_ids is None:
+            self.db.execute("SELECT refresh_account_valuations(ARRAY(SELECT id FROM accounts))")
+            return
+
+        sql = "SELECT refresh_account_valuations(string_to_array(:account_ids, ',')::uuid[])"
+        params = [{'name': 'account_ids', 'value': {'stringValue': ','.join(account_ids)}}]
+        self.db.execute(sql, params)
+
+
+class Allocations(BaseModel):
+    """Normalized instrument allocations, kept in sync with the JSONB columns by trigger"""
+    table_name = 'instrument_allocations'
+    key_columns = ['symbol', 'dimension', 'bucket']
+
+    # Dimension names and the instruments column each one mirrors
+    dimensions = {
+        'asset_class': 'allocation_asset_class',
+        'region': 'allocation_regions',
+        'sector': 'allocation_sectors',
+    }
+
+    def find_by_symbol(self, symbol: str) -> Dict[str, Dict[str, float]]:
+        """An instrument's allocations as dimension -> bucket -> percentage"""
+        sql = f"""
+            SELECT dimension, bucket, pct FROM {self.table_name}
+            WHERE symbol = :symbol
+            ORDER BY dimension, bucket
+        """
+        params = [{'name': 'symbol', 'value': {'stringValue': symbol}}]
+        allocations = {}
+        for row in self.db.query(sql, params):
+            allocations.setdefault(row['dimension'], {})[row['bucket']] = row['pct']
+        return allocations
+
+    def user_exposure(self, clerk_user_id: str, dimension: str = None,
+                      include_cash: bool = True) -> Dict[str, Dict[str, float]]:
+        """
+        A user's dollar exposure per bucket, aggregated in one SQL statement
+
+        Positions without a current price are left out. With include_cash, account
+        cash balances are added to the 'cash' asset class.
+
+        Args:
+            clerk_user_id: User whose positions to aggregate
+            dimension: Only this dimension ('asset_class', 'region' or 'sector')
+            include_cash: Count cash balances as asset_class 'cash'
+
+        Returns:
+            Dimension -> bucket -> dollar value, buckets largest first
+        """
+        if dimension is not None and dimension not in self.dimensions:
+            raise ValueError(f"Unknown allocation dimension: {dimension}")
+
+        params = [{'name': 'user_id', 'value': {'stringValue': clerk_user_id}}]
+        dimension_filter = ''
+        if dimension:
+            dimension_filter = 'AND ia.dimension = :dimension'
+            params.append({'name': 'dimension', 'value': {'stringValue': dimension}})
+
+        sql = f"""
+            SELECT ia.dimension, ia.bucket, SUM(p.quantity * i.current_price * ia.pct / 100) AS value
+            FROM accounts a
+            JOIN positions p ON p.account_id = a.id
+            JOIN instruments i ON i.symbol = p.symbol
+            JOIN {self.table_name} ia ON ia.symbol = p.symbol
+            WHERE a.clerk_user_id = :user_id
+              AND i.current_price IS NOT NULL
+              {dimension_filter}
+            GROUP BY ia.dimension, ia.bucket
+        """
+        if include_cash and dimension in (None, 'asset_class'):
+            sql += """
+            UNION ALL
+            SELECT 'asset_class', 'cash', SUM(cash_balance)
+            FROM accounts
+            WHERE clerk_user_id = :user_id
+            HAVING SUM(cash_balance) > 0
+            """
+
+        exposure = {}
+        for row in self.db.query(sql, params):
+            buckets = exposure.setdefault(row['dimension'], {})
+            buckets[row['bucket']] = buckets.get(row['bucket'], 0.0) + float(row['value'] or 0)
+
+        return {
+            name: dict(sorted(buckets.items(), key=lambda item: item[1], reverse=True))
+            for name, buckets in exposure.items()
+        }
+
+
+class PriceHistory(BaseModel):
+    """Daily closing prices, partitioned by month (see 005_price_history.sql)"""
+    table_name = 'price_history'
+    key_columns = ['symbol', 'date::date']
+
+    def load_day(self, day: date, closes: Dict[str, float], chunk_size: int = 5000) -> int:
+        """
+        Persist one trading day's closes, e.g. a whole grouped-daily download
+
+        Each chunk is a single INSERT over unnest()ed symbol/close lists, all in
+        one transaction. Loading the same date again overwrites its closes, so
+        reruns are safe.
+
+        Args:
+            day: Trading date the closes belong to
+            closes: Symbol -> closing price (missing or non-finite prices are skipped)
+            chunk_size: Maximum symbols per statement
+
+        Returns:
+            Number of closes written
+        """
+        items = sorted(
+            (symbol, close) for symbol, close in closes.items()
+            if close is not None and math.isfinite(close) and ',' not in symbol
+        )
+        if not items:
+            return 0
+
+        day_param = {'name': 'day', 'value': {'stringValue': day.isoformat()}}
+        sql = f"""
+            INSERT INTO {self.table_name} (symbol, date, close)
+            SELECT t.symbol, :day::date, t.close::numeric
+            FROM unnest(string_to_array(:symbols, ','), string_to_array(:closes, ','))
+                AS t(symbol, close)
+            ON CONFLICT (symbol, date) DO UPDATE SET close = EXCLUDED.close
+        """
+        with self.db.transaction():
+            self.db.execute("SELECT ensure_price_history_partition(:day::date)", [day_param])
+            for start in range(0, len(items), chunk_size):
+                chunk = items[start:start + chunk_size]
+                params = [
+                    day_param,
+                    {'name': 'symbols', 'value': {'stringValue': ','.join(s for s, _ in chunk)}},
+                    {'name': 'closes', 'value': {'stringValue': ','.join(str(c) for _, c in chunk)}}
+                ]
+                self.db.execute(sql, params)
+
+        return len(items)
+
+    def get_range(self, symbols: List[str], start: date, end: date) -> Dict[str, Dict[str, Any]]:
+        """
+        Closing prices for symbols between two dates (inclusive) as NumPy arrays
+
+        Returns:
+            Symbol -> {'dates': datetime64[D] array, 'close': float64 array}, oldest
+            first; symbols without history in the range are omitted
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("get_range needs numpy. Install with: uv add numpy")
+
+        sql = f"""
+            SELECT symbol, date, close::float8 AS close
+            FROM {self.table_name}
+            WHERE symbol = ANY(string_to_array(:symbols, ','))
+              AND date BETWEEN :start::date AND :end::date
+        """
+        params = [
+            {'name': 'symbols', 'value': {'stringValue': ','.join(symbols)}},
+            {'name': 'start', 'value': {'stringValue': start.isoformat()}},
+            {'name': 'end', 'value': {'stringValue': end.isoformat()}}
+        ]
+
+        # Keyset order is (symbol, date), so each symbol's rows arrive together and sorted
+        series: Dict[str, Tuple[List, List]] = {}
+        for row in self.db.iter_query(sql, self.key_columns, params, format_json=True):
+            dates, prices = series.setdefault(row['symbol'], ([], []))
+            dates.append(row['date'])
+            prices.append(row['close'])
+
+        return {
+            symbol: {
+                'dates': np.array(dates, dtype='datetime64[D]'),
+                'close': np.array(prices, dtype=np.float64)
+            }
+            for symbol, (dates, prices) in series.items()
+        }
+
 
 class Database:
     """Main database interface providing access to all models"""
     
     def __init__(self, cluster_arn: str = None, secret_arn: str = None,
-                 database: str = None, region: str = None):
-        """Initialize database with all model classes"""
-        self.client = DataAPIClient(cluster_arn, secret_arn, database, region)
+                 database: str = None, region: str = None, backend: str = None):
+        """Initialize database with all model classes
+
+        The backend is 'data_api' (Aurora Data API, the default) or 'postgres'
+        (pooled psycopg connections to DATABASE_URL), from env DATABASE_BACKEND.
+        """
+        backend = backend or os.environ.get('DATABASE_BACKEND', 'data_api')
+        if backend == 'postgres':
+            from .pg_client import PostgresClient
+            self.client = PostgresClient()
+        elif backend == 'data_api':
+            self.client = DataAPIClient(cluster_arn, secret_arn, database, region)
+        else:
+            raise ValueError(f"Unknown database backend: {backend}")
         
         # Initialize all models
         self.users = Users(self.client)
@@ -310,6 +1028,105 @@ class Database:
         self.accounts = Accounts(self.client)
         self.positions = Positions(self.client)
         self.jobs = Jobs(self.client)
+        self.valuations = Valuations(self.client)
+        self.allocations = Allocations(self.client)
+        self.price_history = PriceHistory(self.client)
+    
+    def warm_up(self, background: bool = True):
+        """Wake the database (non-blocking by default); see DataAPIClient.warm_up"""
+        return self.client.warm_up(background=background)
+
+    @contextmanager
+    def transaction(self):
+        """Route every model call in the block through one transaction
+
+        Usage:
+            with db.transaction() as tx:
+                tx.positions.delete_by_account(account_id)
+                tx.accounts.delete(account_id)
+        """
+        with self.client.transaction():
+            yield self
+    
+    def load_portfolio(self, clerk_user_id: str) -> Optional[Dict]:
+        """Load a user's accounts, positions and instruments with one joined query
+
+        Returns the nested portfolio_data structure the agents consume:
+        {'user_id', 'years_until_retirement', 'target_retirement_income', 'total_value',
+         'accounts': [{'id', 'name', 'type', 'purpose', 'cash_balance', 'cash_interest',
+                       'total_value', 'positions': [{'id', 'symbol', 'quantity', 'instrument'}]}]}
+        Totals come from account_valuations (cash plus priced positions).
+        Returns None if the user does not exist.
+        """
+        sql = """
+            SELECT u.years_until_retirement, u.target_retirement_income,
+                   a.id AS account_id, a.account_name, a.account_purpose,
+                   a.cash_balance, a.cash_interest,
+                   v.total_value AS account_value,
+                   p.id AS position_id, p.symbol, p.quantity,
+                   i.name, i.instrument_type, i.current_price,
+                   i.allocation_regions, i.allocation_sectors, i.allocation_asset_class
+            FROM users u
+            LEFT JOIN accounts a ON a.clerk_user_id = u.clerk_user_id
+            LEFT JOIN account_valuations v ON v.account_id = a.id
+            LEFT JOIN (positions p JOIN instruments i ON i.symbol = p.symbol)
+                ON p.account_id = a.id
+            WHERE u.clerk_user_id = :user_id
+            ORDER BY a.created_at DESC, a.id, p.symbol
+        """
+        params = [{'name': 'user_id', 'value': {'stringValue': clerk_user_id}}]
+        rows = self.client.query(sql, params)
+        if not rows:
+            return None
+
+        user = rows[0]
+        portfolio = {
+            'user_id': clerk_user_id,
+            'years_until_retirement': user.get('years_until_retirement'),
+            'target_retirement_income': user.get('target_retirement_income'),
+            'total_value': 0.0,
+            'accounts': []
+        }
+
+        accounts = {}
+        for row in rows:
+            account_id = row['account_id']
+            if account_id is None:
+                continue
+
+            account = accounts.get(account_id)
+            if account is None:
+                account = {
+                    'id': account_id,
+                    'name': row['account_name'],
+                    'type': 'investment',
+                    'purpose': row['account_purpose'],
+                    'cash_balance': float(row['cash_balance'] or 0),
+                    'cash_interest': float(row['cash_interest'] or 0),
+                    'total_value': float(row['account_value'] or 0),
+                    'positions': []
+                }
+                accounts[account_id] = account
+                portfolio['accounts'].append(account)
+                portfolio['total_value'] += account['total_value']
+
+            if row['symbol'] is not None:
+                account['positions'].append({
+                    'id': row['position_id'],
+                    'symbol': row['symbol'],
+                    'quantity': float(row['quantity']),
+                    'instrument': {
+                        'symbol': row['symbol'],
+                        'name': row['name'],
+                        'instrument_type': row['instrument_type'],
+                        'current_price': row['current_price'],
+                        'allocation_regions': row['allocation_regions'] or {},
+                        'allocation_sectors': row['allocation_sectors'] or {},
+                        'allocation_asset_class': row['allocation_asset_class'] or {}
+                    }
+                })
+
+        return portfolio
     
     def execute_raw(self, sql: str, parameters: List[Dict] = None) -> Dict:
         """Execute raw SQL for complex queries"""
@@ -0,0 +1,151 @@
+"""
+Storage for large JSON payloads
+Compresses big documents and moves the largest out of the database row
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import os
+import logging
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Key marking a stored value as a packed payload rather than the document itself
+PAYLOAD_MARKER = "__payload__"
+
+# Serialized sizes (bytes) above which payloads are gzipped inline, or offloaded
+COMPRESS_THRESHOLD = int(os.environ.get("PAYLOAD_COMPRESS_BYTES", "8192"))
+OFFLOAD_THRESHOLD = int(os.environ.get("PAYLOAD_OFFLOAD_BYTES", "65536"))
+
+
+class PayloadStore:
+    """Packs JSON documents for storage in a JSONB column
+
+    - small documents are stored as they are
+    - above compress_threshold they are gzipped and stored inline (base64)
+    - above offload_threshold, when a blob store is configured, the gzipped
+      document goes to S3 (or a local directory) and the column holds a pointer
+
+    unpack() reverses any of these, so readers never see the packed form.
+    """
+
+    def __init__(
+        self,
+        bucket: str = None,
+        directory: str = None,
+        compress_threshold: int = COMPRESS_THRESHOLD,
+        offload_threshold: int = OFFLOAD_THRESHOLD,
+    ):
+        """
+        Initialize payload store
+
+        Args:
+            bucket: S3 bucket for offloaded payloads (or from env PAYLOAD_BUCKET)
+            directory: Local directory used instead of S3 (or from env PAYLOAD_DIR)
+            compress_threshold: Serialized size above which payloads are gzipped
+            offload_threshold: Serialized size above which payloads leave the row
+        """
+        self.bucket = bucket or os.environ.get("PAYLOAD_BUCKET")
+        directory = directory or os.environ.get("PAYLOAD_DIR")
+        self.directory = Path(directory) if directory else None
+        self.compress_threshold = compress_threshold
+        self.offload_threshold = offload_threshold
+        self._s3 = None
+
+    @property
+    def can_offload(self) -> bool:
+        """Whether a blob store is configured"""
+        return bool(self.bucket or self.directory)
+
+    def pack(self, key_prefix: str, payload: Any) -> Any:
+        """
+        Return the value to store in place of a payload
+
+        Args:
+            key_prefix: Blob key prefix, e.g. 'jobs/<job_id>/report'
+            payload: JSON-serializable document
+        """
+        if payload is None:
+            return None
+
+        raw = json.dumps(payload, default=str, separators=(",", ":")).encode("utf-8")
+        if len(raw) <= self.compress_threshold:
+            return payload
+
+        compressed = gzip.compress(raw)
+        if len(raw) > self.offload_threshold and self.can_offload:
+            # Content-addressed, so writing the same payload twice is harmless
+            key = f"{key_prefix}-{hashlib.sha256(raw).hexdigest()[:16]}.json.gz"
+            self._write_blob(key, compressed)
+            store = "s3" if self.bucket else "local"
+            return {PAYLOAD_MARKER: {"store": store, "key": key, "size": len(raw)}}
+
+        return {
+            PAYLOAD_MARKER: {
+                "store": "inline",
+                "data": base64.b64encode(compressed).decode("ascii"),
+                "size": len(raw),
+            }
+        }
+
+    def unpack(self, value: Any) -> Any:
+        """Return the original payload for a stored value (plain values pass through)"""
+        if not self.is_packed(value):
+            return value
+
+        packed = value[PAYLOAD_MARKER]
+        if packed["store"] == "inline":
+            compressed = base64.b64decode(packed["data"])
+        else:
+            compressed = self._read_blob(packed["store"], packed["key"])
+        return json.loads(gzip.decompress(compressed))
+
+    @staticmethod
+    def is_packed(value: Any) -> bool:
+        """Whether a stored value is a packed payload"""
+        return isinstance(value, dict) and PAYLOAD_MARKER in value
+
+    def _write_blob(self, key: str, data: bytes):
+        """Write a compressed payload to S3 or the local directory"""
+        if self.bucket:
+            self._s3_client().put_object(
+                Bucket=self.bucket,
+                Key=key,
+                Body=data,
+                ContentType="application/json",
+                ContentEncoding="gzip",
+            )
+        else:
+            path = self.directory / key
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+
+    def _read_blob(self, store: str, key: str) -> bytes:
+        """Read a compressed payload from where pack() wrote it"""
+        if store == "s3":
+            if not self.bucket:
+                raise ValueError(f"Payload {key} is in S3 but PAYLOAD_BUCKET is not set")
+            response = self._s3_client().get_object(Bucket=self.bucket, Key=key)
+            return response["Body"].read()
+
+        if not self.directory:
+            raise ValueError(f"Payload {key} is in a local directory but PAYLOAD_DIR is not set")
+        return (self.directory / key).read_bytes()
+
+    def _s3_client(self):
+        """S3 client, created on first use"""
+        if self._s3 is None:
+            import boto3
+
+            self._s3 = boto3.client(
+                "s3", region_name=os.environ.get("DEFAULT_AWS_REGION", "us-east-1")
+            )
+        return self._s3
+
+
+# Shared by every Database instance in the process
+payload_store = PayloadStore()
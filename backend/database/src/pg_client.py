@@ -0,0 +1,257 @@
+"""
+Native PostgreSQL client with connection pooling
+Implements the DataAPIClient contract over psycopg wire-protocol connections
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from typing import List, Dict, Any, Optional
+from datetime import date, datetime
+from decimal import Decimal
+import logging
+
+from .client import DataAPIClient
+from .metrics import record_query
+
+try:
+    import psycopg
+    from psycopg_pool import ConnectionPool
+except ImportError:
+    psycopg = None
+    ConnectionPool = None
+
+logger = logging.getLogger(__name__)
+
+# Data API style named parameters (:name), but not casts (::jsonb)
+NAMED_PARAMETER = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+
+# One pool per DSN, shared by every client in the process
+_pools: Dict[str, Any] = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(dsn: str, min_size: int, max_size: int):
+    """Return the process-wide connection pool for a DSN, creating it on first use"""
+    with _pools_lock:
+        pool = _pools.get(dsn)
+        if pool is None:
+            pool = ConnectionPool(dsn, min_size=min_size, max_size=max_size, open=True)
+            _pools[dsn] = pool
+        return pool
+
+
+class PostgresClient(DataAPIClient):
+    """Drop-in replacement for DataAPIClient using pooled psycopg connections
+
+    Accepts the same SQL (with :name placeholders) and Data API style parameter
+    lists, and returns the same shapes, so the models work unchanged.
+    """
+
+    def __init__(
+        self,
+        dsn: str = None,
+        min_size: int = None,
+        max_size: int = None,
+    ):
+        """
+        Initialize PostgreSQL client
+
+        Args:
+            dsn: Connection string (or from env DATABASE_URL)
+            min_size: Minimum pooled connections (or from env DATABASE_POOL_MIN, default 1)
+            max_size: Maximum pooled connections (or from env DATABASE_POOL_MAX, default 10)
+        """
+        if psycopg is None:
+            raise ImportError(
+                "The postgres backend needs psycopg. Install with: uv add 'psycopg[binary,pool]'"
+            )
+
+        self.dsn = dsn or os.environ.get("DATABASE_URL")
+        if not self.dsn:
+            raise ValueError(
+                "Missing PostgreSQL configuration. Set the DATABASE_URL environment variable."
+            )
+
+        min_size = min_size or int(os.environ.get("DATABASE_POOL_MIN", "1"))
+        max_size = max_size or int(os.environ.get("DATABASE_POOL_MAX", "10"))
+        self.pool = _get_pool(self.dsn, min_size, max_size)
+
+        # Kept for compatibility with code that inspects the Data API settings
+        self.cluster_arn = None
+        self.secret_arn = None
+        self.database = None
+
+        # Open transactions: ID -> checked-out connection
+        self._local = threading.local()
+        self._transactions: Dict[str, Any] = {}
+
+    def execute(self, sql: str, parameters: List[Dict] = None, format_json: bool = False) -> Dict:
+        """
+        Execute a SQL statement
+
+        Args:
+            sql: SQL statement to execute
+            parameters: Optional list of parameters in Data API format
+            format_json: Ignored; accepted for DataAPIClient compatibility
+
+        Returns:
+            Response shaped like the Data API's (records, columnMetadata, numberOfRecordsUpdated)
+        """
+        started = time.perf_counter()
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(self._convert_sql(sql), self._convert_parameters(parameters))
+
+                response = {"numberOfRecordsUpdated": max(cur.rowcount, 0)}
+                if cur.description:
+                    response["columnMetadata"] = self._column_metadata(conn, cur)
+                    response["records"] = [
+                        [self._to_field(value) for value in row] for row in cur.fetchall()
+                    ]
+
+        rows = len(response.get("records", [])) or response["numberOfRecordsUpdated"]
+        record_query(sql, (time.perf_counter() - started) * 1000, rows=rows)
+        return response
+
+    def execute_batch(self, sql: str, parameter_sets: List[List[Dict]]) -> List[Dict]:
+        """
+        Execute the same SQL statement once per parameter set
+
+        Args:
+            sql: SQL statement to execute
+            parameter_sets: List of parameter lists (Data API format), one per execution
+
+        Returns:
+            One (empty) update result per parameter set, like the Data API
+        """
+        if not parameter_sets:
+            return []
+
+        started = time.perf_counter()
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.executemany(
+                    self._convert_sql(sql),
+                    [self._convert_parameters(params) for params in parameter_sets],
+                )
+        record_query(sql, (time.perf_counter() - started) * 1000, rows=len(parameter_sets))
+        return [{"generatedFields": []} for _ in parameter_sets]
+
+    def query(self, sql: str, parameters: List[Dict] = None, format_json: bool = False) -> List[Dict]:
+        """
+        Execute a SELECT query and return results as list of dicts
+
+        Values match the Data API decoding: json/jsonb parsed, numeric as float,
+        uuid/date/timestamp as strings.
+        """
+        started = time.perf_counter()
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(self._convert_sql(sql), self._convert_parameters(parameters))
+                rows = []
+                if cur.description:
+                    columns = [col.name for col in cur.description]
+                    rows = [
+                        {col: self._normalize(value) for col, value in zip(columns, row)}
+                        for row in cur.fetchall()
+                    ]
+
+        record_query(sql, (time.perf_counter() - started) * 1000, rows=len(rows))
+        return rows
+
+    def begin_transaction(self) -> str:
+        """Begin a database transaction on a dedicated pooled connection"""
+        conn = self.pool.getconn()
+        transaction_id = str(uuid.uuid4())
+        self._transactions[transaction_id] = conn
+        return transaction_id
+
+    def commit_transaction(self, transaction_id: str):
+        """Commit a database transaction and return its connection to the pool"""
+        conn = self._transactions.pop(transaction_id)
+        started = time.perf_counter()
+        try:
+            conn.commit()
+        finally:
+            self.pool.putconn(conn)
+            record_query("COMMIT", (time.perf_counter() - started) * 1000)
+
+    def rollback_transaction(self, transaction_id: str):
+        """Rollback a database transaction and return its connection to the pool
+
+        A connection whose rollback fails (e.g. it was broken mid-transaction)
+        is closed, so the pool discards it instead of handing it out again.
+        """
+        conn = self._transactions.pop(transaction_id)
+        started = time.perf_counter()
+        try:
+            conn.rollback()
+        except psycopg.Error:
+            conn.close()
+            raise
+        finally:
+            self.pool.putconn(conn)
+            record_query("ROLLBACK", (time.perf_counter() - started) * 1000)
+
+    def _connection(self):
+        """Connection for the current statement: the open transaction's, or a pooled one"""
+        if self.transaction_id:
+            return _TransactionConnection(self._transactions[self.transaction_id])
+        return self.pool.connection()
+
+    def _convert_sql(self, sql: str) -> str:
+        """Translate :name placeholders to psycopg's %(name)s style"""
+        return NAMED_PARAMETER.sub(r"%(\1)s", sql.replace("%", "%%"))
+
+    def _convert_parameters(self, parameters: Optional[List[Dict]]) -> Dict[str, Any]:
+        """Convert Data API parameters to a plain name -> value dict"""
+        return {param["name"]: self._extract_value(param["value"]) for param in parameters or []}
+
+    def _column_metadata(self, conn, cur) -> List[Dict]:
+        """Build Data API style columnMetadata from a cursor description"""
+        metadata = []
+        for col in cur.description:
+            type_info = conn.adapters.types.get(col.type_code)
+            metadata.append({"name": col.name, "typeName": type_info.name if type_info else ""})
+        return metadata
+
+    def _normalize(self, value: Any) -> Any:
+        """Convert a psycopg value to the type the Data API client would return"""
+        if isinstance(value, Decimal):
+            return float(value)
+        if isinstance(value, (uuid.UUID, datetime, date)):
+            return str(value)
+        return value
+
+    def _to_field(self, value: Any) -> Dict:
+        """Convert a psycopg value to a Data API field dict"""
+        if value is None:
+            return {"isNull": True}
+        elif isinstance(value, bool):
+            return {"booleanValue": value}
+        elif isinstance(value, int):
+            return {"longValue": value}
+        elif isinstance(value, float):
+            return {"doubleValue": value}
+        elif isinstance(value, (dict, list)):
+            return {"stringValue": json.dumps(value)}
+        elif isinstance(value, (bytes, memoryview)):
+            return {"blobValue": bytes(value)}
+        return {"stringValue": str(value)}
+
+
+class _TransactionConnection:
+    """Context manager yielding a transaction's connection without committing it"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, *exc_info):
+        return False
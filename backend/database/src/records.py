@@ -0,0 +1,88 @@
+"""
+Typed row records for hot paths
+Slotted dataclasses built from query rows, with a cheap to_json for the API layer
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass(slots=True)
+class Record:
+    """Base for row records: one slot per column, in table order"""
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any], prefix: str = ""):
+        """
+        Build a record from a query row, ignoring columns it does not hold
+
+        Args:
+            row: Row as returned by DataAPIClient.query
+            prefix: Column name prefix, for records selected as part of a join
+        """
+        return cls(*[row.get(prefix + name) for name in cls.__slots__])
+
+    @classmethod
+    def select_list(cls, alias: str, prefix: str = "") -> str:
+        """Column list selecting this record from a table alias, e.g. 'i.symbol AS i_symbol, ...'"""
+        return ", ".join(f"{alias}.{name} AS {prefix}{name}" for name in cls.__slots__)
+
+    def to_json(self) -> Dict[str, Any]:
+        """Plain dict for JSON responses"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@dataclass(slots=True)
+class Instrument(Record):
+    symbol: str
+    name: str
+    instrument_type: Optional[str]
+    current_price: Optional[float]
+    allocation_regions: Optional[Dict[str, float]]
+    allocation_sectors: Optional[Dict[str, float]]
+    allocation_asset_class: Optional[Dict[str, float]]
+    created_at: Optional[str]
+    updated_at: Optional[str]
+
+
+@dataclass(slots=True)
+class Position(Record):
+    id: str
+    account_id: str
+    symbol: str
+    quantity: float
+    as_of_date: Optional[str]
+    created_at: Optional[str]
+    updated_at: Optional[str]
+    instrument: Optional[Instrument] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any], prefix: str = "", instrument_prefix: str = None):
+        """
+        Build a position from a query row
+
+        Args:
+            row: Row as returned by DataAPIClient.query
+            prefix: Column name prefix of the position columns
+            instrument_prefix: Column name prefix of joined instrument columns, if any
+        """
+        instrument = None
+        if instrument_prefix is not None:
+            instrument = Instrument.from_row(row, instrument_prefix)
+        return cls(*[row.get(prefix + name) for name in cls.__slots__[:-1]], instrument)
+
+    @classmethod
+    def select_list(cls, alias: str, prefix: str = "") -> str:
+        """Column list selecting the position columns from a table alias"""
+        return ", ".join(f"{alias}.{name} AS {prefix}{name}" for name in cls.__slots__[:-1])
+
+    def to_json(self) -> Dict[str, Any]:
+        """Position fields, plus the instrument's name, type and price alongside the full instrument"""
+        data = {name: getattr(self, name) for name in self.__slots__[:-1]}
+        if self.instrument is not None:
+            data["instrument_name"] = self.instrument.name
+            data["instrument_type"] = self.instrument.instrument_type
+            data["current_price"] = self.instrument.current_price
+            data["instrument"] = self.instrument.to_json()
+        return data
+
@@ -0,0 +1,313 @@
+"""
+In-process instrument autocomplete index
+Prefix and trigram lookups over symbols and names, refreshed incrementally
+"""
+
+import bisect
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the instruments table for changes
+REFRESH_SECONDS = float(os.environ.get("INSTRUMENT_INDEX_REFRESH_SECONDS", "60"))
+
+# Seconds an instrument write may take to commit after stamping updated_at;
+# incremental reads start this far before the newest change already indexed
+OVERLAP_SECONDS = float(os.environ.get("INSTRUMENT_INDEX_OVERLAP_SECONDS", "60"))
+
+# Share of a query's trigrams a name must contain to match as a fuzzy hit
+MIN_SIMILARITY = 0.5
+
+WORD = re.compile(r"[a-z0-9]+")
+
+# Match ranks, best first
+EXACT, SYMBOL_PREFIX, WORD_PREFIX, SUBSTRING, FUZZY = range(5)
+
+
+def _deletes(version: str) -> str:
+    """The delete counter part of an Instruments.version() token"""
+    return version.split(":", 1)[0]
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Three-character substrings of a lowercased text"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _Snapshot:
+    """One immutable generation of the index structures
+
+    Searches read whichever snapshot is current without locking; refresh
+    builds the next one on the side (copying this one for incremental
+    changes) and swaps it in. A copy shares the previous snapshot's gram
+    sets and copies each one only before changing it.
+    """
+
+    def __init__(self, entries=None, tokens=None, grams=None, text=None):
+        self.entries: Dict[str, Dict] = entries if entries is not None else {}
+        self.tokens: List[Tuple[str, str]] = tokens if tokens is not None else []
+        self.grams: Dict[str, Set[str]] = grams if grams is not None else {}
+        self.text: Dict[str, str] = text if text is not None else {}
+        # Grams whose sets belong to this snapshot alone, so may change in place
+        self._owned: Set[str] = set()
+
+    def copy(self) -> "_Snapshot":
+        return _Snapshot(dict(self.entries), list(self.tokens), dict(self.grams), dict(self.text))
+
+    def _gram_set(self, gram: str) -> Set[str]:
+        """The symbols of a gram, copied first if shared with an older snapshot"""
+        if gram not in self._owned:
+            self.grams[gram] = set(self.grams.get(gram, ()))
+            self._owned.add(gram)
+        return self.grams[gram]
+
+    def add(self, row: Dict, sort: bool = True):
+        """Index one instrument row"""
+        symbol = row["symbol"]
+        name = row.get("name") or ""
+        price = row.get("current_price")
+        self.entries[symbol] = {
+            "symbol": symbol,
+            "name": name,
+            "instrument_type": row.get("instrument_type"),
+            "current_price": float(price) if price else None,
+        }
+
+        text = f"{symbol} {name}".lower()
+        self.text[symbol] = text
+        for gram in _trigrams(text):
+            self._gram_set(gram).add(symbol)
+
+        for token in {symbol.lower(), *WORD.findall(name.lower())}:
+            if sort:
+                bisect.insort(self.tokens, (token, symbol))
+            else:
+                self.tokens.append((token, symbol))
+
+    def remove(self, symbol: str):
+        """Drop one instrument, if present"""
+        entry = self.entries.pop(symbol, None)
+        if entry is None:
+            return
+
+        for gram in _trigrams(self.text.pop(symbol)):
+            if gram not in self.grams:
+                continue
+            symbols = self._gram_set(gram)
+            symbols.discard(symbol)
+            if not symbols:
+                del self.grams[gram]
+                self._owned.discard(gram)
+
+        for token in {symbol.lower(), *WORD.findall(entry["name"].lower())}:
+            i = bisect.bisect_left(self.tokens, (token, symbol))
+            if i < len(self.tokens) and self.tokens[i] == (token, symbol):
+                del self.tokens[i]
+
+    @classmethod
+    def build(cls, rows: List[Dict]) -> "_Snapshot":
+        """A snapshot of exactly these rows"""
+        snapshot = cls()
+        for row in rows:
+            snapshot.add(row, sort=False)
+        snapshot.tokens.sort()
+        return snapshot
+
+
+class InstrumentIndex:
+    """Ranked symbol/name search over the instrument universe
+
+    Prefixes are found by bisecting one sorted list of (token, symbol) pairs,
+    where the tokens are each symbol and the words of each name; substrings
+    and near misses through an inverted trigram index. Matches rank as exact
+    symbol, symbol prefix, name word prefix, substring, then fuzzy.
+
+    refresh() loads the table the first time and afterwards only re-reads
+    instruments updated since the last load, starting OVERLAP_SECONDS early
+    so writes that commit late are not missed (or reloads everything when
+    the version's delete counter moved). It skips the read when Instruments.version() is unchanged and
+    the last read already covered the overlap. Database reads and building
+    happen outside any lock searches take: search() never waits for refresh,
+    and refresh_in_background() keeps the reads off the caller's thread.
+    """
+
+    def __init__(self, refresh_seconds: float = REFRESH_SECONDS,
+                 overlap_seconds: float = OVERLAP_SECONDS):
+        """
+        Initialize an empty index
+
+        Args:
+            refresh_seconds: Least time between checks for changes in refresh_if_stale
+            overlap_seconds: How far before the newest indexed change incremental reads start
+        """
+        self.refresh_seconds = refresh_seconds
+        self.overlap_seconds = overlap_seconds
+        self._snapshot = _Snapshot()
+        # Held by one refresh at a time; searches never take it
+        self._refresh_lock = threading.Lock()
+        self.version: Optional[str] = None
+        self._updated_since: Optional[str] = None
+        self._checked_at = 0.0
+        self._changed_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._snapshot.entries)
+
+    def refresh(self, instruments) -> int:
+        """
+        Bring the index up to date with the instruments table
+
+        Args:
+            instruments: Instruments model to read through
+
+        Returns:
+            Number of instruments (re)indexed
+        """
+        with self._refresh_lock:
+            return self._refresh(instruments)
+
+    @property
+    def ready(self) -> bool:
+        """Whether the first load has finished, so search() covers the whole table"""
+        return self.version is not None
+
+    def refresh_if_stale(self, instruments) -> int:
+        """refresh() when the last check is older than refresh_seconds (or never happened)
+
+        Returns 0 at once when another refresh is already running.
+        """
+        if not self._stale():
+            return 0
+        if not self._refresh_lock.acquire(blocking=False):
+            return 0
+        try:
+            return self._refresh(instruments)
+        finally:
+            self._refresh_lock.release()
+
+    def refresh_in_background(self, instruments) -> Optional[threading.Thread]:
+        """
+        Start refresh_if_stale on a daemon thread and return at once
+
+        Request handlers call this, then search the current snapshot; errors
+        are logged, not raised.
+
+        Returns:
+            The refresh thread, or None when the index is fresh or already refreshing
+        """
+        if not self._stale() or self._refresh_lock.locked():
+            return None
+        thread = threading.Thread(target=self._refresh_logged, args=(instruments,),
+                                  name="instrument-index", daemon=True)
+        thread.start()
+        return thread
+
+    def _refresh_logged(self, instruments):
+        """refresh_if_stale, logging rather than raising on failure"""
+        try:
+            self.refresh_if_stale(instruments)
+        except Exception as e:
+            logger.warning(f"Instrument index refresh failed: {e}")
+
+    def _stale(self) -> bool:
+        """Whether the last check is older than refresh_seconds (or never happened)"""
+        return self.version is None or time.monotonic() - self._checked_at >= self.refresh_seconds
+
+    def _refresh(self, instruments) -> int:
+        """refresh() with the refresh lock held"""
+        checked_at = time.monotonic()
+        version = instruments.version()
+        # An unchanged version proves nothing new until a read has also run
+        # overlap_seconds after the last change, past any late commits
+        settled = self._checked_at - self._changed_at >= self.overlap_seconds
+        if version == self.version and settled:
+            self._checked_at = checked_at
+            return 0
+        if version != self.version:
+            self._changed_at = checked_at
+
+        # Rows deleted since the last read cannot be seen incrementally
+        deleted = self.version is not None and _deletes(version) != _deletes(self.version)
+        if self._updated_since is None or deleted:
+            rows = instruments.find_all()
+            snapshot = _Snapshot.build(rows)
+        else:
+            rows = instruments.find_updated_since(self._updated_since, self.overlap_seconds)
+            snapshot = self._snapshot.copy()
+            for row in rows:
+                snapshot.remove(row["symbol"])
+                snapshot.add(row)
+
+        updated_since = self._updated_since
+        for row in rows:
+            updated_at = str(row.get("updated_at") or "")
+            if updated_since is None or updated_at > updated_since:
+                updated_since = updated_at
+
+        # Swapping the attribute is atomic; searches use whichever snapshot they started with
+        self._snapshot = snapshot
+        self._updated_since = updated_since
+        self.version = version
+        self._checked_at = checked_at
+        logger.info(f"Instrument index refreshed: {len(rows)} indexed, {len(snapshot.entries)} total")
+        return len(rows)
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        Top matches for a query, best first
+
+        Args:
+            query: Symbol or name fragment
+            limit: Most results to return
+        """
+        q = query.strip().lower()
+        if not q:
+            return []
+
+        snapshot = self._snapshot
+        matches: Dict[str, Tuple[int, float]] = {}
+
+        symbol = q.upper()
+        if symbol in snapshot.entries:
+            matches[symbol] = (EXACT, 1.0)
+
+        tokens = snapshot.tokens
+        for i in range(bisect.bisect_left(tokens, (q, "")), len(tokens)):
+            token, symbol = tokens[i]
+            if not token.startswith(q):
+                break
+            rank = SYMBOL_PREFIX if token == symbol.lower() else WORD_PREFIX
+            if symbol not in matches or rank < matches[symbol][0]:
+                matches[symbol] = (rank, 1.0)
+
+        # Substring and fuzzy hits rank below every prefix hit, so they
+        # are only needed when the prefixes do not fill the results
+        grams = _trigrams(q) if len(matches) < limit else set()
+        if grams:
+            counts: Dict[str, int] = {}
+            for gram in grams:
+                for symbol in snapshot.grams.get(gram, ()):
+                    counts[symbol] = counts.get(symbol, 0) + 1
+            for symbol, count in counts.items():
+                if symbol in matches:
+                    continue
+                similarity = count / len(grams)
+                if q in snapshot.text[symbol]:
+                    matches[symbol] = (SUBSTRING, similarity)
+                elif similarity >= MIN_SIMILARITY:
+                    matches[symbol] = (FUZZY, similarity)
+
+        ranked = heapq.nsmallest(
+            limit, matches.items(), key=lambda m: (m[1][0], -m[1][1], len(m[0]), m[0])
+        )
+        return [dict(snapshot.entries[symbol]) for symbol, _ in ranked]
+
+
+# Shared by every Database instance in the process
+instrument_index = InstrumentIndex()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test AsyncDatabase: awaitable model calls on a thread pool
+Runs without AWS or a database: uv run test_aio.py
+"""
+
+import asyncio
+import threading
+
+from checks import fake_database, result, run_checks
+from src import AsyncDatabase, track_queries
+
+
+def test_calls_run_off_the_event_loop():
+    """Model calls run on the pool's threads and return their results"""
+    db, fake = fake_database()
+    fake.respond(result([{"clerk_user_id": "user_1"}]))
+    adb = AsyncDatabase(db, max_workers=2)
+
+    async def run():
+        loop_thread = threading.current_thread()
+        user = await adb.users.find_by_clerk_id("user_1")
+        worker = await adb.run(threading.current_thread)
+        return loop_thread, worker, user
+
+    loop_thread, worker, user = asyncio.run(run())
+    assert user == {"clerk_user_id": "user_1"}
+    assert worker is not loop_thread and worker.name.startswith("db")
+    # Plain attributes pass through unwrapped
+    assert adb.instruments.table_name == "instruments" and adb.db is db
+
+
+def test_calls_overlap():
+    """Calls gathered together are in flight at the same time, up to max_workers"""
+    db, _ = fake_database()
+    adb = AsyncDatabase(db, max_workers=3)
+    both_running = threading.Barrier(3, timeout=5)
+
+    async def run():
+        return await asyncio.gather(*[adb.run(both_running.wait) for _ in range(3)])
+
+    # Each call waits for the others; serialized calls would time out the barrier
+    assert sorted(asyncio.run(run())) == [0, 1, 2]
+
+
+def test_metrics_follow_the_request():
+    """Round trips made on the pool count against the caller's track_queries"""
+    db, fake = fake_database()
+    adb = AsyncDatabase(db, max_workers=2)
+
+    async def run():
+        with track_queries("request", log_summary=False) as metrics:
+            await asyncio.gather(adb.users.find_by_clerk_id("user_1"), adb.accounts.find_by_user("user_1"))
+        return metrics.summary()
+
+    assert asyncio.run(run())["round_trips"] == 2
+
+
+def test_transaction_runs_on_one_thread():
+    """transaction() runs the whole block on one worker, committing (or rolling back) there"""
+    db, fake = fake_database()
+    adb = AsyncDatabase(db, max_workers=2)
+
+    def delete_account(tx, account_id):
+        tx.positions.delete_by_account(account_id)
+        tx.accounts.delete(account_id)
+        return threading.current_thread()
+
+    def fail(tx):
+        tx.accounts.delete("00000000-0000-0000-0000-000000000001")
+        raise ValueError("rolled back")
+
+    async def run():
+        worker = await adb.transaction(delete_account, "00000000-0000-0000-0000-000000000001")
+        try:
+            await adb.transaction(fail)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("expected the block's ValueError")
+        return worker
+
+    worker = asyncio.run(run())
+    assert worker is not threading.current_thread()
+    assert fake.operations() == [
+        "begin_transaction", "execute_statement", "execute_statement", "commit_transaction",
+        "begin_transaction", "execute_statement", "rollback_transaction",
+    ]
+    assert {kwargs.get("transactionId") for _, kwargs in fake.calls[1:3]} == {"tx-1"}
+
+
+if __name__ == "__main__":
+    run_checks("Testing async database access", globals())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test the TTL cache and the instrument read-through cache
+Runs without AWS or a database: uv run test_cache.py
+"""
+
+import time
+from datetime import date
+
+from checks import client_error, fake_database, result, run_checks, updated
+from src.cache import TTLCache
+
+SPY = {
+    "symbol": "SPY", "name": "SPDR S&P 500 ETF Trust", "instrument_type": "etf",
+    "current_price": "450.00", "allocation_regions": '{"north_america": 100}',
+}
+BND = dict(SPY, symbol="BND", name="Vanguard Total Bond Market ETF", current_price="72.00")
+TYPES = {"current_price": "numeric", "allocation_regions": "jsonb"}
+
+
+def instruments(*rows):
+    """SELECT response for instrument rows"""
+    return result(list(rows), types=TYPES)
+
+
+def test_entries_expire():
+    """Entries are served until their TTL passes, then miss"""
+    cache = TTLCache(ttl_seconds=0.05)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_evicted():
+    """Past max_size the least recently used entry is dropped"""
+    cache = TTLCache(max_size=2)
+    cache.set_many({"a": 1, "b": 2})
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert len(cache) == 2
+
+
+def test_invalidate():
+    """invalidate drops the given keys, or everything"""
+    cache = TTLCache()
+    cache.set_many({"a": 1, "b": 2, "c": 3})
+    cache.invalidate(["a", "missing"])
+    assert (cache.get("a"), cache.get("b")) == (None, 2)
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_read_through():
+    """A symbol read once is served from the cache; find_by_symbols only reads the misses"""
+    db, fake = fake_database()
+    fake.respond(instruments(SPY), instruments(BND))
+
+    assert db.instruments.find_by_symbol("SPY")["current_price"] == 450.0
+    assert db.instruments.find_by_symbol("SPY")["current_price"] == 450.0
+    rows = db.instruments.find_by_symbols(["SPY", "BND", "SPY"])
+    assert [row["symbol"] for row in rows] == ["BND", "SPY"]
+
+    statements = fake.statements()
+    assert len(statements) == 2
+    assert fake.calls[1][1]["parameters"] == [{"name": "symbols", "value": {"stringValue": "BND"}}]
+
+
+def test_writes_invalidate():
+    """Updating an instrument makes the next lookup read it again"""
+    db, fake = fake_database()
+    fake.respond(instruments(SPY), updated(1), instruments(dict(SPY, current_price="455.00")))
+
+    db.instruments.find_by_symbol("SPY")
+    db.instruments.update_price("SPY", 455.0)
+    assert db.instruments.find_by_symbol("SPY")["current_price"] == 455.0
+    assert len(fake.statements()) == 3
+
+
+def test_transaction_reads_not_cached():
+    """Rows read inside an open transaction are not cached"""
+    db, fake = fake_database()
+    fake.respond({"transactionId": "tx-1"}, instruments(SPY), {}, instruments(SPY))
+    with db.transaction():
+        db.instruments.find_by_symbol("SPY")
+    db.instruments.find_by_symbol("SPY")
+    assert len(fake.statements()) == 2
+
+
+def test_returned_rows_are_private():
+    """Editing a returned row (or its allocations) does not change the cached copy"""
+    db, fake = fake_database()
+    fake.respond(instruments(SPY), instruments(BND))
+
+    # Cache miss, then hit, on both lookup paths
+    missed = db.instruments.find_by_symbol("SPY")
+    missed["current_price"] = 1.0
+    missed["allocation_regions"]["europe"] = 50
+    hit = db.instruments.find_by_symbol("SPY")
+    hit["allocation_regions"].clear()
+    [bnd] = db.instruments.find_by_symbols(["BND"])
+    bnd["allocation_regions"]["asia"] = 10
+
+    spy, bnd = db.instruments.find_by_symbols(["SPY", "BND"])[::-1]
+    assert spy["current_price"] == 450.0
+    assert spy["allocation_regions"] == {"north_america": 100}
+    assert bnd["allocation_regions"] == {"north_america": 100}
+    assert len(fake.statements()) == 2
+
+
+def cached_at_end(db, fake, outcome):
+    """Handler recording whether SPY was still cached when the transaction ended"""
+    seen = []
+
+    def handler(operation, kwargs):
+        if operation == f"{outcome}_transaction":
+            seen.append(db.instruments.cache.get("SPY") is not None)
+        if operation == "execute_statement" and "RETURNING i.symbol" in kwargs["sql"]:
+            return result([{"symbol": "SPY"}])
+        if operation == "execute_statement" and "INSERT INTO price_history" in " ".join(kwargs["sql"].split()):
+            if outcome == "rollback":
+                return client_error("BadRequestException", "partition missing")
+        return None
+
+    fake.handler = handler
+    return seen
+
+
+def test_priced_day_invalidates_after_commit():
+    """bulk_update_prices with as_of drops the symbols only once the transaction commits"""
+    db, fake = fake_database()
+    fake.respond(instruments(SPY))
+    db.instruments.find_by_symbol("SPY")
+    seen = cached_at_end(db, fake, "commit")
+
+    assert db.instruments.bulk_update_prices({"SPY": 455.0}, as_of=date(2025, 1, 2)) == []
+    assert seen == [True]
+    assert db.instruments.cache.get("SPY") is None
+
+
+def test_priced_day_invalidates_after_rollback():
+    """A failed price load still drops the symbols, after the rollback"""
+    db, fake = fake_database()
+    fake.respond(instruments(SPY))
+    db.instruments.find_by_symbol("SPY")
+    seen = cached_at_end(db, fake, "rollback")
+
+    try:
+        db.instruments.bulk_update_prices({"SPY": 455.0}, as_of=date(2025, 1, 2))
+    except Exception:
+        pass
+    else:
+        raise AssertionError("expected the price_history insert to fail")
+    assert seen == [True]
+    assert db.instruments.cache.get("SPY") is None
+    assert fake.operations()[-1] == "rollback_transaction"
+
+
+if __name__ == "__main__":
+    run_checks("Testing instrument cache", globals())
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Test DataAPIClient against a fake rds-data client
+Runs without AWS or a database: uv run test_client.py
+"""
+
+import threading
+import uuid
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+
+from checks import FakeDataAPI, client_error, fake_database, patched, result, run_checks
+from src import client as client_module
+from src import metrics as metrics_module
+from src.client import DataAPIClient
+from src.metrics import QueryMetrics, track_queries
+
+
+def fake_client(handler=None):
+    """A DataAPIClient whose boto3 client is a FakeDataAPI"""
+    client = DataAPIClient(cluster_arn="arn:aws:rds:test", secret_arn="arn:aws:secret:test")
+    client.client = FakeDataAPI(handler)
+    return client, client.client
+
+
+def test_batches_split_by_count():
+    """execute_batch sends at most MAX_BATCH_PARAMETER_SETS sets per call"""
+    client, fake = fake_client()
+    sets = [[{"name": "n", "value": {"longValue": i}}] for i in range(7)]
+    with patched(client_module, MAX_BATCH_PARAMETER_SETS=3):
+        client.execute_batch("INSERT INTO t VALUES (:n)", sets)
+
+    calls = [kwargs for op, kwargs in fake.calls if op == "batch_execute_statement"]
+    assert [len(kwargs["parameterSets"]) for kwargs in calls] == [3, 3, 1]
+    assert [s for kwargs in calls for s in kwargs["parameterSets"]] == sets
+
+
+def test_batches_split_by_payload():
+    """execute_batch starts a new call before a chunk would pass the payload limit"""
+    client, fake = fake_client()
+    sets = [[{"name": "text", "value": {"stringValue": "x" * 100}}] for _ in range(5)]
+    with patched(client_module, MAX_BATCH_PAYLOAD_BYTES=400):
+        client.execute_batch("INSERT INTO t VALUES (:text)", sets)
+
+    sizes = [len(kwargs["parameterSets"]) for op, kwargs in fake.calls if op == "batch_execute_statement"]
+    assert sum(sizes) == 5 and max(sizes) == 2, sizes
+
+
+def test_insert_many():
+    """insert_many sends one batch with typed placeholders and the ON CONFLICT clause"""
+    client, fake = fake_client()
+    rows = [
+        {"id": uuid.uuid4(), "symbol": "SPY", "quantity": Decimal("10"), "meta": None},
+        {"id": uuid.uuid4(), "symbol": "BND", "quantity": Decimal("2.5"), "meta": {"a": 1}},
+    ]
+    assert client.insert_many("positions", rows, on_conflict="ON CONFLICT DO NOTHING") == 2
+
+    [(operation, kwargs)] = fake.calls
+    assert operation == "batch_execute_statement"
+    sql = " ".join(kwargs["sql"].split())
+    # Casts come from the first non-null value of each column
+    assert "VALUES (:id::uuid, :symbol, :quantity::numeric, :meta::jsonb)" in sql
+    assert sql.endswith("ON CONFLICT DO NOTHING")
+    assert kwargs["parameterSets"][0][3] == {"name": "meta", "value": {"isNull": True}}
+    assert kwargs["parameterSets"][1][2] == {"name": "quantity", "value": {"stringValue": "2.5"}}
+
+
+def test_insert_returning_chunks():
+    """insert_returning sends one multi-row INSERT per chunk and returns every RETURNING row"""
+    client, fake = fake_client()
+    fake.respond(result([{"id": 1}, {"id": 2}]), result([{"id": 3}]))
+    rows = [{"symbol": s, "price": p} for s, p in [("A", None), ("B", Decimal("2.5")), ("C", None)]]
+
+    returned = client.insert_returning("t", rows, on_conflict="ON CONFLICT DO NOTHING",
+                                       returning="id", chunk_size=2)
+    assert returned == [{"id": 1}, {"id": 2}, {"id": 3}]
+    first, second = fake.statements()
+    assert first == ("INSERT INTO t (symbol, price) VALUES (:symbol_0, :price_0::numeric), "
+                     "(:symbol_1, :price_1::numeric) ON CONFLICT DO NOTHING RETURNING id")
+    assert second.startswith("INSERT INTO t (symbol, price) VALUES (:symbol_0, :price_0::numeric) ON")
+    assert client.insert_returning("t", []) == [] and len(fake.calls) == 2
+
+
+def test_insert_many_needs_matching_columns():
+    """insert_many rejects rows whose columns differ, and sends nothing for no rows"""
+    client, fake = fake_client()
+    assert client.insert_many("t", []) == 0
+    try:
+        client.insert_many("t", [{"a": 1}, {"b": 2}])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+    assert fake.calls == []
+
+
+def test_create_accounts_in_one_batch():
+    """create_accounts inserts every account with one batch call and returns their IDs"""
+    db, fake = fake_database()
+    ids = db.accounts.create_accounts("user_1", [
+        {"account_name": "ISA", "cash_balance": Decimal("100")},
+        {"account_name": "401k"},
+    ])
+    assert fake.operations() == ["batch_execute_statement"]
+    sets = fake.calls[0][1]["parameterSets"]
+    assert [str(uuid.UUID(i)) for i in ids] == [s[0]["value"]["stringValue"] for s in sets]
+
+
+def test_decodes_by_column_type():
+    """query decodes numeric columns to float and json/jsonb columns to objects"""
+    client, fake = fake_client()
+    fake.respond(result(
+        [
+            {"symbol": "SPY", "price": "450.25", "allocation": '{"us": 100}', "tags": '["etf"]', "qty": 3},
+            {"symbol": "TLT", "price": None, "allocation": None, "tags": None, "qty": None},
+        ],
+        types={"price": "numeric", "allocation": "jsonb", "tags": "json"},
+    ))
+    spy, tlt = client.query("SELECT * FROM instruments")
+    assert spy == {"symbol": "SPY", "price": 450.25, "allocation": {"us": 100}, "tags": ["etf"], "qty": 3}
+    assert tlt == {"symbol": "TLT", "price": None, "allocation": None, "tags": None, "qty": None}
+
+
+def test_decodes_formatted_records():
+    """JSON-formatted records get the same per-column decoding"""
+    client, fake = fake_client()
+    fake.respond({
+        "columnMetadata": [{"name": "price", "typeName": "numeric"}, {"name": "regions", "typeName": "jsonb"},
+                           {"name": "name", "typeName": "varchar"}],
+        "formattedRecords": '[{"price": "72.10", "regions": "{\\"uk\\": 50}", "name": "BND"},'
+                            ' {"price": null, "regions": {"us": 1}, "name": "{}"}]',
+    })
+    rows = client.query("SELECT * FROM instruments", format_json=True)
+    assert rows == [
+        {"price": 72.10, "regions": {"uk": 50}, "name": "BND"},
+        # Already-parsed json passes through; text that looks like json is left alone
+        {"price": None, "regions": {"us": 1}, "name": "{}"},
+    ]
+    assert fake.calls[0][1]["formatRecordsAs"] == "JSON"
+
+
+def test_empty_results():
+    """Statements without records decode to an empty list"""
+    client, fake = fake_client()
+    fake.respond({"numberOfRecordsUpdated": 2}, {"formattedRecords": ""})
+    assert client.query("UPDATE t SET a = 1") == []
+    assert client.query("SELECT 1", format_json=True) == []
+
+
+def test_transaction_commits():
+    """Statements in a transaction carry its ID, and it commits when the block exits"""
+    client, fake = fake_client()
+    with client.transaction() as transaction_id:
+        client.execute("INSERT INTO t VALUES (1)")
+        client.execute_batch("INSERT INTO t VALUES (:n)", [[{"name": "n", "value": {"longValue": 2}}]])
+    client.execute("SELECT 1")
+
+    assert fake.operations() == [
+        "begin_transaction", "execute_statement", "batch_execute_statement",
+        "commit_transaction", "execute_statement",
+    ]
+    assert [kwargs.get("transactionId") for _, kwargs in fake.calls[1:]] == [
+        transaction_id, transaction_id, transaction_id, None,
+    ]
+    assert client.transaction_id is None
+
+
+def test_transaction_rolls_back():
+    """An exception in the block rolls back and propagates"""
+    client, fake = fake_client()
+    try:
+        with client.transaction():
+            client.execute("INSERT INTO t VALUES (1)")
+            raise KeyError("boom")
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("expected KeyError")
+    assert fake.operations() == ["begin_transaction", "execute_statement", "rollback_transaction"]
+    assert client.transaction_id is None
+
+
+def test_nested_transactions_join():
+    """A nested transaction() joins the outer one instead of beginning another"""
+    db, fake = fake_database()
+    with db.transaction() as tx:
+        assert tx is db
+        with db.transaction():
+            db.accounts.delete("00000000-0000-0000-0000-000000000001")
+        db.users.find_by_clerk_id("user_1")
+
+    assert fake.operations() == [
+        "begin_transaction", "execute_statement", "execute_statement", "commit_transaction",
+    ]
+
+
+def test_after_transaction_callbacks():
+    """after_transaction callbacks run at once outside a transaction, else after it ends"""
+    client, fake = fake_client()
+    ran = []
+    client.after_transaction(lambda: ran.append("now"))
+    with client.transaction():
+        client.after_transaction(lambda: ran.append(fake.operations()[-1]))
+        assert ran == ["now"]
+    try:
+        with client.transaction():
+            client.after_transaction(lambda: ran.append(fake.operations()[-1]))
+            raise KeyError("boom")
+    except KeyError:
+        pass
+    assert ran == ["now", "commit_transaction", "rollback_transaction"]
+
+
+def test_transactions_are_per_thread():
+    """Another thread's calls do not join a transaction open on this one"""
+    client, fake = fake_client()
+    seen = []
+    with client.transaction():
+        thread = threading.Thread(target=lambda: seen.append(client.transaction_id) or client.execute("SELECT 1"))
+        thread.start()
+        thread.join()
+    assert seen == [None]
+    assert "transactionId" not in fake.calls[1][1]
+
+
+def test_round_trips_are_recorded():
+    """track_queries counts each call with its rows and payload, grouped by statement"""
+    client, fake = fake_client()
+    response = result([{"n": 1}, {"n": 2}])
+    response["ResponseMetadata"] = {"HTTPHeaders": {"content-length": "120"}}
+    fake.respond(response, response, {"numberOfRecordsUpdated": 3})
+
+    with track_queries("test", log_summary=False) as metrics:
+        client.query("SELECT n FROM t")
+        client.query("SELECT   n\n FROM t")
+        client.execute("UPDATE t SET n = n + 1")
+    client.query("SELECT outside")
+
+    summary = metrics.summary()
+    assert (summary["round_trips"], summary["rows"], summary["payload_bytes"]) == (3, 7, 240)
+    by_sql = {stats["sql"]: stats for stats in summary["statements"]}
+    assert set(by_sql) == {"SELECT n FROM t", "UPDATE t SET n = n + 1"}
+    assert by_sql["SELECT n FROM t"]["count"] == 2 and by_sql["SELECT n FROM t"]["rows"] == 4
+    assert sum(by_sql["SELECT n FROM t"]["histogram"].values()) == 2
+
+
+def test_formatted_rows_are_counted():
+    """Rows decoded from formattedRecords are added to their statement"""
+    client, fake = fake_client()
+    fake.respond({"columnMetadata": [{"name": "n", "typeName": "int4"}],
+                  "formattedRecords": '[{"n": 1}, {"n": 2}, {"n": 3}]'})
+    with track_queries("test", log_summary=False) as metrics:
+        client.query("SELECT n FROM t", format_json=True)
+    assert metrics.summary()["statements"][0]["rows"] == 3
+
+
+def test_latency_buckets_and_slow_statements():
+    """Durations land in their histogram bucket; slow ones are counted"""
+    metrics = QueryMetrics("test")
+    with patched(metrics_module, SLOW_QUERY_MS=100):
+        for duration_ms in (3, 5, 7, 150, 9000):
+            metrics.record("SELECT 1", duration_ms)
+    [stats] = metrics.summary()["statements"]
+    assert stats["histogram"] == {"<=5ms": 2, "<=10ms": 1, "<=250ms": 1, ">5000ms": 1}
+    assert stats["max_ms"] == 9000 and metrics.slow_statements == 2
+
+
+def no_backoff():
+    """Retry resuming-cluster errors immediately"""
+    return patched(client_module, RESUME_BASE_DELAY=0, RESUME_MAX_DELAY=0)
+
+
+def test_resuming_cluster_is_retried():
+    """Calls rejected while the cluster resumes are retried, and the wait is recorded"""
+    client, fake = fake_client()
+    fake.respond(
+        client_error("DatabaseResumingException", "Aurora is resuming"),
+        client_error("BadRequestException", "Communications link failure"),
+        result([{"n": 1}]),
+    )
+    with no_backoff(), track_queries("test", log_summary=False) as metrics:
+        assert client.query("SELECT 1") == [{"n": 1}]
+    assert len(fake.calls) == 3
+    assert metrics.resume_retries == 2
+    # Only the successful attempt counts as a round trip
+    assert metrics.round_trips == 1
+
+
+def test_retries_give_up():
+    """Retries stop after RESUME_MAX_ATTEMPTS, raising the last error"""
+    client, fake = fake_client()
+    fake.respond(*[client_error("DatabaseResumingException")] * 5)
+    with no_backoff(), patched(client_module, RESUME_MAX_ATTEMPTS=3):
+        try:
+            client.execute("SELECT 1")
+        except ClientError as e:
+            assert e.response["Error"]["Code"] == "DatabaseResumingException"
+        else:
+            raise AssertionError("expected ClientError")
+    assert len(fake.calls) == 3
+
+
+def test_other_errors_are_not_retried():
+    """Ordinary errors, and lost connections inside a transaction, are raised at once"""
+    client, fake = fake_client()
+    fake.respond(client_error("BadRequestException", "syntax error at or near"))
+    with no_backoff():
+        try:
+            client.execute("SELEC 1")
+        except ClientError:
+            pass
+        else:
+            raise AssertionError("expected ClientError")
+
+        # The transaction's connection is gone, so retrying the statement cannot help
+        fake.respond({"transactionId": "tx-1"},
+                     client_error("BadRequestException", "Communications link failure"))
+        try:
+            with client.transaction():
+                client.execute("UPDATE t SET n = 1")
+        except ClientError:
+            pass
+        else:
+            raise AssertionError("expected ClientError")
+    assert fake.operations() == [
+        "execute_statement", "begin_transaction", "execute_statement", "rollback_transaction",
+    ]
+
+
+def test_warm_up_never_raises():
+    """warm_up pings with SELECT 1 and logs failures instead of raising"""
+    client, fake = fake_client()
+    fake.respond(client_error("BadRequestException", "access denied"))
+    client.warm_up(background=False)
+    client.warm_up(background=True).join(5)
+    assert fake.statements() == ["SELECT 1", "SELECT 1"]
+
+
+if __name__ == "__main__":
+    run_checks("Testing Data API client", globals())
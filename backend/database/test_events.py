@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test job event notifications and the shared per-job progress feeds
+Runs without a database, against in-memory progress readers: uv run test_events.py
+"""
+
+import asyncio
+import threading
+
+from checks import run_checks
+from src.events import JobEventBroker, JobProgressFeeds
+
+
+def progress(status, *results):
+    return {"clerk_user_id": "user_1", "status": status, "error_message": None, "results": list(results)}
+
+
+class ProgressReader:
+    """Coroutine returning queued progress (repeating the last) and counting reads"""
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.reads = 0
+
+    async def __call__(self, job_id):
+        self.reads += 1
+        return self.steps.pop(0) if len(self.steps) > 1 else self.steps[0]
+
+
+def test_publish_wakes_subscribers():
+    """publish() from another thread sets the subscriber's event; unsubscribed events stay unset"""
+    async def run():
+        broker = JobEventBroker()
+        woken, dropped = broker.subscribe("job-1"), broker.subscribe("job-1")
+        broker.unsubscribe("job-1", dropped)
+        threading.Thread(target=broker.publish, args=("job-1",)).start()
+        await asyncio.wait_for(woken.wait(), timeout=1)
+        await asyncio.sleep(0.01)
+        return dropped.is_set(), broker._subscribers
+
+    dropped_set, subscribers = asyncio.run(run())
+    assert not dropped_set
+    assert list(subscribers) == ["job-1"]
+
+
+def test_followers_share_one_reader():
+    """Every stream following a job shares one reader, which stops when the job finishes"""
+    async def run():
+        feeds = JobProgressFeeds(JobEventBroker(), poll_seconds=0.01)
+        reader = ProgressReader(progress("running", "report"), progress("completed", "charts", "report"))
+        first = feeds.follow("job-1", progress("pending"), reader)
+        second = feeds.follow("job-1", progress("pending"), reader)
+        await asyncio.wait_for(first.task, timeout=1)
+        seen = (first is second, first.followers, first.progress["status"], reader.reads)
+        feeds.unfollow("job-1", first)
+        feeds.unfollow("job-1", second)
+        return seen, feeds._feeds
+
+    (shared, followers, status, reads), remaining = asyncio.run(run())
+    assert shared and followers == 2
+    assert status == "completed" and reads == 2
+    assert remaining == {}
+
+
+def test_listener_reads_only_when_notified():
+    """With a listener running the reader does not poll; it re-reads once per notification"""
+    async def run():
+        broker = JobEventBroker()
+        broker.listening = True
+        feeds = JobProgressFeeds(broker, poll_seconds=0.01)
+        reader = ProgressReader(progress("running"), progress("running", "report"))
+        feed = feeds.follow("job-1", progress("pending"), reader)
+
+        # The first read catches a change made before subscribing
+        changed = feed.changed
+        await asyncio.wait_for(changed.wait(), timeout=1)
+        await asyncio.sleep(0.05)
+        reads_before = reader.reads
+
+        changed = feed.changed
+        broker.publish("job-1")
+        await asyncio.wait_for(changed.wait(), timeout=1)
+        results = feed.progress["results"]
+        feeds.unfollow("job-1", feed)
+        try:
+            await feed.task
+        except asyncio.CancelledError:
+            pass
+        return reads_before, reader.reads, results, feed.task.cancelled()
+
+    reads_before, reads_after, results, cancelled = asyncio.run(run())
+    assert (reads_before, reads_after) == (1, 2)
+    assert results == ["report"]
+    assert cancelled
+
+
+def test_unchanged_progress_does_not_wake():
+    """A read returning the same progress leaves followers waiting"""
+    async def run():
+        feeds = JobProgressFeeds(JobEventBroker(), poll_seconds=0.01)
+        reader = ProgressReader(progress("running"))
+        feed = feeds.follow("job-1", progress("running"), reader)
+        changed = feed.changed
+        await asyncio.sleep(0.05)
+        feeds.unfollow("job-1", feed)
+        return changed.is_set(), reader.reads
+
+    woken, reads = asyncio.run(run())
+    assert not woken and reads >= 2
+
+
+if __name__ == "__main__":
+    run_checks("Testing job events", globals())
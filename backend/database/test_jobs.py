@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test job rows, their per-agent job_results and job listings
+Runs without AWS or a database: uv run test_jobs.py
+"""
+
+from checks import fake_database, patched, result, run_checks, updated
+
+JOB_ID = "00000000-0000-0000-0000-00000000000a"
+
+
+def job_row(results=None, **values):
+    """One jobs row as _select_sql returns it"""
+    row = {
+        "id": JOB_ID, "clerk_user_id": "user_1", "job_type": "portfolio_analysis", "status": "completed",
+        "request_payload": None, "summary_payload": None, "error_message": None,
+        "created_at": "2025-01-02 03:04:05", "started_at": None, "completed_at": None,
+        "updated_at": "2025-01-02 03:04:05", "results": results,
+    }
+    row.update(values)
+    return row
+
+
+JOB_TYPES = {"request_payload": "jsonb", "summary_payload": "jsonb", "results": "jsonb"}
+
+
+def test_results_are_saved_per_agent():
+    """Each agent upserts its own job_results row instead of updating the jobs row"""
+    db, fake = fake_database()
+    fake.respond(updated(1))
+
+    assert db.jobs.update_report(JOB_ID, {"markdown": "# Report"}) == 1
+    [sql] = fake.statements()
+    assert sql.startswith("INSERT INTO job_results (job_id, agent, payload)")
+    assert "ON CONFLICT (job_id, agent) DO UPDATE SET payload = EXCLUDED.payload" in sql
+    assert "UPDATE jobs" not in sql
+    params = {p["name"]: p["value"] for p in fake.calls[0][1]["parameters"]}
+    assert params["agent"] == {"stringValue": "report"}
+    assert params["job_id"] == {"stringValue": JOB_ID}
+
+
+def test_results_merge_under_payload_keys():
+    """find_by_id returns each agent's result under its *_payload key, hydrating packed ones"""
+    db, fake = fake_database()
+    with patched(db.jobs.payloads, compress_threshold=10):
+        packed = db.jobs.payloads.pack(f"jobs/{JOB_ID}/report", {"markdown": "# A long enough report"})
+    assert db.jobs.payloads.is_packed(packed)
+    fake.respond(result([job_row({"report": packed, "charts": {"charts": []}})], types=JOB_TYPES))
+
+    job = db.jobs.find_by_id(JOB_ID)
+    assert "results" not in job
+    assert job["report_payload"] == {"markdown": "# A long enough report"}
+    assert job["charts_payload"] == {"charts": []}
+    assert job["retirement_payload"] is None
+
+
+def test_results_can_be_limited():
+    """results= restricts which agents are read; an empty list skips job_results entirely"""
+    db, fake = fake_database()
+    fake.respond(result([job_row({"charts": {"charts": []}})], types=JOB_TYPES),
+                 result([job_row(None)], types=JOB_TYPES))
+
+    db.jobs.find_by_id(JOB_ID, results=["charts"])
+    job = db.jobs.find_by_id(JOB_ID, results=[])
+    assert job["charts_payload"] is None
+
+    filtered, skipped = fake.statements()
+    assert "r.agent = ANY(string_to_array(:agents, ','))" in filtered
+    assert {"name": "agents", "value": {"stringValue": "charts"}} in fake.calls[0][1]["parameters"]
+    assert "job_results" not in skipped and "NULL::jsonb AS results" in skipped
+
+    try:
+        db.jobs.find_by_id(JOB_ID, results=["tagger"])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError for an unknown agent")
+
+
+def test_progress_lists_finished_agents():
+    """progress reports status and the agents that have saved a result, without payloads"""
+    db, fake = fake_database()
+    fake.respond(result([{"clerk_user_id": "user_1", "status": "running", "error_message": None,
+                          "results": "charts,report"}]),
+                 result([{"clerk_user_id": "user_1", "status": "pending", "error_message": None,
+                          "results": None}]),
+                 result([]))
+
+    assert db.jobs.progress(JOB_ID)["results"] == ["charts", "report"]
+    assert db.jobs.progress(JOB_ID)["results"] == []
+    assert db.jobs.progress(JOB_ID) is None
+    assert all("payload" not in sql for sql in fake.statements())
+
+
+def summary_row(n):
+    """One row of the lightweight job listing"""
+    return {"id": f"00000000-0000-0000-0000-00000000000{n}", "job_type": "portfolio_analysis",
+            "status": "completed", "created_at": f"2025-01-0{n} 00:00:00", "started_at": None,
+            "completed_at": None, "updated_at": f"2025-01-0{n} 00:00:00"}
+
+
+def test_listing_reads_summary_columns_only():
+    """list_by_user selects the summary columns, never payloads or job_results"""
+    db, fake = fake_database()
+    fake.respond(result([summary_row(3), summary_row(2), summary_row(1)]))
+
+    jobs, cursor = db.jobs.list_by_user("user_1", status="completed", limit=2)
+    assert [job["id"][-1] for job in jobs] == ["3", "2"]
+    assert cursor == ["2025-01-02 00:00:00", "00000000-0000-0000-0000-000000000002"]
+
+    [sql] = fake.statements()
+    assert sql.startswith("SELECT * FROM ( SELECT id, job_type, status, created_at,")
+    assert "payload" not in sql and "job_results" not in sql
+    assert "AND status = :status" in sql and sql.endswith("ORDER BY created_at DESC, id DESC LIMIT :_limit")
+    assert {"name": "_limit", "value": {"longValue": 3}} in fake.calls[0][1]["parameters"]
+
+
+def test_listing_continues_after_cursor():
+    """The next page starts strictly after the cursor, and the last page has no cursor"""
+    db, fake = fake_database()
+    fake.respond(result([summary_row(1)]))
+
+    jobs, cursor = db.jobs.list_by_user("user_1", limit=2,
+                                        after=["2025-01-02 00:00:00", "00000000-0000-0000-0000-000000000002"])
+    assert len(jobs) == 1 and cursor is None
+    [sql] = fake.statements()
+    assert "WHERE (created_at, id) < (:_after_0::timestamp, :_after_1::uuid)" in sql
+
+
+if __name__ == "__main__":
+    run_checks("Testing jobs", globals())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test DataLoader batching, dedupe and caching
+Runs without a database, against in-memory batch functions and a fake Data API: uv run test_loader.py
+"""
+
+import asyncio
+
+from checks import fake_database, result, run_checks
+from src.loader import DataLoader, Loaders
+
+ROWS = {key: {"key": key} for key in "abcdefgh"}
+
+
+class BatchRecorder:
+    """Batch function over ROWS that records the keys of each call"""
+
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    def __call__(self, keys):
+        self.calls.append(list(keys))
+        if self.fail:
+            raise RuntimeError("batch failed")
+        return {key: ROWS[key] for key in keys if key in ROWS}
+
+
+def test_same_tick_loads_batch():
+    """Loads made in the same tick are resolved by one call with distinct keys"""
+    async def run():
+        batch = BatchRecorder()
+        loader = DataLoader(batch)
+        rows = await asyncio.gather(loader.load("a"), loader.load("b"), loader.load("a"), loader.load("zz"))
+        return batch, rows
+
+    batch, rows = asyncio.run(run())
+    assert batch.calls == [["a", "b", "zz"]]
+    assert rows == [ROWS["a"], ROWS["b"], ROWS["a"], None]
+
+
+def test_results_are_cached():
+    """A key loaded once is not read again; a later tick only reads new keys"""
+    async def run():
+        batch = BatchRecorder()
+        loader = DataLoader(batch)
+        await loader.load_many(["a", "b"])
+        rows = await loader.load_many(["b", "c"])
+        return batch, rows
+
+    batch, rows = asyncio.run(run())
+    assert batch.calls == [["a", "b"], ["c"]]
+    assert rows == [ROWS["b"], ROWS["c"]]
+
+
+def test_large_batches_split():
+    """More keys than max_batch_size are split across calls"""
+    async def run():
+        batch = BatchRecorder()
+        loader = DataLoader(batch, max_batch_size=3)
+        rows = await loader.load_many(list("abcdefgh"))
+        return batch, rows
+
+    batch, rows = asyncio.run(run())
+    assert batch.calls == [["a", "b", "c"], ["d", "e", "f"], ["g", "h"]]
+    assert rows == [ROWS[key] for key in "abcdefgh"]
+
+
+def test_prime_and_clear():
+    """Primed keys are not read; cleared keys are read again"""
+    async def run():
+        batch = BatchRecorder()
+        loader = DataLoader(batch)
+        loader.prime("a", {"key": "a", "primed": True})
+        primed = await loader.load("a")
+        await loader.load("b")
+        loader.clear("b")
+        await loader.load("b")
+        loader.clear()
+        await loader.load("a")
+        return batch, primed
+
+    batch, primed = asyncio.run(run())
+    assert primed == {"key": "a", "primed": True}
+    assert batch.calls == [["b"], ["b"], ["a"]]
+
+
+def test_failures_reach_every_waiter():
+    """A failed batch raises in each waiting load and is not cached"""
+    async def run():
+        batch = BatchRecorder(fail=True)
+        loader = DataLoader(batch)
+        results = await asyncio.gather(loader.load("a"), loader.load("b"), return_exceptions=True)
+        batch.fail = False
+        retried = await loader.load("a")
+        return batch, results, retried
+
+    batch, results, retried = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results), results
+    assert retried == ROWS["a"]
+    assert batch.calls == [["a", "b"], ["a"]]
+
+
+def test_custom_runner():
+    """Batch calls go through run when one is given"""
+    used = []
+
+    async def run_inline(fn, *args):
+        used.append(fn)
+        return fn(*args)
+
+    async def run():
+        batch = BatchRecorder()
+        loader = DataLoader(batch, run=run_inline)
+        return await loader.load("a")
+
+    assert asyncio.run(run()) == ROWS["a"]
+    assert len(used) == 1
+
+
+def test_accounts_and_positions_fan_out():
+    """Loading N accounts and their positions takes one query each, not one per account"""
+    ids = [f"00000000-0000-0000-0000-00000000000{n}" for n in (1, 2, 3)]
+
+    def handler(operation, kwargs):
+        if "FROM accounts" in kwargs.get("sql", ""):
+            return result([{"id": id, "account_name": f"Account {id[-1]}"} for id in ids])
+        if "FROM positions" in kwargs.get("sql", ""):
+            return result([{"account_id": ids[0], "symbol": "BND"}, {"account_id": ids[0], "symbol": "SPY"},
+                           {"account_id": ids[2], "symbol": "VTI"}])
+        return None
+
+    async def run():
+        loaders = Loaders(db)
+        return await asyncio.gather(loaders.accounts.load_many(ids), loaders.positions.load_many(ids))
+
+    db, fake = fake_database(handler)
+    accounts, positions = asyncio.run(run())
+    assert [account["account_name"] for account in accounts] == ["Account 1", "Account 2", "Account 3"]
+    assert [[p["symbol"] for p in rows] for rows in positions] == [["BND", "SPY"], [], ["VTI"]]
+
+    statements = fake.statements()
+    assert len(statements) == 2
+    for _, kwargs in fake.calls:
+        assert kwargs["parameters"][0]["value"] == {"stringValue": ",".join(ids)}
+
+
+if __name__ == "__main__":
+    run_checks("Testing DataLoader", globals())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test the migration runner's SQL splitting and discovery
+Runs without a database: uv run test_migrations.py
+"""
+
+
+from checks import run_checks
+from run_migrations import MIGRATIONS_DIR, discover_migrations, split_statements
+
+
+def test_splits_on_semicolons():
+    """Plain statements split on ';', with blank and comment-only parts dropped"""
+    sql = """
+        -- leading comment
+        CREATE TABLE a (id INT);
+        /* block; comment */
+        INSERT INTO a VALUES (1);;
+        SELECT 1
+    """
+    assert split_statements(sql) == [
+        "CREATE TABLE a (id INT)",
+        "INSERT INTO a VALUES (1)",
+        "SELECT 1",
+    ]
+
+
+def test_keeps_quoted_semicolons():
+    """Semicolons and comment markers inside string literals do not split"""
+    sql = "INSERT INTO a VALUES ('x; -- y', 'it''s; fine', \"col;name\"); SELECT 2;"
+    assert split_statements(sql) == [
+        "INSERT INTO a VALUES ('x; -- y', 'it''s; fine', \"col;name\")",
+        "SELECT 2",
+    ]
+
+
+def test_keeps_dollar_quoted_bodies():
+    """A function body between $$ (or $tag$) quotes stays one statement"""
+    sql = """
+        CREATE FUNCTION f() RETURNS void AS $$
+        BEGIN
+            PERFORM 1; -- inner comment;
+            RAISE NOTICE 'a;b';
+        END;
+        $$ LANGUAGE plpgsql;
+        CREATE FUNCTION g() RETURNS text AS $body$ SELECT 'x;$$;y' $body$ LANGUAGE sql;
+        SELECT f();
+    """
+    statements = split_statements(sql)
+    assert len(statements) == 3, statements
+    assert statements[0].startswith("CREATE FUNCTION f()")
+    assert statements[0].endswith("$$ LANGUAGE plpgsql")
+    assert "RAISE NOTICE 'a;b';" in statements[0]
+    assert statements[1].endswith("$body$ LANGUAGE sql")
+    assert statements[2] == "SELECT f()"
+
+
+def test_trigger_migrations():
+    """003 and 007 split into whole CREATE FUNCTION/TRIGGER statements"""
+    expected = {
+        "003_account_valuations.sql": [
+            "CREATE TABLE IF NOT EXISTS account_valuations",
+            "CREATE INDEX IF NOT EXISTS idx_account_valuations_user",
+            "CREATE OR REPLACE FUNCTION refresh_account_valuations",
+            "CREATE OR REPLACE FUNCTION refresh_valuations_for_positions",
+            "CREATE TRIGGER refresh_valuations_positions_insert",
+            "CREATE TRIGGER refresh_valuations_positions_update",
+            "CREATE TRIGGER refresh_valuations_positions_delete",
+            "CREATE OR REPLACE FUNCTION refresh_valuations_for_account",
+            "CREATE TRIGGER refresh_valuations_accounts",
+            "CREATE OR REPLACE FUNCTION refresh_valuations_for_prices",
+            "CREATE TRIGGER refresh_valuations_instruments",
+            "CREATE OR REPLACE VIEW user_valuations",
+            "SELECT refresh_account_valuations",
+        ],
+        "007_job_events.sql": [
+            "CREATE OR REPLACE FUNCTION notify_job_status",
+            "CREATE OR REPLACE FUNCTION notify_job_result",
+            "CREATE TRIGGER notify_job_status",
+            "CREATE TRIGGER notify_job_result",
+        ],
+    }
+    for name, prefixes in expected.items():
+        statements = split_statements((MIGRATIONS_DIR / name).read_text())
+        assert len(statements) == len(prefixes), f"{name}: {len(statements)} statements"
+        for statement, prefix in zip(statements, prefixes):
+            assert statement.startswith(prefix), f"{name}: {statement[:60]!r}"
+            if "FUNCTION" in prefix:
+                # The whole body, through its closing quote and language
+                assert statement.endswith("$$ LANGUAGE plpgsql"), f"{name}: {statement[-60:]!r}"
+
+
+def test_every_migration_splits():
+    """Every migration file yields statements, none of them empty or comment-only"""
+    migrations = discover_migrations()
+    assert migrations, f"No migrations found in {MIGRATIONS_DIR}"
+    versions = [version for version, _, _ in migrations]
+    assert versions == sorted(versions)
+    for _, _, path in migrations:
+        statements = split_statements(path.read_text())
+        assert statements, f"{path.name} has no statements"
+        for statement in statements:
+            assert not statement.startswith("--"), f"{path.name}: {statement[:60]!r}"
+            # An unbalanced $$ would swallow the rest of the file into one statement
+            assert statement.count("$$") % 2 == 0, f"{path.name}: {statement[:60]!r}"
+
+
+if __name__ == "__main__":
+    run_checks("Testing migration runner", globals())
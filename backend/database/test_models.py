@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Test the model layer's query building and result shaping
+Runs without AWS or a database: uv run test_models.py
+"""
+
+import json
+from datetime import date
+
+from checks import fake_database, require, result, run_checks
+from src.schemas import InstrumentCreate
+
+PORTFOLIO_TYPES = {
+    "target_retirement_income": "numeric", "cash_balance": "numeric", "cash_interest": "numeric",
+    "account_value": "numeric", "quantity": "numeric", "current_price": "numeric",
+    "allocation_regions": "jsonb", "allocation_sectors": "jsonb", "allocation_asset_class": "jsonb",
+}
+
+
+def portfolio_row(account_id=None, symbol=None, **values):
+    """One row of load_portfolio's joined query"""
+    row = {
+        "years_until_retirement": 20, "target_retirement_income": "80000",
+        "account_id": account_id, "account_name": None, "account_purpose": None,
+        "cash_balance": None, "cash_interest": None, "account_value": None,
+        "position_id": None, "symbol": symbol, "quantity": None,
+        "name": None, "instrument_type": None, "current_price": None,
+        "allocation_regions": None, "allocation_sectors": None, "allocation_asset_class": None,
+    }
+    row.update(values)
+    return row
+
+
+def test_load_portfolio_nests_one_query():
+    """load_portfolio builds accounts, positions and instruments from one joined query"""
+    db, fake = fake_database()
+    isa = dict(account_name="ISA", account_purpose="Long term", cash_balance="100", cash_interest="0.01",
+               account_value="1000.50")
+    fake.respond(result([
+        portfolio_row("a1", "BND", position_id="p1", quantity="5", name="Bond", instrument_type="etf",
+                      current_price="72", allocation_regions='{"us": 100}', **isa),
+        portfolio_row("a1", "SPY", position_id="p2", quantity="2.5", name="S&P", instrument_type="etf",
+                      current_price=None, **isa),
+        portfolio_row("a2", None, account_name="Empty", cash_balance="0", account_value="0"),
+    ], types=PORTFOLIO_TYPES))
+
+    portfolio = db.load_portfolio("user_1")
+    assert len(fake.statements()) == 1
+    assert portfolio["user_id"] == "user_1"
+    assert portfolio["target_retirement_income"] == 80000.0
+    assert portfolio["total_value"] == 1000.5
+
+    isa, empty = portfolio["accounts"]
+    assert (isa["id"], isa["cash_balance"], isa["total_value"]) == ("a1", 100.0, 1000.5)
+    assert [p["symbol"] for p in isa["positions"]] == ["BND", "SPY"]
+    bnd, spy = isa["positions"]
+    assert bnd["quantity"] == 5.0 and bnd["instrument"]["allocation_regions"] == {"us": 100}
+    # Missing allocations and prices come back as empty dicts and None
+    assert spy["instrument"]["current_price"] is None and spy["instrument"]["allocation_sectors"] == {}
+    assert empty["positions"] == [] and empty["name"] == "Empty"
+
+
+def test_load_portfolio_without_accounts():
+    """A user with no accounts gets an empty portfolio; an unknown user gets None"""
+    db, fake = fake_database()
+    fake.respond(result([portfolio_row()], types=PORTFOLIO_TYPES), result([], types=PORTFOLIO_TYPES))
+
+    portfolio = db.load_portfolio("user_1")
+    assert portfolio["accounts"] == [] and portfolio["total_value"] == 0.0
+    assert db.load_portfolio("nobody") is None
+
+
+def instrument(symbol, **values):
+    """A valid InstrumentCreate for symbol"""
+    fields = dict(symbol=symbol, name=f"{symbol} ETF", instrument_type="etf",
+                  allocation_regions={"north_america": 100}, allocation_sectors={"technology": 100},
+                  allocation_asset_class={"equity": 100})
+    fields.update(values)
+    return InstrumentCreate(**fields)
+
+
+def test_bulk_upsert_classifies_rows():
+    """bulk_upsert sends one INSERT ... ON CONFLICT and reports created vs updated from xmax"""
+    db, fake = fake_database()
+    fake.respond(result([{"symbol": "SPY", "inserted": True}, {"symbol": "BND", "inserted": False}]))
+
+    outcome = db.instruments.bulk_upsert([
+        instrument("SPY", current_price=1), instrument("BND"), instrument("SPY", current_price=450),
+    ])
+    assert outcome == {"SPY": "created", "BND": "updated"}
+
+    [sql] = fake.statements()
+    assert sql.startswith("INSERT INTO instruments (symbol, name, instrument_type, current_price,")
+    assert "ON CONFLICT (symbol) DO UPDATE SET" in sql
+    assert "COALESCE(EXCLUDED.current_price, instruments.current_price)" in sql
+    assert sql.endswith("RETURNING symbol, (xmax = 0) AS inserted")
+    # Duplicate symbols collapse to the last entry, since ON CONFLICT cannot touch a row twice
+    params = {p["name"]: p["value"] for p in fake.calls[0][1]["parameters"]}
+    assert params["symbol_0"] == {"stringValue": "SPY"} and "symbol_2" not in params
+    assert params["current_price_0"] == {"stringValue": "450"}
+    assert params["current_price_1"] == {"isNull": True}
+
+
+def test_user_totals():
+    """user_totals reads the user_valuations view and fills zeros for a user without accounts"""
+    db, fake = fake_database()
+    fake.respond(
+        result([{"clerk_user_id": "user_1", "cash_balance": "100", "positions_value": "900.5",
+                 "total_value": "1000.5", "num_accounts": 2, "num_positions": 3,
+                 "unpriced_positions": 1, "updated_at": "2025-01-02 03:04:05"}],
+               types={"cash_balance": "numeric", "positions_value": "numeric", "total_value": "numeric"}),
+        result([]),
+    )
+
+    totals = db.valuations.user_totals("user_1")
+    assert (totals["total_value"], totals["num_accounts"], totals["unpriced_positions"]) == (1000.5, 2, 1)
+    assert fake.statements()[0] == "SELECT * FROM user_valuations WHERE clerk_user_id = :user_id"
+
+    empty = db.valuations.user_totals("nobody")
+    assert empty["total_value"] == 0.0 and empty["num_positions"] == 0 and empty["updated_at"] is None
+
+
+def test_refresh_valuations():
+    """refresh recomputes the given accounts in one call, or every account"""
+    db, fake = fake_database()
+    db.valuations.refresh(["a1", "a2"])
+    db.valuations.refresh()
+
+    given, every = fake.statements()
+    assert given == "SELECT refresh_account_valuations(string_to_array(:account_ids, ',')::uuid[])"
+    assert fake.calls[0][1]["parameters"] == [{"name": "account_ids", "value": {"stringValue": "a1,a2"}}]
+    assert every == "SELECT refresh_account_valuations(ARRAY(SELECT id FROM accounts))"
+
+
+def test_allocations_by_symbol():
+    """find_by_symbol nests an instrument's allocation rows by dimension"""
+    db, fake = fake_database()
+    fake.respond(result([
+        {"dimension": "asset_class", "bucket": "equity", "pct": 100.0},
+        {"dimension": "region", "bucket": "europe", "pct": 40.0},
+        {"dimension": "region", "bucket": "north_america", "pct": 60.0},
+    ]))
+    assert db.allocations.find_by_symbol("VT") == {
+        "asset_class": {"equity": 100.0}, "region": {"europe": 40.0, "north_america": 60.0},
+    }
+
+
+def test_user_exposure_sums_in_sql():
+    """user_exposure aggregates in one statement, adds cash and orders buckets largest first"""
+    db, fake = fake_database()
+    fake.respond(result([
+        {"dimension": "asset_class", "bucket": "equity", "value": "600"},
+        {"dimension": "region", "bucket": "europe", "value": "200"},
+        {"dimension": "region", "bucket": "north_america", "value": "400"},
+        {"dimension": "asset_class", "bucket": "cash", "value": "1000"},
+    ], types={"value": "numeric"}))
+
+    exposure = db.allocations.user_exposure("user_1")
+    assert exposure == {"asset_class": {"cash": 1000.0, "equity": 600.0},
+                        "region": {"north_america": 400.0, "europe": 200.0}}
+    assert list(exposure["region"]) == ["north_america", "europe"]
+    [sql] = fake.statements()
+    assert "GROUP BY ia.dimension, ia.bucket" in sql and "UNION ALL" in sql
+
+
+def test_user_exposure_one_dimension():
+    """Asking for one dimension filters in SQL; cash only joins the asset_class dimension"""
+    db, fake = fake_database()
+    db.allocations.user_exposure("user_1", dimension="sector")
+    [sql] = fake.statements()
+    assert "AND ia.dimension = :dimension" in sql and "UNION ALL" not in sql
+    assert {"name": "dimension", "value": {"stringValue": "sector"}} in fake.calls[0][1]["parameters"]
+
+    try:
+        db.allocations.user_exposure("user_1", dimension="currency")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError for an unknown dimension")
+
+
+def test_load_day_in_one_transaction():
+    """load_day ensures the month partition, then upserts each chunk, in one transaction"""
+    db, fake = fake_database()
+    closes = {"SPY": 450.5, "BND": 72.0, "QQQ": 380.25, "NAN": float("nan"), "GONE": None, "A,B": 1.0}
+
+    assert db.price_history.load_day(date(2025, 1, 2), closes, chunk_size=2) == 3
+    assert fake.operations() == ["begin_transaction"] + ["execute_statement"] * 3 + ["commit_transaction"]
+    partition, *inserts = fake.statements()
+    assert partition == "SELECT ensure_price_history_partition(:day::date)"
+    assert all("ON CONFLICT (symbol, date) DO UPDATE" in sql for sql in inserts)
+    chunks = [{p["name"]: p["value"]["stringValue"] for p in kwargs["parameters"]}
+              for _, kwargs in fake.calls[2:4]]
+    assert chunks == [{"day": "2025-01-02", "symbols": "BND,QQQ", "closes": "72.0,380.25"},
+                      {"day": "2025-01-02", "symbols": "SPY", "closes": "450.5"}]
+    assert all(kwargs["transactionId"] == "tx-1" for _, kwargs in fake.calls[1:4])
+
+
+def test_load_day_skips_empty_days():
+    """A day with no usable closes writes nothing"""
+    db, fake = fake_database()
+    assert db.price_history.load_day(date(2025, 1, 2), {"SPY": None}) == 0
+    assert fake.calls == []
+
+
+def test_get_range_as_arrays():
+    """get_range returns each symbol's closes as date and float64 arrays, oldest first"""
+    require("numpy")
+    import numpy as np
+
+    db, fake = fake_database()
+    rows = [{"symbol": "BND", "date": "2025-01-02", "close": 72.0},
+            {"symbol": "SPY", "date": "2025-01-02", "close": 450.5},
+            {"symbol": "SPY", "date": "2025-01-03", "close": 451.0}]
+    fake.respond({"columnMetadata": [{"name": "symbol", "typeName": "varchar"},
+                                     {"name": "date", "typeName": "date"},
+                                     {"name": "close", "typeName": "float8"}],
+                  "formattedRecords": json.dumps(rows)})
+
+    series = db.price_history.get_range(["SPY", "BND"], date(2025, 1, 1), date(2025, 1, 31))
+    assert sorted(series) == ["BND", "SPY"]
+    assert series["SPY"]["dates"].dtype == np.dtype("datetime64[D]")
+    assert series["SPY"]["close"].tolist() == [450.5, 451.0]
+    assert str(series["SPY"]["dates"][-1]) == "2025-01-03"
+
+
+def test_instruments_version_without_count():
+    """Instruments.version is the delete counter and newest updated_at, read without COUNT(*)"""
+    db, fake = fake_database()
+    fake.respond(result([{"deletes": 3, "updated_at": "2025-01-02 03:04:05"}]))
+    assert db.instruments.version() == "3:2025-01-02 03:04:05"
+    [sql] = fake.statements()
+    assert "COUNT" not in sql.upper()
+    assert "(SELECT deletes FROM instruments_version)" in sql and "(SELECT MAX(updated_at) FROM instruments)" in sql
+
+
+if __name__ == "__main__":
+    run_checks("Testing models", globals())
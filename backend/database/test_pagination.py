@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test keyset pagination in DataAPIClient
+Runs without a database, against an in-memory table: uv run test_pagination.py
+"""
+
+import threading
+
+from botocore.exceptions import ClientError
+
+from checks import client_error, run_checks
+from src.client import DataAPIClient
+
+
+class InMemoryClient(DataAPIClient):
+    """DataAPIClient whose query() serves keyset pages from a list of rows
+
+    Pages of more than max_rows rows fail like a Data API response over its
+    size limit, so the page-size halving in _fetch_page can be exercised.
+    """
+
+    def __init__(self, rows, max_rows=None):
+        self._local = threading.local()
+        self.rows = sorted(rows, key=lambda row: row["id"])
+        self.max_rows = max_rows
+        self.limits = []
+
+    def query(self, sql, parameters=None, format_json=False):
+        values = {param["name"]: next(iter(param["value"].values())) for param in parameters or []}
+        limit = values["_limit"]
+        self.limits.append(limit)
+        if self.max_rows is not None and limit > self.max_rows:
+            raise client_error("BadRequestException",
+                               "Database returned more than the allowed response size limit")
+
+        descending = " DESC" in sql
+        rows = self.rows[::-1] if descending else self.rows
+        if "_after_0" in values:
+            after = values["_after_0"]
+            rows = [row for row in rows if (row["id"] < after if descending else row["id"] > after)]
+        return [dict(row) for row in rows[:limit]]
+
+
+ROWS = [{"id": i, "name": f"row {i}"} for i in range(1, 26)]
+
+
+def test_pages_follow_the_cursor():
+    """paginate returns page_size rows and a cursor until the last page"""
+    client = InMemoryClient(ROWS)
+    rows, cursor = client.paginate("SELECT * FROM t", ["id"], page_size=10)
+    assert [row["id"] for row in rows] == list(range(1, 11))
+    assert cursor == [10]
+
+    rows, cursor = client.paginate("SELECT * FROM t", ["id"], page_size=10, after=[20])
+    assert [row["id"] for row in rows] == list(range(21, 26))
+    assert cursor is None
+
+    # One extra row is asked for to learn whether another page exists
+    assert client.limits == [11, 11]
+
+
+def test_descending_pages():
+    """descending=True walks the keys from the top"""
+    client = InMemoryClient(ROWS)
+    rows, cursor = client.paginate("SELECT * FROM t", ["id"], page_size=3, descending=True)
+    assert [row["id"] for row in rows] == [25, 24, 23]
+    rows, _ = client.paginate("SELECT * FROM t", ["id"], page_size=3, after=cursor, descending=True)
+    assert [row["id"] for row in rows] == [22, 21, 20]
+
+
+def test_oversize_page_halves():
+    """A page over the response size limit is retried at half the size"""
+    client = InMemoryClient(ROWS, max_rows=4)
+    rows, cursor = client.paginate("SELECT * FROM t", ["id"], page_size=16)
+    # 17 -> 9 -> 5 fail, 3 (page of 2 plus the probe row) fits
+    assert client.limits == [17, 9, 5, 3]
+    assert [row["id"] for row in rows] == [1, 2]
+    assert cursor == [2]
+
+
+def test_iter_query_keeps_the_smaller_page():
+    """iter_query reads every row once and stays at the page size that fit"""
+    client = InMemoryClient(ROWS, max_rows=6)
+    rows = list(client.iter_query("SELECT * FROM t", ["id"], page_size=20))
+    assert [row["id"] for row in rows] == [row["id"] for row in ROWS]
+    assert client.limits[:3] == [21, 11, 6]
+    assert set(client.limits[3:]) == {6}
+
+
+def test_other_errors_are_raised():
+    """Errors other than an oversize response are not retried"""
+    class FailingClient(InMemoryClient):
+        def query(self, sql, parameters=None, format_json=False):
+            self.limits.append(None)
+            raise client_error("BadRequestException", "syntax error")
+
+    client = FailingClient(ROWS)
+    try:
+        client.paginate("SELECT * FROM t", ["id"], page_size=8)
+    except ClientError:
+        pass
+    else:
+        raise AssertionError("expected ClientError")
+    assert client.limits == [None]
+
+
+def test_single_row_page_is_not_halved():
+    """A single row over the limit raises instead of looping"""
+    client = InMemoryClient(ROWS, max_rows=1)
+    try:
+        client.paginate("SELECT * FROM t", ["id"], page_size=4)
+    except ClientError:
+        pass
+    else:
+        raise AssertionError("expected ClientError")
+    assert client.limits == [5, 3, 2]
+
+
+if __name__ == "__main__":
+    run_checks("Testing keyset pagination", globals())
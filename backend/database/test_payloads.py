@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test PayloadStore's compress and offload thresholds
+Runs without AWS, offloading to a temporary directory: uv run test_payloads.py
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+from checks import run_checks
+from src.payloads import PAYLOAD_MARKER, PayloadStore
+
+
+def document(size: int) -> dict:
+    """A JSON document that serializes (compactly) to exactly size bytes"""
+    overhead = len(json.dumps({"text": ""}, separators=(",", ":")))
+    return {"text": "x" * (size - overhead)}
+
+
+def test_small_payloads_pass_through():
+    """Documents at or under the compress threshold are stored as they are"""
+    store = PayloadStore(compress_threshold=100, offload_threshold=1000)
+    payload = document(100)
+    assert store.pack("jobs/1/report", payload) is payload
+    assert store.pack("jobs/1/report", None) is None
+    assert store.unpack(payload) is payload
+    assert not store.is_packed(payload)
+
+
+def test_compressed_inline():
+    """Above the compress threshold documents are gzipped inline"""
+    store = PayloadStore(compress_threshold=100, offload_threshold=1000)
+    payload = document(101)
+    packed = store.pack("jobs/1/report", payload)
+    assert store.is_packed(packed)
+    assert packed[PAYLOAD_MARKER]["store"] == "inline"
+    assert packed[PAYLOAD_MARKER]["size"] == 101
+    assert store.unpack(packed) == payload
+
+
+def test_inline_without_blob_store():
+    """Above the offload threshold documents stay inline when no blob store is set"""
+    store = PayloadStore(compress_threshold=100, offload_threshold=1000)
+    store.bucket = store.directory = None
+    packed = store.pack("jobs/1/report", document(5000))
+    assert packed[PAYLOAD_MARKER]["store"] == "inline"
+    assert store.unpack(packed) == document(5000)
+
+
+def test_offloaded_to_directory():
+    """Above the offload threshold documents go to the blob store, content-addressed"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = PayloadStore(directory=directory, compress_threshold=100, offload_threshold=1000)
+        store.bucket = None
+
+        # At the threshold it is still inline
+        assert store.pack("jobs/1/report", document(1000))[PAYLOAD_MARKER]["store"] == "inline"
+
+        payload = document(1001)
+        packed = store.pack("jobs/1/report", payload)
+        pointer = packed[PAYLOAD_MARKER]
+        assert pointer["store"] == "local"
+        assert pointer["key"].startswith("jobs/1/report-") and pointer["key"].endswith(".json.gz")
+        assert (Path(directory) / pointer["key"]).exists()
+        assert "data" not in pointer
+        assert store.unpack(packed) == payload
+
+        # The same document packs to the same key
+        assert store.pack("jobs/1/report", payload) == packed
+
+
+def test_unpack_needs_the_store():
+    """Unpacking an offloaded payload without its store configured fails clearly"""
+    with tempfile.TemporaryDirectory() as directory:
+        writer = PayloadStore(directory=directory, compress_threshold=10, offload_threshold=10)
+        writer.bucket = None
+        packed = writer.pack("jobs/1/charts", document(100))
+
+    reader = PayloadStore(compress_threshold=10, offload_threshold=10)
+    reader.bucket = reader.directory = None
+    try:
+        reader.unpack(packed)
+    except ValueError as e:
+        assert "PAYLOAD_DIR" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+
+
+if __name__ == "__main__":
+    run_checks("Testing payload store", globals())
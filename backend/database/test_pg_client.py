@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Test PostgresClient's translation layer and pooled transactions
+Runs without a database, against a fake pool: uv run --extra postgres test_pg_client.py
+"""
+
+import threading
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from checks import require, run_checks
+from src.pg_client import PostgresClient
+
+
+class FakeCursor:
+    """Cursor returning canned rows and recording what it executed"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.description = None
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql, params):
+        self.conn.executed.append((sql, params))
+        if self.conn.rows is not None:
+            self.description = [type("Column", (), {"name": name})() for name in self.conn.columns]
+            self.rowcount = len(self.conn.rows)
+        else:
+            self.rowcount = 1
+
+    def executemany(self, sql, param_sets):
+        self.conn.executed.extend((sql, params) for params in param_sets)
+
+    def fetchall(self):
+        return self.conn.rows
+
+
+class FakeConnection:
+    """Connection that records commits, rollbacks and closes"""
+
+    def __init__(self, rows=None, columns=(), rollback_error=None):
+        self.rows = rows
+        self.columns = columns
+        self.rollback_error = rollback_error
+        self.executed = []
+        self.events = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.events.append("commit")
+
+    def rollback(self):
+        self.events.append("rollback")
+        if self.rollback_error:
+            raise self.rollback_error
+
+    def close(self):
+        self.events.append("close")
+
+
+class FakePool:
+    """Pool handing out one FakeConnection"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.returned = []
+
+    def getconn(self):
+        return self.conn
+
+    def putconn(self, conn):
+        self.returned.append(conn)
+
+    def connection(self):
+        pool = self
+
+        class Checkout:
+            def __enter__(self):
+                return pool.conn
+
+            def __exit__(self, *exc_info):
+                pool.returned.append(pool.conn)
+                return False
+
+        return Checkout()
+
+
+def pg_client(conn):
+    """A PostgresClient over a FakePool, without connecting anywhere"""
+    client = PostgresClient.__new__(PostgresClient)
+    client.pool = FakePool(conn)
+    client._local = threading.local()
+    client._transactions = {}
+    return client
+
+
+def test_named_parameters_translate():
+    """:name placeholders become %(name)s, leaving casts and literal % alone"""
+    client = pg_client(FakeConnection())
+    sql = "SELECT * FROM t WHERE a = :a::uuid AND b LIKE '5%' AND c = ANY(string_to_array(:c, ','))"
+    assert client._convert_sql(sql) == (
+        "SELECT * FROM t WHERE a = %(a)s::uuid AND b LIKE '5%%' AND c = ANY(string_to_array(%(c)s, ','))"
+    )
+    assert client._convert_parameters([
+        {"name": "a", "value": {"stringValue": "x"}},
+        {"name": "n", "value": {"isNull": True}},
+        {"name": "f", "value": {"doubleValue": 1.5}},
+    ]) == {"a": "x", "n": None, "f": 1.5}
+
+
+def test_query_matches_data_api_shapes():
+    """query returns numerics as floats and uuids/dates as strings, like the Data API"""
+    row_id = uuid.uuid4()
+    conn = FakeConnection(
+        rows=[(row_id, Decimal("10.50"), date(2025, 1, 2), datetime(2025, 1, 2, 3, 4), {"us": 1})],
+        columns=("id", "quantity", "as_of", "updated_at", "regions"),
+    )
+    client = pg_client(conn)
+    [row] = client.query("SELECT * FROM positions WHERE id = :id",
+                         [{"name": "id", "value": {"stringValue": str(row_id)}}])
+    assert row == {"id": str(row_id), "quantity": 10.5, "as_of": "2025-01-02",
+                   "updated_at": "2025-01-02 03:04:00", "regions": {"us": 1}}
+    assert conn.executed == [("SELECT * FROM positions WHERE id = %(id)s", {"id": str(row_id)})]
+    assert client.pool.returned == [conn]
+
+
+def test_transaction_holds_one_connection():
+    """Statements in a transaction share its connection, which is returned after commit"""
+    conn = FakeConnection()
+    client = pg_client(conn)
+    with client.transaction():
+        client.execute("UPDATE t SET a = 1")
+        client.execute("UPDATE t SET b = 2")
+        assert client.pool.returned == []
+    assert conn.events == ["commit"]
+    assert client.pool.returned == [conn]
+    assert client._transactions == {}
+
+
+def test_failed_rollback_discards_the_connection():
+    """A connection whose rollback fails is closed before it goes back to the pool"""
+    require("psycopg")
+    import psycopg
+
+    conn = FakeConnection(rollback_error=psycopg.OperationalError("server closed the connection"))
+    client = pg_client(conn)
+    try:
+        with client.transaction():
+            raise ValueError("statement failed")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected the block's ValueError")
+    assert conn.events == ["rollback", "close"]
+    assert client.pool.returned == [conn]
+    assert client.transaction_id is None
+
+
+if __name__ == "__main__":
+    run_checks("Testing PostgreSQL client", globals())
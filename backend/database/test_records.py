@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test the slotted row records
+Runs without AWS or a database: uv run test_records.py
+"""
+
+from checks import fake_database, result, run_checks
+from src.records import Instrument, Position
+
+
+def test_records_are_slotted():
+    """Records keep their fields in slots, with no per-instance __dict__"""
+    instrument = Instrument.from_row({"symbol": "SPY", "name": "S&P", "extra": 1})
+    assert not hasattr(instrument, "__dict__")
+    assert (instrument.symbol, instrument.current_price) == ("SPY", None)
+    try:
+        instrument.colour = "red"
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("expected AttributeError for an unknown field")
+
+
+def test_select_list_round_trips():
+    """select_list aliases columns with a prefix that from_row reads back"""
+    assert Instrument.select_list("i", "i_").startswith("i.symbol AS i_symbol, i.name AS i_name,")
+    assert "instrument" not in Position.select_list("p")
+
+    row = {"i_symbol": "BND", "i_name": "Bond", "i_current_price": 72.0}
+    assert Instrument.from_row(row, "i_").to_json()["current_price"] == 72.0
+
+
+def test_positions_with_instruments():
+    """find_records_by_account joins each position to its Instrument in one query"""
+    db, fake = fake_database()
+    fake.respond(result([{
+        "id": "p1", "account_id": "a1", "symbol": "SPY", "quantity": "2.5", "as_of_date": "2025-01-02",
+        "created_at": None, "updated_at": None, "i_symbol": "SPY", "i_name": "S&P",
+        "i_instrument_type": "etf", "i_current_price": "450", "i_allocation_regions": '{"us": 100}',
+        "i_allocation_sectors": None, "i_allocation_asset_class": None,
+        "i_created_at": None, "i_updated_at": None,
+    }], types={"quantity": "numeric", "i_current_price": "numeric", "i_allocation_regions": "jsonb"}))
+
+    [position] = db.positions.find_records_by_account("a1")
+    assert len(fake.statements()) == 1
+    assert isinstance(position.instrument, Instrument)
+    data = position.to_json()
+    assert (data["quantity"], data["current_price"], data["instrument_name"]) == (2.5, 450.0, "S&P")
+    assert data["instrument"]["allocation_regions"] == {"us": 100}
+
+
+if __name__ == "__main__":
+    run_checks("Testing row records", globals())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Test InstrumentIndex ranking and incremental refresh
+Runs without a database, against an in-memory instruments table: uv run test_search.py
+"""
+
+import threading
+
+from checks import run_checks
+from src.search import InstrumentIndex
+
+ROWS = [
+    {"symbol": "SPY", "name": "SPDR S&P 500 ETF Trust", "instrument_type": "etf", "current_price": 450.0},
+    {"symbol": "SPYG", "name": "SPDR Portfolio S&P 500 Growth ETF", "instrument_type": "etf", "current_price": 80.0},
+    {"symbol": "VTI", "name": "Vanguard Total Stock Market ETF", "instrument_type": "etf", "current_price": 250.0},
+    {"symbol": "BND", "name": "Vanguard Total Bond Market ETF", "instrument_type": "etf", "current_price": 72.0},
+    {"symbol": "TLT", "name": "iShares 20+ Year Treasury Bond ETF", "instrument_type": "etf", "current_price": None},
+]
+
+
+class InMemoryInstruments:
+    """The parts of the Instruments model InstrumentIndex reads, over a list of rows"""
+
+    def __init__(self, rows):
+        self.rows = {}
+        self.clock = 0
+        self.deletes = 0
+        self.reads = []
+        for row in rows:
+            self.upsert(row)
+
+    def upsert(self, row, updated_at=None):
+        self.clock += 1
+        self.rows[row["symbol"]] = dict(row, updated_at=f"{updated_at or self.clock:06d}")
+
+    def delete(self, symbol):
+        del self.rows[symbol]
+        self.deletes += 1
+
+    def version(self):
+        return f"{self.deletes}:{max((r['updated_at'] for r in self.rows.values()), default=None)}"
+
+    def find_all(self):
+        self.reads.append("all")
+        return [dict(row) for row in self.rows.values()]
+
+    def find_updated_since(self, since, overlap_seconds=0):
+        self.reads.append("since")
+        start = f"{int(since) - int(overlap_seconds):06d}"
+        return [dict(row) for row in self.rows.values() if row["updated_at"] >= start]
+
+
+def symbols(results):
+    return [row["symbol"] for row in results]
+
+
+def built_index(**kwargs):
+    index = InstrumentIndex(refresh_seconds=0, **kwargs)
+    index.refresh(InMemoryInstruments(ROWS))
+    return index
+
+
+def test_ranking():
+    """Exact symbol, then symbol prefix, then name word prefix, then substring"""
+    index = built_index()
+    assert symbols(index.search("spy")) == ["SPY", "SPYG"]
+    assert symbols(index.search("SPY ")) == ["SPY", "SPYG"]
+    assert symbols(index.search("vanguard")) == ["BND", "VTI"]
+    assert symbols(index.search("bond")) == ["BND", "TLT"]
+    # 'easury' starts no word, so it matches as a substring
+    assert symbols(index.search("easury")) == ["TLT"]
+    assert index.search("") == [] and index.search("   ") == []
+
+
+def test_fuzzy_matches():
+    """Near misses match on shared trigrams, below every exact hit"""
+    index = built_index()
+    assert symbols(index.search("vangard")) == ["BND", "VTI"]
+    assert index.search("qqqqq") == []
+
+
+def test_limit_and_entries():
+    """Results respect limit and carry the display fields"""
+    index = built_index()
+    assert len(index.search("etf", limit=2)) == 2
+    [spy] = index.search("spy", limit=1)
+    assert spy == {"symbol": "SPY", "name": "SPDR S&P 500 ETF Trust", "instrument_type": "etf", "current_price": 450.0}
+    assert index.search("tlt")[0]["current_price"] is None
+
+
+def test_incremental_refresh():
+    """Changed rows are re-read and replace their old entries"""
+    instruments = InMemoryInstruments(ROWS)
+    index = InstrumentIndex(refresh_seconds=0, overlap_seconds=0)
+    index.refresh(instruments)
+
+    instruments.upsert(dict(ROWS[2], name="Renamed Index Fund"))
+    instruments.upsert({"symbol": "QQQ", "name": "Invesco QQQ Trust", "instrument_type": "etf", "current_price": 400.0})
+    index.refresh(instruments)
+    assert instruments.reads == ["all", "since"]
+    assert len(index) == 6
+    assert symbols(index.search("renamed")) == ["VTI"]
+    assert "VTI" not in symbols(index.search("stock"))
+    assert symbols(index.search("invesco")) == ["QQQ"]
+
+
+def test_deletes_rebuild():
+    """A moved delete counter triggers a full reload"""
+    instruments = InMemoryInstruments(ROWS)
+    index = InstrumentIndex(refresh_seconds=0, overlap_seconds=0)
+    index.refresh(instruments)
+
+    instruments.delete("TLT")
+    instruments.upsert(dict(ROWS[0], name="SPDR S&P 500"))
+    index.refresh(instruments)
+    assert instruments.reads == ["all", "all"]
+    assert len(index) == 4 and index.search("tlt") == []
+
+
+def test_late_commit_is_picked_up():
+    """A write stamped before the last read but committed after it is not missed"""
+    instruments = InMemoryInstruments(ROWS)
+    index = InstrumentIndex(refresh_seconds=0, overlap_seconds=5)
+    index.refresh(instruments)
+
+    # BND is stamped 10 but commits after VTI (stamped 11) has been indexed
+    instruments.upsert(dict(ROWS[2], name="Early Commit Fund"), updated_at=11)
+    index.refresh(instruments)
+    instruments.upsert(dict(ROWS[3], name="Late Commit Fund"), updated_at=10)
+
+    # The version is unchanged, but the overlap has not been re-read yet
+    index.refresh(instruments)
+    assert symbols(index.search("late")) == ["BND"]
+    assert instruments.reads == ["all", "since", "since"]
+
+
+def test_search_does_not_wait_for_refresh():
+    """Searches answer from the current snapshot while a refresh reads"""
+    instruments = InMemoryInstruments(ROWS)
+    index = InstrumentIndex(refresh_seconds=0, overlap_seconds=0)
+    index.refresh(instruments)
+
+    reading, release = threading.Event(), threading.Event()
+
+    class SlowInstruments(InMemoryInstruments):
+        def find_updated_since(self, since, overlap_seconds=0):
+            reading.set()
+            release.wait(5)
+            return super().find_updated_since(since, overlap_seconds)
+
+    slow = SlowInstruments(ROWS)
+    slow.upsert({"symbol": "QQQ", "name": "Invesco QQQ Trust", "instrument_type": "etf", "current_price": 400.0})
+    index.version, index._updated_since = "0:000005", "000005"
+    refresh = threading.Thread(target=index.refresh, args=(slow,))
+    refresh.start()
+    try:
+        assert reading.wait(5)
+        # Mid-refresh: the old snapshot answers, and a second refresh does not queue up
+        assert symbols(index.search("spy")) == ["SPY", "SPYG"]
+        assert index.search("invesco") == []
+        assert index.refresh_if_stale(slow) == 0
+    finally:
+        release.set()
+        refresh.join()
+    assert symbols(index.search("invesco")) == ["QQQ"]
+
+
+def test_background_refresh():
+    """refresh_in_background loads a stale index on a thread, and starts none when fresh or busy"""
+    instruments = InMemoryInstruments(ROWS)
+    index = InstrumentIndex(refresh_seconds=60)
+    assert not index.ready
+
+    thread = index.refresh_in_background(instruments)
+    thread.join(5)
+    assert index.ready and len(index) == 5
+    assert index.refresh_in_background(instruments) is None
+
+    index.refresh_seconds = 0
+    with index._refresh_lock:
+        assert index.refresh_in_background(instruments) is None
+    assert instruments.reads == ["all"]
+
+
+def test_background_refresh_failure_is_logged():
+    """A failed background refresh leaves the index as it was instead of raising"""
+    class Unavailable(InMemoryInstruments):
+        def version(self):
+            raise RuntimeError("database unavailable")
+
+    index = InstrumentIndex(refresh_seconds=0)
+    index.refresh_in_background(Unavailable(ROWS)).join(5)
+    assert not index.ready and len(index) == 0
+
+
+if __name__ == "__main__":
+    run_checks("Testing instrument search index", globals())
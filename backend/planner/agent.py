@@ -85,25 +85,21 @@ def handle_missing_instruments(job_id: str, db) -> None:
         return
 
     user_id = job["clerk_user_id"]
-    accounts = db.accounts.find_by_user(user_id)
+    portfolio = db.load_portfolio(user_id) or {"accounts": []}
 
     missing = []
-    for account in accounts:
-        positions = db.positions.find_by_account(account["id"])
-        for position in positions:
-            instrument = db.instruments.find_by_symbol(position["symbol"])
-            if instrument:
-                has_allocations = bool(
-                    instrument.get("allocation_regions")
-                    and instrument.get("allocation_sectors")
-                    and instrument.get("allocation_asset_class")
+    for account in portfolio["accounts"]:
+        for position in account["positions"]:
+            instrument = position["instrument"]
+            has_allocations = bool(
+                instrument.get("allocation_regions")
+                and instrument.get("allocation_sectors")
+                and instrument.get("allocation_asset_class")
+            )
+            if not has_allocations:
+                missing.append(
+                    {"symbol": position["symbol"], "name": instrument.get("name") or ""}
                 )
-                if not has_allocations:
-                    missing.append(
-                        {"symbol": position["symbol"], "name": instrument.get("name", "")}
-                    )
-            else:
-                missing.append({"symbol": position["symbol"], "name": ""})
 
     if missing:
         logger.info(
@@ -147,35 +143,18 @@ def load_portfolio_summary(job_id: str, db) -> Dict[str, Any]:
         if not user:
             raise ValueError(f"User {user_id} not found")
 
-        accounts = db.accounts.find_by_user(user_id)
-        
-        # Calculate simple summary statistics
-        total_value = 0.0
-        total_positions = 0
-        total_cash = 0.0
-        
-        for account in accounts:
-            total_cash += float(account.get("cash_balance", 0))
-            positions = db.positions.find_by_account(account["id"])
-            total_positions += len(positions)
-            
-            # Add position values
-            for position in positions:
-                instrument = db.instruments.find_by_symbol(position["symbol"])
-                if instrument and instrument.get("current_price"):
-                    price = float(instrument["current_price"])
-                    quantity = float(position["quantity"])
-                    total_value += price * quantity
-        
-        total_value += total_cash
-        
+        # Totals are maintained by the database as positions and prices change
+        totals = db.valuations.user_totals(user_id)
+
         # Return only summary statistics
+        years = user.get("years_until_retirement")
+        income = user.get("target_retirement_income")
         return {
-            "total_value": total_value,
-            "num_accounts": len(accounts),
-            "num_positions": total_positions,
-            "years_until_retirement": user.get("years_until_retirement", 30),
-            "target_retirement_income": float(user.get("target_retirement_income", 80000))
+            "total_value": float(totals["total_value"]),
+            "num_accounts": totals["num_accounts"],
+            "num_positions": totals["num_positions"],
+            "years_until_retirement": years if years is not None else 30,
+            "target_retirement_income": float(income) if income is not None else 80000.0
         }
 
     except Exception as e:
@@ -19,11 +19,11 @@ except ImportError:
     pass
 
 # Import database package
-from src import Database
+from src import Database, track_queries
 
 from templates import ORCHESTRATOR_INSTRUCTIONS
 from agent import create_agent, handle_missing_instruments, load_portfolio_summary
-from market import update_instrument_prices
+from market import update_instrument_prices, record_price_history
 from observability import observe
 
 logger = logging.getLogger()
@@ -31,6 +31,7 @@ logger.setLevel(logging.INFO)
 
 # Initialize database
 db = Database()
+db.warm_up()  # non-blocking; overlaps a paused cluster's resume with cold start
 
 @retry(
     retry=retry_if_exception_type(RateLimitError),
@@ -95,12 +96,23 @@ def lambda_handler(event, context):
             }
         ]
     }
+
+    The daily price history schedule invokes it directly with:
+    {"task": "record_price_history"}
     """
     # Wrap entire handler with observability context
-    with observe():
+    with observe(), track_queries("planner"):
         try:
             logger.info(f"Planner Lambda invoked with event: {json.dumps(event)[:500]}")
 
+            # Scheduled price history load (no job)
+            if event.get('task') == 'record_price_history':
+                count = record_price_history(db)
+                return {
+                    'statusCode': 200,
+                    'body': json.dumps({'success': True, 'closes_stored': count})
+                }
+
             # Extract job_id from SQS message
             if 'Records' in event and len(event['Records']) > 0:
                 # SQS message
@@ -3,12 +3,12 @@ Market data functions using polygon.io for fetching real-time prices.
 """
 
 import logging
+from datetime import datetime
 from typing import Set
-from prices import get_share_price
+from prices import get_share_price, get_grouped_daily_for_prior_date, polygon_api_key, is_paid_polygon
 
 logger = logging.getLogger()
 
-
 def update_instrument_prices(job_id: str, db) -> None:
     """
     Fetch current prices for all instruments in the user's portfolio using polygon.io.
@@ -30,13 +30,12 @@ def update_instrument_prices(job_id: str, db) -> None:
         user_id = job['clerk_user_id']
 
         # Get all unique symbols from user's positions
-        accounts = db.accounts.find_by_user(user_id)
-        symbols = set()
-
-        for account in accounts:
-            positions = db.positions.find_by_account(account['id'])
-            for position in positions:
-                symbols.add(position['symbol'])
+        portfolio = db.load_portfolio(user_id) or {'accounts': []}
+        symbols = {
+            position['symbol']
+            for account in portfolio['accounts']
+            for position in account['positions']
+        }
 
         if not symbols:
             logger.info("Market: No symbols to update prices for")
@@ -83,26 +82,15 @@ def update_prices_for_symbols(symbols: Set[str], db) -> None:
 
     logger.info(f"Market: Retrieved prices for {len(price_map)}/{len(symbols_list)} symbols")
 
-    # Update database with fetched prices
-    for symbol, price in price_map.items():
+    # Update database with fetched prices in one statement
+    if price_map:
         try:
-            instrument = db.instruments.find_by_symbol(symbol)
-            if instrument:
-                update_data = {'current_price': price}
-                success = db.client.update(
-                    'instruments',
-                    update_data,
-                    "symbol = :symbol",
-                    {'symbol': symbol}
-                )
-                if success:
-                    logger.info(f"Market: Updated {symbol} price to ${price:.2f}")
-                else:
-                    logger.warning(f"Market: Failed to update price for {symbol}")
-            else:
-                logger.warning(f"Market: Instrument {symbol} not found in database")
+            not_found = db.instruments.bulk_update_prices(price_map)
+            logger.info(f"Market: Updated prices for {len(price_map) - len(not_found)} symbols")
+            if not_found:
+                logger.warning(f"Market: Instruments not found in database: {not_found}")
         except Exception as e:
-            logger.error(f"Market: Error updating {symbol} in database: {e}")
+            logger.error(f"Market: Error updating prices in database: {e}")
 
     # Log symbols that didn't get prices
     missing = set(symbols_list) - set(price_map.keys())
@@ -110,6 +98,32 @@ def update_prices_for_symbols(symbols: Set[str], db) -> None:
         logger.warning(f"Market: No prices found for: {missing}")
 
 
+def record_price_history(db) -> int:
+    """
+    Store the prior trading day's grouped-daily download in price_history.
+
+    Runs on a daily schedule (see lambda_handler), not during analysis jobs, so
+    no user request pays for writing the whole universe. Only the EOD plan
+    downloads every ticker's close; other sources are skipped. Reruns
+    overwrite the same date, so retries are safe.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        Number of closes stored
+    """
+    if not polygon_api_key or is_paid_polygon:
+        logger.info("Market: Price history needs the Polygon EOD plan; skipping")
+        return 0
+
+    today = datetime.now().date().strftime("%Y-%m-%d")
+    as_of, closes = get_grouped_daily_for_prior_date(today)
+    count = db.price_history.load_day(as_of, closes)
+    logger.info(f"Market: Stored {count} closes for {as_of} in price history")
+    return count
+
+
 def get_all_portfolio_symbols(db) -> Set[str]:
     """
     Get all unique symbols across all users' portfolios.
@@ -1,7 +1,7 @@
 from polygon import RESTClient
 from dotenv import load_dotenv
 import os
-from datetime import datetime
+from datetime import date, datetime
 import random
 from functools import lru_cache
 from datetime import timezone
@@ -20,20 +20,30 @@ def is_market_open() -> bool:
     return market_status.market == "open"
 
 
-def get_all_share_prices_polygon_eod() -> dict[str, float]:
-    """With much thanks to student Reema R. for fixing the timezone issue with this!"""
+def get_grouped_daily_polygon_eod() -> tuple[date, dict[str, float]]:
+    """With much thanks to student Reema R. for fixing the timezone issue with this!
+
+    Returns the last trading date and every ticker's close on it."""
     client = RESTClient(polygon_api_key)
 
     probe = client.get_previous_close_agg("SPY")[0]
     last_close = datetime.fromtimestamp(probe.timestamp / 1000, tz=timezone.utc).date()
 
     results = client.get_grouped_daily_aggs(last_close, adjusted=True, include_otc=False)
-    return {result.ticker: result.close for result in results}
+    return last_close, {result.ticker: result.close for result in results}
+
+
+def get_all_share_prices_polygon_eod() -> dict[str, float]:
+    return get_grouped_daily_polygon_eod()[1]
 
 
 @lru_cache(maxsize=2)
+def get_grouped_daily_for_prior_date(today) -> tuple[date, dict[str, float]]:
+    return get_grouped_daily_polygon_eod()
+
+
 def get_market_for_prior_date(today):
-    market_data = get_all_share_prices_polygon_eod()
+    market_data = get_grouped_daily_for_prior_date(today)[1]
     return market_data
 
 
@@ -53,6 +53,10 @@ def calculate_portfolio_metrics(portfolio_data: Dict[str, Any]) -> Dict[str, Any
     metrics["total_value"] += metrics["cash_balance"]
     metrics["unique_symbols"] = len(metrics["unique_symbols"])
 
+    # Prefer the database-maintained total when the portfolio came from load_portfolio
+    if portfolio_data.get("total_value") is not None:
+        metrics["total_value"] = float(portfolio_data["total_value"])
+
     return metrics
 
 
@@ -24,7 +24,7 @@ except ImportError:
     pass
 
 # Import database package
-from src import Database
+from src import Database, track_queries
 
 from templates import REPORTER_INSTRUCTIONS
 from agent import create_agent, ReporterContext
@@ -33,6 +33,12 @@ from observability import observe
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Start waking the database during init (non-blocking); invocations create their own client
+try:
+    Database().warm_up()
+except Exception as e:
+    logger.warning(f"Database warm-up skipped: {e}")
+
 
 @retry(
     retry=retry_if_exception_type(RateLimitError),
@@ -114,7 +120,7 @@ def lambda_handler(event, context):
     }
     """
     # Wrap entire handler with observability context
-    with observe() as observability:
+    with observe() as observability, track_queries("reporter"):
         try:
             logger.info(f"Reporter Lambda invoked with event: {json.dumps(event)[:500]}")
 
@@ -141,33 +147,11 @@ def lambda_handler(event, context):
                             observability.create_event(
                                 name="Reporter Started!", status_message="OK"
                             )
-                        user = db.users.find_by_clerk_id(user_id)
-                        accounts = db.accounts.find_by_user(user_id)
-
-                        portfolio_data = {"user_id": user_id, "job_id": job_id, "accounts": []}
-
-                        for account in accounts:
-                            positions = db.positions.find_by_account(account["id"])
-                            account_data = {
-                                "id": account["id"],
-                                "name": account["account_name"],
-                                "type": account.get("account_type", "investment"),
-                                "cash_balance": float(account.get("cash_balance", 0)),
-                                "positions": [],
-                            }
-
-                            for position in positions:
-                                instrument = db.instruments.find_by_symbol(position["symbol"])
-                                if instrument:
-                                    account_data["positions"].append(
-                                        {
-                                            "symbol": position["symbol"],
-                                            "quantity": float(position["quantity"]),
-                                            "instrument": instrument,
-                                        }
-                                    )
-
-                            portfolio_data["accounts"].append(account_data)
+                        portfolio_data = db.load_portfolio(user_id) or {
+                            "user_id": user_id,
+                            "accounts": [],
+                        }
+                        portfolio_data["job_id"] = job_id
                     else:
                         return {
                             "statusCode": 404,
@@ -6,7 +6,7 @@ import os
 import json
 import logging
 import random
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
 
 # No tools needed - simplified agent
@@ -19,6 +19,10 @@ logger = logging.getLogger()
 
 def calculate_portfolio_value(portfolio_data: Dict[str, Any]) -> float:
     """Calculate current portfolio value."""
+    # Database-maintained total, present when the portfolio came from load_portfolio
+    if portfolio_data.get("total_value") is not None:
+        return float(portfolio_data["total_value"])
+
     total_value = 0.0
 
     for account in portfolio_data.get("accounts", []):
@@ -34,8 +38,27 @@ def calculate_portfolio_value(portfolio_data: Dict[str, Any]) -> float:
     return total_value
 
 
-def calculate_asset_allocation(portfolio_data: Dict[str, Any]) -> Dict[str, float]:
-    """Calculate asset allocation percentages."""
+def calculate_asset_allocation(
+    portfolio_data: Dict[str, Any], exposure: Optional[Dict[str, Dict[str, float]]] = None
+) -> Dict[str, float]:
+    """Calculate asset allocation percentages.
+
+    If exposure (from db.allocations.user_exposure, cash included) is given,
+    the fractions come from its asset_class dollar values.
+    """
+    if exposure is not None:
+        asset_classes = exposure.get("asset_class", {})
+        total = calculate_portfolio_value(portfolio_data)
+        if total <= 0:
+            return {"equity": 0, "bonds": 0, "real_estate": 0, "commodities": 0, "cash": 0}
+        return {
+            "equity": asset_classes.get("equity", 0) / total,
+            "bonds": asset_classes.get("fixed_income", 0) / total,
+            "real_estate": asset_classes.get("real_estate", 0) / total,
+            "commodities": asset_classes.get("commodities", 0) / total,
+            "cash": asset_classes.get("cash", 0) / total,
+        }
+
     total_equity = 0.0
     total_bonds = 0.0
     total_real_estate = 0.0
@@ -252,8 +275,16 @@ def create_agent(
     current_age = user_preferences.get("current_age", 40)
 
     # Calculate portfolio metrics
+    # Aggregate allocations in SQL when the portfolio belongs to a stored user
+    exposure = None
+    if db and portfolio_data.get("user_id"):
+        try:
+            exposure = db.allocations.user_exposure(portfolio_data["user_id"], "asset_class")
+        except Exception as e:
+            logger.warning(f"Retirement: Could not load exposure from database, aggregating locally: {e}")
+
     portfolio_value = calculate_portfolio_value(portfolio_data)
-    allocation = calculate_asset_allocation(portfolio_data)
+    allocation = calculate_asset_allocation(portfolio_data, exposure)
 
     # Run Monte Carlo simulation
     monte_carlo = run_monte_carlo_simulation(
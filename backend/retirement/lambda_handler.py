@@ -20,7 +20,7 @@ except ImportError:
     pass
 
 # Import database package
-from src import Database
+from src import Database, track_queries
 
 from templates import RETIREMENT_INSTRUCTIONS
 from agent import create_agent
@@ -29,6 +29,12 @@ from observability import observe
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Start waking the database during init (non-blocking); invocations create their own client
+try:
+    Database().warm_up()
+except Exception as e:
+    logger.warning(f"Database warm-up skipped: {e}")
+
 def get_user_preferences(job_id: str) -> Dict[str, Any]:
     """Load user preferences from database."""
     try:
@@ -116,7 +122,7 @@ def lambda_handler(event, context):
     }
     """
     # Wrap entire handler with observability context
-    with observe():
+    with observe(), track_queries("retirement"):
         try:
             logger.info(f"Retirement Lambda invoked with event: {json.dumps(event)[:500]}")
 
@@ -142,7 +148,11 @@ def lambda_handler(event, context):
                     db = Database()
                     job = db.jobs.find_by_id(job_id)
                     if job:
-                        portfolio_data = job.get('request_payload', {}).get('portfolio_data', {})
+                        portfolio_data = (
+                            (job.get('request_payload') or {}).get('portfolio_data')
+                            or db.load_portfolio(job['clerk_user_id'])
+                            or {'accounts': []}
+                        )
                     else:
                         return {
                             'statusCode': 404,
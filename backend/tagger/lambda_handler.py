@@ -9,7 +9,7 @@ import asyncio
 import logging
 from typing import List, Dict, Any
 
-from src import Database
+from src import Database, track_queries
 from src.schemas import InstrumentCreate
 from agent import tag_instruments, classification_to_db_format
 from observability import observe
@@ -20,6 +20,7 @@ logger.setLevel(logging.INFO)
 
 # Initialize database
 db = Database()
+db.warm_up()  # non-blocking; overlaps a paused cluster's resume with cold start
 
 async def process_instruments(instruments: List[Dict[str, str]]) -> Dict[str, Any]:
     """
@@ -39,41 +40,30 @@ async def process_instruments(instruments: List[Dict[str, str]]) -> Dict[str, An
     updated = []
     errors = []
     
+    # Convert to database format first so a bad classification only skips itself
+    prepared = []
     for classification in classifications:
         try:
-            # Convert to database format
-            db_instrument = classification_to_db_format(classification)
-            
-            # Check if instrument exists
-            existing = db.instruments.find_by_symbol(classification.symbol)
-            
-            if existing:
-                # Update existing instrument
-                update_data = db_instrument.model_dump()
-                # Remove symbol as it's the key
-                del update_data['symbol']
-                
-                rows = db.client.update(
-                    'instruments',
-                    update_data,
-                    "symbol = :symbol",
-                    {'symbol': classification.symbol}
-                )
-                logger.info(f"Updated {classification.symbol} in database ({rows} rows)")
-            else:
-                # Create new instrument
-                db.instruments.create_instrument(db_instrument)
-                logger.info(f"Created {classification.symbol} in database")
-            
-            updated.append(classification.symbol)
-            
+            prepared.append((classification.symbol, classification_to_db_format(classification)))
         except Exception as e:
-            logger.error(f"Error updating {classification.symbol}: {e}")
+            logger.error(f"Error converting {classification.symbol}: {e}")
             errors.append({
                 'symbol': classification.symbol,
                 'error': str(e)
             })
     
+    # Write all classifications in one upsert
+    try:
+        outcomes = db.instruments.bulk_upsert([db_instrument for _, db_instrument in prepared])
+        for symbol, outcome in outcomes.items():
+            logger.info(f"{outcome.capitalize()} {symbol} in database")
+        updated = list(outcomes)
+    
+    except Exception as e:
+        logger.error(f"Error updating instruments: {e}")
+        errors.extend({'symbol': symbol, 'error': str(e)} for symbol, _ in prepared)
+        updated = []
+    
     # Prepare response (convert Pydantic models to dicts)
     return {
         'tagged': len(classifications),
@@ -106,7 +96,7 @@ def lambda_handler(event, context):
     }
     """
     # Wrap entire handler with observability context
-    with observe():
+    with observe(), track_queries("tagger"):
         try:
             # Parse the event
             instruments = event.get('instruments', [])
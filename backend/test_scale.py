@@ -31,36 +31,36 @@ async def create_test_user(user_num: int, num_accounts: int, num_positions: int)
         target_retirement_income=50000 + user_num * 10000
     )
     
-    # Ensure instruments exist
+    # Ensure instruments exist (one batched insert, existing symbols are skipped)
     instruments = ["SPY", "BND", "VTI", "VXUS", "QQQ", "IWM", "EFA", "AGG", "VNQ", "GLD"]
-    for i, symbol in enumerate(instruments):
-        existing = db.instruments.find_by_symbol(symbol)
-        if not existing:
-            db.instruments.create({
-                "symbol": symbol,
-                "name": f"Test ETF {symbol}",
-                "instrument_type": "etf",
-                "current_price": 100.0 + i * 50,
-                "allocation_asset_class": {"equity": 100.0} if i % 2 == 0 else {"fixed_income": 100.0},
-                "allocation_regions": {"north_america": 100.0},
-                "allocation_sectors": {"other": 100.0}
-            }, returning='symbol')
-    
-    account_ids = []
-    total_positions = 0
+    db.client.insert_many('instruments', [
+        {
+            "symbol": symbol,
+            "name": f"Test ETF {symbol}",
+            "instrument_type": "etf",
+            "current_price": 100.0 + i * 50,
+            "allocation_asset_class": {"equity": 100.0} if i % 2 == 0 else {"fixed_income": 100.0},
+            "allocation_regions": {"north_america": 100.0},
+            "allocation_sectors": {"other": 100.0}
+        }
+        for i, symbol in enumerate(instruments)
+    ], on_conflict='ON CONFLICT (symbol) DO NOTHING')
     
     # Create accounts (ensure at least 1 account even if num_accounts is 0)
     accounts_to_create = max(num_accounts, 1)
-    for acct_num in range(1, accounts_to_create + 1):
-        account_id = db.accounts.create_account(
-            clerk_user_id=test_user,
-            account_name=f"Account {acct_num}",
-            account_purpose="test",
-            cash_balance=1000.0 * acct_num
-        )
-        account_ids.append(account_id)
-        
-        # Add positions (distribute across accounts)
+    account_ids = db.accounts.create_accounts(test_user, [
+        {
+            "account_name": f"Account {acct_num}",
+            "account_purpose": "test",
+            "cash_balance": 1000.0 * acct_num
+        }
+        for acct_num in range(1, accounts_to_create + 1)
+    ])
+    
+    # Add positions (distribute across accounts) in one batch
+    positions = []
+    total_positions = 0
+    for acct_num, account_id in enumerate(account_ids, 1):
         if num_positions > 0 and accounts_to_create > 0:
             positions_for_account = num_positions // accounts_to_create + (1 if acct_num <= (num_positions % accounts_to_create) else 0)
             for i in range(positions_for_account):
@@ -68,8 +68,9 @@ async def create_test_user(user_num: int, num_accounts: int, num_positions: int)
                     break
                 symbol = instruments[total_positions % len(instruments)]
                 qty = 10.0 * (total_positions + 1)
-                db.positions.add_position(account_id, symbol, qty)
+                positions.append((account_id, symbol, qty))
                 total_positions += 1
+    db.positions.add_positions(positions)
     
     # Create job
     job_data = {
@@ -41,6 +41,21 @@ export interface Job {
   error?: string;
 }
 
+export interface JobSummary {
+  id: string;
+  job_type: string;
+  status: string;
+  created_at: string;
+  started_at?: string | null;
+  completed_at?: string | null;
+  updated_at: string;
+}
+
+export interface JobList {
+  jobs: JobSummary[];
+  next_cursor: string | null;
+}
+
 export interface ApiError {
   detail: string;
 }
@@ -141,8 +156,17 @@ export function createApiClient(token: string) {
 
     // Job endpoints
     jobs: {
-      get: (id: string) => apiRequest<Job>(`/api/jobs/${id}`, token),
-      list: () => apiRequest<Job[]>('/api/jobs', token),
+      get: (id: string, fields?: string[]) => apiRequest<Job>(
+        fields ? `/api/jobs/${id}?fields=${fields.join(',')}` : `/api/jobs/${id}`, token
+      ),
+      list: (params: { status?: string; limit?: number; cursor?: string } = {}) => {
+        const query = new URLSearchParams();
+        Object.entries(params).forEach(([key, value]) => {
+          if (value !== undefined) query.set(key, String(value));
+        });
+        const search = query.toString();
+        return apiRequest<JobList>(search ? `/api/jobs?${search}` : '/api/jobs', token);
+      },
     },
   };
 }
@@ -19,9 +19,25 @@ interface Account {
   account_name: string;
   account_purpose: string;
   cash_balance: number;
+  total_value?: number;
   positions?: Position[];
 }
 
+// Shape of an account in the /api/portfolio response
+interface PortfolioAccount {
+  id: string;
+  name: string;
+  purpose: string;
+  cash_balance: number;
+  total_value: number;
+  positions: {
+    id: string;
+    symbol: string;
+    quantity: number;
+    instrument: { current_price?: number };
+  }[];
+}
+
 export default function Accounts() {
   const { getToken } = useAuth();
   const router = useRouter();
@@ -44,7 +60,8 @@ export default function Accounts() {
   const loadAccounts = useCallback(async () => {
     try {
       const token = await getToken();
-      const response = await fetch(`${API_URL}/api/accounts`, {
+      // Accounts, positions and values in one request
+      const response = await fetch(`${API_URL}/api/portfolio`, {
         headers: {
           'Authorization': `Bearer ${token}`,
         },
@@ -52,40 +69,20 @@ export default function Accounts() {
 
       if (response.ok) {
         const data = await response.json();
-        console.log('Accounts received from API:', data);
-        // For each account, load positions
-        const accountsWithPositions = await Promise.all(
-          data.map(async (account: Account) => {
-            console.log('Processing account:', account.id, account.account_name);
-            // Skip if account has no ID
-            if (!account.id) {
-              console.warn('Account missing ID:', account);
-              return { ...account, positions: [] };
-            }
-
-            try {
-              const positionsResponse = await fetch(
-                `${API_URL}/api/accounts/${account.id}/positions`,
-                {
-                  headers: {
-                    'Authorization': `Bearer ${token}`,
-                  },
-                }
-              );
-              if (positionsResponse.ok) {
-                const data = await positionsResponse.json();
-                const positions = data.positions || [];
-                console.log(`Loaded ${positions.length} positions for account ${account.id}`);
-                return { ...account, positions };
-              }
-            } catch (err) {
-              console.error(`Error loading positions for account ${account.id}:`, err);
-            }
-            return { ...account, positions: [] };
-          })
-        );
-        console.log('Final accounts with positions:', accountsWithPositions);
-        setAccounts(accountsWithPositions);
+        const portfolioAccounts: PortfolioAccount[] = data.accounts || [];
+        setAccounts(portfolioAccounts.map((account) => ({
+          id: account.id,
+          account_name: account.name,
+          account_purpose: account.purpose,
+          cash_balance: account.cash_balance,
+          total_value: account.total_value,
+          positions: account.positions.map((position) => ({
+            id: position.id,
+            symbol: position.symbol,
+            quantity: position.quantity,
+            current_price: position.instrument.current_price,
+          })),
+        })));
       }
     } catch (error) {
       console.error('Error loading accounts:', error);
@@ -176,6 +173,9 @@ export default function Accounts() {
   };
 
   const calculateAccountTotal = (account: Account) => {
+    if (account.total_value !== undefined) {
+      return Number(account.total_value);
+    }
     const positionsValue = account.positions?.reduce((sum, position) => {
       const value = Number(position.quantity) * (Number(position.current_price) || 0);
       return sum + value;
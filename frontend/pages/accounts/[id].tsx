@@ -97,21 +97,6 @@ export default function AccountDetail() {
         setPositions(data.positions || []);
       }
 
-      // Load instruments for autocomplete
-      const instrumentsResponse = await fetch(
-        `${API_URL}/api/instruments`,
-        {
-          headers: {
-            'Authorization': `Bearer ${token}`,
-          },
-        }
-      );
-
-      if (instrumentsResponse.ok) {
-        const instrumentsData = await instrumentsResponse.json();
-        setInstruments(instrumentsData);
-      }
-
     } catch (error) {
       console.error('Error loading account:', error);
       setMessage({ type: 'error', text: 'Failed to load account details' });
@@ -124,6 +109,39 @@ export default function AccountDetail() {
     loadAccount();
   }, [loadAccount]);
 
+  // Symbol suggestions come from the server-side search index as the user types
+  useEffect(() => {
+    if (!searchTerm) {
+      setInstruments([]);
+      return;
+    }
+
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const token = await getToken();
+        const response = await fetch(
+          `${API_URL}/api/instruments/search?q=${encodeURIComponent(searchTerm)}&limit=5`,
+          {
+            headers: {
+              'Authorization': `Bearer ${token}`,
+            },
+          }
+        );
+        if (response.ok && !cancelled) {
+          setInstruments(await response.json());
+        }
+      } catch (error) {
+        console.error('Error searching instruments:', error);
+      }
+    }, 150);
+
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchTerm, getToken]);
+
   const handleSaveAccount = async () => {
     setSaving(true);
     setMessage(null);
@@ -289,10 +307,8 @@ export default function AccountDetail() {
     return (account ? Number(account.cash_balance) : 0) + calculatePositionsValue();
   };
 
-  const filteredInstruments = instruments.filter(inst =>
-    inst.symbol.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    inst.name.toLowerCase().includes(searchTerm.toLowerCase())
-  ).slice(0, 5);
+  // Already ranked by the search endpoint
+  const filteredInstruments = instruments;
 
   if (loading) {
     return (
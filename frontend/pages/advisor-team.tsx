@@ -64,6 +64,13 @@ const agents: Agent[] = [
   }
 ];
 
+// Agent name in job result events -> the advisor shown working on it
+const RESULT_AGENTS: Record<string, string> = {
+  report: 'Portfolio Analyst',
+  charts: 'Chart Specialist',
+  retirement: 'Retirement Planner'
+};
+
 export default function AdvisorTeam() {
   const router = useRouter();
   const { getToken } = useAuth();
@@ -75,7 +82,6 @@ export default function AdvisorTeam() {
     message: '',
     activeAgents: []
   });
-  const [pollInterval, setPollInterval] = useState<NodeJS.Timeout | null>(null);
 
   useEffect(() => {
     fetchJobs();
@@ -83,84 +89,132 @@ export default function AdvisorTeam() {
   }, []);
 
   useEffect(() => {
-    const checkJobStatusLocal = async (jobId: string) => {
-      try {
-        const token = await getToken();
-        const response = await fetch(`${API_URL}/api/jobs/${jobId}`, {
-          headers: {
-            'Authorization': `Bearer ${token}`
-          }
+    if (!currentJobId) {
+      return;
+    }
+    const jobId = currentJobId;
+    const controller = new AbortController();
+
+    // Returns true once the job has finished
+    const handleStatus = (status: string, error?: string) => {
+      if (status === 'completed') {
+        setProgress({
+          stage: 'complete',
+          message: 'Analysis complete!',
+          activeAgents: []
         });
 
-        if (response.ok) {
-          const job = await response.json();
+        // Emit completion event so other components can refresh
+        emitAnalysisCompleted(jobId);
 
-          if (job.status === 'completed') {
-            setProgress({
-              stage: 'complete',
-              message: 'Analysis complete!',
-              activeAgents: []
-            });
+        // Also refresh our own jobs list
+        fetchJobs();
 
-            if (pollInterval) {
-              clearInterval(pollInterval);
-              setPollInterval(null);
-            }
+        setTimeout(() => {
+          router.push(`/analysis?job_id=${jobId}`);
+        }, 1500);
+        return true;
+      }
+      if (status === 'failed') {
+        setProgress({
+          stage: 'error',
+          message: 'Analysis failed',
+          activeAgents: [],
+          error: error || 'Analysis encountered an error'
+        });
 
-            // Emit completion event so other components can refresh
-            emitAnalysisCompleted(jobId);
-
-            // Also refresh our own jobs list
-            fetchJobs();
-
-            setTimeout(() => {
-              router.push(`/analysis?job_id=${jobId}`);
-            }, 1500);
-          } else if (job.status === 'failed') {
-            setProgress({
-              stage: 'error',
-              message: 'Analysis failed',
-              activeAgents: [],
-              error: job.error || 'Analysis encountered an error'
-            });
-
-            if (pollInterval) {
-              clearInterval(pollInterval);
-              setPollInterval(null);
-            }
+        // Emit failure event
+        emitAnalysisFailed(jobId, error);
 
-            // Emit failure event
-            emitAnalysisFailed(jobId, job.error);
+        setIsAnalyzing(false);
+        setCurrentJobId(null);
+        return true;
+      }
+      return false;
+    };
 
-            setIsAnalyzing(false);
-            setCurrentJobId(null);
+    // An agent saved its result - it is no longer working
+    const handleResult = (agent: string) => {
+      const name = RESULT_AGENTS[agent];
+      setProgress(prev => prev.stage === 'parallel' ? {
+        ...prev,
+        activeAgents: prev.activeAgents.filter(active => active !== name)
+      } : prev);
+    };
+
+    // Follow the job's Server-Sent Events; fetch (unlike EventSource) can send the auth header
+    const followJob = async () => {
+      while (!controller.signal.aborted) {
+        let finished = false;
+        try {
+          const token = await getToken();
+          const response = await fetch(`${API_URL}/api/jobs/${jobId}/events`, {
+            headers: {
+              'Authorization': `Bearer ${token}`,
+              'Accept': 'text/event-stream'
+            },
+            signal: controller.signal
+          });
+          if (!response.ok || !response.body) {
+            throw new Error(`HTTP ${response.status}`);
+          }
+
+          const reader = response.body.getReader();
+          const decoder = new TextDecoder();
+          let buffer = '';
+          while (!finished) {
+            const { value, done } = await reader.read();
+            if (done) {
+              break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+            const messages = buffer.split('\n\n');
+            buffer = messages.pop() || '';
+
+            for (const message of messages) {
+              let event = 'message';
+              let data = '';
+              for (const line of message.split('\n')) {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+              }
+              if (!data) continue;
+
+              const payload = JSON.parse(data);
+              if (event === 'status') {
+                finished = handleStatus(payload.status, payload.error_message) || finished;
+              } else if (event === 'result') {
+                handleResult(payload.agent);
+              }
+            }
+          }
+          if (finished) {
+            return;
+          }
+        } catch (error) {
+          if (controller.signal.aborted) {
+            return;
           }
+          console.error('Error following job events:', error);
         }
-      } catch (error) {
-        console.error('Error checking job status:', error);
+
+        // The server closes streams periodically; reconnect to keep following the job
+        await new Promise(resolve => setTimeout(resolve, 1000));
       }
     };
 
-    if (currentJobId && !pollInterval) {
-      const interval = setInterval(() => {
-        checkJobStatusLocal(currentJobId);
-      }, 2000);
-      setPollInterval(interval);
-    }
+    followJob();
 
     return () => {
-      if (pollInterval) {
-        clearInterval(pollInterval);
-        setPollInterval(null);
-      }
+      controller.abort();
     };
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [currentJobId, pollInterval, router]);
+  }, [currentJobId, router]);
 
   const fetchJobs = async () => {
     try {
       const token = await getToken();
-      const response = await fetch(`${API_URL}/api/jobs`, {
+      const response = await fetch(`${API_URL}/api/jobs?limit=5`, {
         headers: {
           'Authorization': `Bearer ${token}`
         }
@@ -91,8 +91,8 @@ export default function Analysis() {
       setFetchingLatest(true);
       try {
         const token = await getToken();
-        // First, get the list of jobs to find the latest completed one
-        const response = await fetch(`${API_URL}/api/jobs`, {
+        // Find the latest completed job (the listing is newest first)
+        const response = await fetch(`${API_URL}/api/jobs?status=completed&limit=1`, {
           headers: {
             'Authorization': `Bearer ${token}`
           }
@@ -101,10 +101,7 @@ export default function Analysis() {
         if (response.ok) {
           const data = await response.json();
           const jobs: JobListItem[] = data.jobs || [];
-          // Find the latest completed job
-          const latestCompletedJob = jobs
-            .filter(j => j.status === 'completed')
-            .sort((a, b) => new Date(b.created_at).getTime() - new Date(a.created_at).getTime())[0];
+          const latestCompletedJob = jobs[0];
 
           if (latestCompletedJob) {
             // Load the full job details
@@ -269,6 +269,63 @@ resource "aws_lambda_event_source_mapping" "planner_sqs" {
   batch_size       = 1
 }
 
+# Daily price history load: stores the prior trading day's closes outside any
+# analysis job (the planner handles {"task": "record_price_history"})
+resource "aws_iam_role" "price_history_scheduler" {
+  name = "alex-price-history-scheduler-role"
+
+  assume_role_policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = "sts:AssumeRole"
+        Effect = "Allow"
+        Principal = {
+          Service = "scheduler.amazonaws.com"
+        }
+      }
+    ]
+  })
+
+  tags = {
+    Project = "alex"
+    Part    = "6"
+  }
+}
+
+resource "aws_iam_role_policy" "price_history_scheduler_invoke" {
+  name = "InvokePlannerPolicy"
+  role = aws_iam_role.price_history_scheduler.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect   = "Allow"
+        Action   = ["lambda:InvokeFunction"]
+        Resource = aws_lambda_function.planner.arn
+      }
+    ]
+  })
+}
+
+resource "aws_scheduler_schedule" "price_history" {
+  name = "alex-price-history"
+
+  flexible_time_window {
+    mode = "OFF"
+  }
+
+  # Weekday mornings (UTC), once the previous session's grouped daily is published
+  schedule_expression = "cron(0 6 ? * TUE-SAT *)"
+
+  target {
+    arn      = aws_lambda_function.planner.arn
+    role_arn = aws_iam_role.price_history_scheduler.arn
+    input    = jsonencode({ task = "record_price_history" })
+  }
+}
+
 # Tagger Lambda
 resource "aws_lambda_function" "tagger" {
   function_name = "alex-tagger"